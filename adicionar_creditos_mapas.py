@@ -1,9 +1,25 @@
 """
 Script para adicionar rodapé com créditos em todos os mapas HTML
+
+O rodapé fica entre marcadores com versão (<!-- creditos-peld vN -->), então
+pode ser atualizado no lugar quando o texto mudar: basta incrementar
+VERSAO_CREDITOS. Cada página é lida de trás para frente até o último </body>.
+O rodapé ocupa um espaço reservado (RESERVA_RODAPE bytes, completado com
+espaços), então uma nova versão é gravada por cima da anterior sem mexer no
+resto da página; o que vem depois do </body> (nos mapas do folium, o script
+inteiro do mapa) só é regravado quando o rodapé entra pela primeira vez ou
+passa a não caber na reserva. Páginas já em dia não são alteradas.
 """
 
 import os
-import glob
+import re
+
+from util_arquivos import listar_paginas_html
+
+VERSAO_CREDITOS = 2
+
+# Páginas com créditos próprios
+PAGINAS_IGNORADAS = {'dashboard_peld.html'}
 
 # Rodapé HTML padrão com créditos
 rodape_creditos = """
@@ -24,49 +40,132 @@ rodape_creditos = """
 </div>
 """
 
-print("\n" + "="*70)
-print("   ADICIONANDO CRÉDITOS AOS MAPAS HTML")
-print("="*70)
-
-# Lista de arquivos HTML (mapas)
-mapas_html = [
-    'mapa_interativo_peld.html',
-    'mapa_indices_parques.html',
-    'mapa_slider_temporal.html',
-    'mapa_comparacao_lado_a_lado.html',
-    'mapa_serie_temporal.html',
-    'mapa_analise_ndvi_vs_evi.html'
-]
-
-for mapa in mapas_html:
-    if os.path.exists(mapa):
+# Rodapé gravado pelas versões antigas deste script (sem marcadores)
+RODAPE_LEGADO = (rodape_creditos + '\n').encode('utf-8')
+
+MARCADOR_INICIO = b'<!-- creditos-peld v'
+MARCADOR_FIM = b'<!-- /creditos-peld -->'
+RE_VERSAO = re.compile(rb'<!-- creditos-peld v(\d+) -->')
+
+TAMANHO_BLOCO = 64 * 1024
+# Espaço reservado para o rodapé, para as próximas versões caberem no lugar
+RESERVA_RODAPE = 2 * 1024
+# Quanto ler antes do </body> procurando um rodapé já injetado
+JANELA_RODAPE = 8 * 1024
+
+
+def bloco_creditos(tamanho=RESERVA_RODAPE):
+    """
+    Rodapé com marcadores, completado com espaços até 'tamanho' bytes (se couber)
+    """
+    bloco = (f"<!-- creditos-peld v{VERSAO_CREDITOS} -->{rodape_creditos}"
+             f"<!-- /creditos-peld -->").encode('utf-8')
+    return bloco.ljust(tamanho - 1) + b'\n'
+
+
+def localizar_ultimo_body(f, tamanho):
+    """
+    Procura o último </body> lendo o arquivo de trás para frente em blocos
+
+    Nos mapas do folium o </body> vem antes do <script> do mapa, então a
+    busca percorre esse script, mas nunca o arquivo inteiro de uma vez.
+    """
+    tag = b'</body>'
+    fim = tamanho
+    sobra = b''
+    while fim > 0:
+        inicio = max(0, fim - TAMANHO_BLOCO)
+        f.seek(inicio)
+        bloco = f.read(fim - inicio) + sobra
+        pos = bloco.rfind(tag)
+        if pos != -1:
+            return inicio + pos
+        sobra = bloco[:len(tag) - 1]
+        fim = inicio
+    return None
+
+
+def trecho_substituido(f, pos_body):
+    """
+    Retorna (início, versão) do rodapé existente logo antes do </body>
+
+    versão é None quando não há rodapé; o rodapé antigo sem marcadores conta
+    como versão 1.
+    """
+    inicio_janela = max(0, pos_body - JANELA_RODAPE)
+    f.seek(inicio_janela)
+    janela = f.read(pos_body - inicio_janela)
+
+    pos = janela.rfind(MARCADOR_INICIO)
+    if pos != -1 and janela.find(MARCADOR_FIM, pos) != -1:
+        versao = RE_VERSAO.match(janela, pos)
+        return inicio_janela + pos, int(versao.group(1)) if versao else 0
+    if janela.endswith(RODAPE_LEGADO):
+        return pos_body - len(RODAPE_LEGADO), 1
+    return pos_body, None
+
+
+def injetar_creditos(caminho):
+    """
+    Adiciona ou atualiza o rodapé de créditos de uma página, no lugar
+
+    Retorna 'adicionado', 'atualizado', 'atual' ou 'sem_body'.
+    """
+    with open(caminho, 'r+b') as f:
+        tamanho = os.fstat(f.fileno()).st_size
+        pos_body = localizar_ultimo_body(f, tamanho)
+        if pos_body is None:
+            return 'sem_body'
+
+        inicio, versao = trecho_substituido(f, pos_body)
+        if versao == VERSAO_CREDITOS:
+            return 'atual'
+
+        bloco = bloco_creditos(pos_body - inicio)
+        if versao is not None and len(bloco) == pos_body - inicio:
+            # Cabe no espaço do rodapé anterior: o resto da página fica como está
+            f.seek(inicio)
+            f.write(bloco)
+            return 'atualizado'
+
+        # Primeiro rodapé (ou maior que a reserva): o que vem depois é deslocado
+        bloco = bloco_creditos(max(RESERVA_RODAPE, len(bloco)))
+        f.seek(pos_body)
+        resto = f.read()
+        f.seek(inicio)
+        f.write(bloco + resto)
+        f.truncate()
+    return 'adicionado' if versao is None else 'atualizado'
+
+
+def main():
+    print("\n" + "="*70)
+    print("   ADICIONANDO CRÉDITOS AOS MAPAS HTML")
+    print("="*70)
+
+    mensagens = {
+        'adicionado': "✅ Créditos adicionados com sucesso!",
+        'atualizado': f"🔄 Créditos atualizados para a versão {VERSAO_CREDITOS}",
+        'atual': "✅ Já contém créditos",
+        'sem_body': "⚠️  Tag </body> não encontrada",
+    }
+
+    paginas = [p for p in listar_paginas_html() if os.path.basename(p) not in PAGINAS_IGNORADAS]
+    contagem = {}
+    for mapa in paginas:
         print(f"\n📄 Processando: {mapa}")
-        
-        # Ler conteúdo do arquivo
-        with open(mapa, 'r', encoding='utf-8') as f:
-            conteudo = f.read()
-        
-        # Verificar se já tem créditos
-        if 'Ronan Armando Caetano' in conteudo:
-            print(f"   ✅ Já contém créditos")
-            continue
-        
-        # Adicionar rodapé antes do </body>
-        if '</body>' in conteudo:
-            conteudo = conteudo.replace('</body>', rodape_creditos + '\n</body>')
-            
-            # Salvar arquivo atualizado
-            with open(mapa, 'w', encoding='utf-8') as f:
-                f.write(conteudo)
-            
-            print(f"   ✅ Créditos adicionados com sucesso!")
-        else:
-            print(f"   ⚠️  Tag </body> não encontrada")
-    else:
-        print(f"\n❌ Arquivo não encontrado: {mapa}")
-
-print("\n" + "="*70)
-print("   ✅ PROCESSO CONCLUÍDO!")
-print("="*70)
-print("\n💡 Todos os mapas agora incluem créditos no rodapé")
-print("📄 Créditos completos disponíveis em: CREDITOS.md")
+        situacao = injetar_creditos(mapa)
+        contagem[situacao] = contagem.get(situacao, 0) + 1
+        print(f"   {mensagens[situacao]}")
+
+    print("\n" + "="*70)
+    print("   ✅ PROCESSO CONCLUÍDO!")
+    print("="*70)
+    print(f"\n📊 {len(paginas)} páginas: {contagem.get('adicionado', 0)} com créditos novos, "
+          f"{contagem.get('atualizado', 0)} atualizadas, {contagem.get('atual', 0)} já em dia")
+    print("\n💡 Todos os mapas agora incluem créditos no rodapé")
+    print("📄 Créditos completos disponíveis em: CREDITOS.md")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Amostragem dos rasters de índices (NDVI/EVI/SAVI/ARVI, todas as datas) nas parcelas PPBio
+
+Para cada raster, as coordenadas de todas as parcelas são reprojetadas numa
+única chamada vetorizada e convertidas em linha/coluna; as parcelas são então
+agrupadas pelo bloco interno do GeoTIFF em que caem, e cada bloco (com a
+margem da janela) é lido uma única vez. Opcionalmente, o valor é a média de
+uma janela N×N de pixels em torno da parcela, ignorando pixels sem dado.
+
+As amostras vão para a tabela amostras_parcelas do armazém de estatísticas
+(parcela × data × índice), de forma incremental: rasters já amostrados com a
+mesma janela não são relidos. Ao final, a série parcela × data × índice é
+exportada para series_parcelas.csv.
+
+Uso:
+    python amostrar_indices_parcelas.py
+    python amostrar_indices_parcelas.py --janela 3 --csv series_janela3.csv
+    python amostrar_indices_parcelas.py --mmap
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+from pyproj import Transformer
+from rasterio.windows import Window
+
+import armazem_estatisticas as armazem
+import leitor_raster
+import parcelas
+from extrair_estatisticas_indices import listar_indices
+from instrumentacao import medir, iniciar
+from parcelas import ARQUIVO_PARCELAS
+
+ARQUIVO_SERIES = 'series_parcelas.csv'
+
+# Transformadores reaproveitados entre rasters com o mesmo CRS
+_transformadores = {}
+
+
+def carregar_parcelas(caminho=ARQUIVO_PARCELAS):
+    df = parcelas.carregar_parcelas(caminho)
+    # Chaves do armazém em texto
+    df['module'] = df['module'].astype(str)
+    df['name'] = df['name'].astype(str)
+    return df
+
+
+def linhas_colunas(src, lon, lat):
+    """
+    Linha/coluna do pixel de cada parcela no raster (vetorizado)
+    """
+    chave = src.crs.to_string()
+    if chave not in _transformadores:
+        _transformadores[chave] = Transformer.from_crs('EPSG:4326', src.crs, always_xy=True)
+    x, y = _transformadores[chave].transform(lon, lat)
+    inversa = ~src.transform
+    colunas = np.floor(inversa.a * x + inversa.b * y + inversa.c).astype(np.int64)
+    linhas = np.floor(inversa.d * x + inversa.e * y + inversa.f).astype(np.int64)
+    return linhas, colunas
+
+
+def amostrar_raster(src, linhas, colunas, janela=1):
+    """
+    Média da janela N×N em torno de cada (linha, coluna), lendo cada bloco do
+    raster uma vez. Retorna (valores, pixels válidos); NaN fora do raster.
+    """
+    n = len(linhas)
+    valores = np.full(n, np.nan)
+    pixels = np.zeros(n, dtype=np.int64)
+    meia = janela // 2
+
+    dentro = (linhas >= 0) & (linhas < src.height) & (colunas >= 0) & (colunas < src.width)
+    if not dentro.any():
+        return valores, pixels
+
+    altura_bloco, largura_bloco = src.block_shapes[0]
+    indices = np.flatnonzero(dentro)
+    blocos = (linhas[indices] // altura_bloco) * (src.width // largura_bloco + 1) \
+        + colunas[indices] // largura_bloco
+    ordem = np.argsort(blocos, kind='stable')
+    indices, blocos = indices[ordem], blocos[ordem]
+    inicios = np.flatnonzero(np.r_[True, blocos[1:] != blocos[:-1]])
+
+    nodata = src.nodata
+    for grupo in np.split(indices, inicios[1:]):
+        # Janela de leitura: o bloco, mais a margem da janela N×N
+        bl = int(linhas[grupo[0]]) // altura_bloco * altura_bloco
+        bc = int(colunas[grupo[0]]) // largura_bloco * largura_bloco
+        l0, l1 = max(bl - meia, 0), min(bl + altura_bloco + meia, src.height)
+        c0, c1 = max(bc - meia, 0), min(bc + largura_bloco + meia, src.width)
+        dados = src.read(1, window=Window(c0, l0, c1 - c0, l1 - l0)).astype(np.float64)
+        if nodata is not None:
+            dados[dados == nodata] = np.nan
+
+        soma = np.zeros(len(grupo))
+        contagem = np.zeros(len(grupo), dtype=np.int64)
+        for dl in range(-meia, meia + 1):
+            for dc in range(-meia, meia + 1):
+                l = linhas[grupo] + dl - l0
+                c = colunas[grupo] + dc - c0
+                ok = (l >= 0) & (l < dados.shape[0]) & (c >= 0) & (c < dados.shape[1])
+                v = np.full(len(grupo), np.nan)
+                v[ok] = dados[l[ok], c[ok]]
+                validos = ~np.isnan(v)
+                soma[validos] += v[validos]
+                contagem += validos
+        com_dado = contagem > 0
+        valores[grupo[com_dado]] = soma[com_dado] / contagem[com_dado]
+        pixels[grupo] = contagem
+    return valores, pixels
+
+
+def amostrar_indices(con, df, rasters, janela=1, mapeado=False):
+    """
+    Amostra os rasters pendentes nas parcelas e grava no armazém
+    """
+    chaves = list(zip(df['module'], df['name']))
+    lon = df['long'].to_numpy(dtype=float)
+    lat = df['lat'].to_numpy(dtype=float)
+    novos = 0
+
+    for indice, data, caminho in rasters:
+        hash_fonte = armazem.hash_fonte(con, caminho)
+        feitas = armazem.amostras_processadas(con, indice, data, hash_fonte, janela)
+        pendentes = np.array([k not in feitas for k in chaves])
+        if not pendentes.any():
+            print(f"   ⏭️  {indice} {data}: já amostrado")
+            continue
+
+        with medir('amostrar_raster', 'raster', arquivo=os.path.basename(caminho),
+                   parcelas=int(pendentes.sum()), janela=janela), leitor_raster.abrir(caminho, mapeado) as src:
+            linhas, colunas = linhas_colunas(src, lon[pendentes], lat[pendentes])
+            valores, pixels = amostrar_raster(src, linhas, colunas, janela)
+
+        selecionadas = [k for k, p in zip(chaves, pendentes) if p]
+        armazem.registrar_amostras(con, indice, data, hash_fonte, janela, [
+            (modulo, parcela, None if np.isnan(v) else round(float(v), 4), int(n))
+            for (modulo, parcela), v, n in zip(selecionadas, valores, pixels)
+        ])
+        novos += len(selecionadas)
+        print(f"   ✅ {indice} {data}: {int((pixels > 0).sum()):,} de {len(selecionadas):,} "
+              f"parcelas com dado")
+    return novos
+
+
+def ultimas_amostras(caminho=armazem.ARQUIVO_ARMAZEM, janela=1):
+    """
+    Valor mais recente de cada índice por parcela: {(modulo, parcela): {indice: (valor, data)}}
+    """
+    if not os.path.exists(caminho):
+        return {}
+    con = armazem.conectar(caminho)
+    ultimas = {}
+    # consultar_amostras() ordena por data dentro de cada parcela
+    for linha in armazem.consultar_amostras(con, janela=janela):
+        if linha['valor'] is not None:
+            ultimas.setdefault((linha['modulo'], linha['parcela']), {})[linha['indice']] = (
+                linha['valor'], linha['data_aquisicao'])
+    con.close()
+    return ultimas
+
+
+def popup_amostras(valores):
+    """
+    Linhas do popup com os últimos valores amostrados na parcela
+    """
+    return ''.join(f"<b>{indice} da parcela:</b> {valor:.3f} ({data})<br>"
+                   for indice, (valor, data) in sorted(valores.items()))
+
+
+def exportar_csv(con, caminho, janela=1):
+    """
+    Tabela larga: uma linha por parcela e data, uma coluna por índice
+    """
+    linhas = pd.DataFrame(armazem.consultar_amostras(con, janela=janela))
+    if linhas.empty:
+        return 0
+    tabela = linhas.pivot_table(index=['modulo', 'parcela', 'data_aquisicao'],
+                                columns='indice', values='valor', aggfunc='last').reset_index()
+    tabela.columns.name = None
+    tabela.to_csv(caminho, index=False, encoding='utf-8')
+    return len(tabela)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Amostra os índices de vegetação nas parcelas PPBio")
+    parser.add_argument('--parcelas', default=ARQUIVO_PARCELAS)
+    parser.add_argument('--janela', type=int, default=1,
+                        help="lado da janela N×N de pixels para a média (ímpar, padrão 1)")
+    parser.add_argument('--csv', default=ARQUIVO_SERIES,
+                        help=f"CSV da série parcela × data × índice (padrão: {ARQUIVO_SERIES})")
+    parser.add_argument('--mmap', action='store_true',
+                        help="lê os rasters pelo cache mapeado em memória (.cache_rasters/)")
+    args = parser.parse_args()
+    if args.janela < 1 or args.janela % 2 == 0:
+        parser.error("--janela deve ser um número ímpar >= 1")
+
+    print("\n" + "="*70)
+    print("   AMOSTRAGEM DOS ÍNDICES NAS PARCELAS PPBio")
+    print("="*70)
+
+    df = carregar_parcelas(args.parcelas)
+    rasters = listar_indices()
+    print(f"\n📍 {len(df):,} parcelas × 🛰️  {len(rasters)} rasters (janela {args.janela}×{args.janela})\n")
+
+    con = armazem.conectar()
+    novos = amostrar_indices(con, df, rasters, args.janela, args.mmap)
+    print(f"\n✅ {novos:,} nova(s) amostra(s) em: {armazem.ARQUIVO_ARMAZEM}")
+
+    n = exportar_csv(con, args.csv, args.janela)
+    print(f"📄 {n:,} linhas exportadas para: {args.csv}")
+    con.close()
+
+
+if __name__ == "__main__":
+    iniciar(__file__)
+    main()
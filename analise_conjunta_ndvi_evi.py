@@ -0,0 +1,340 @@
+"""
+Análise conjunta NDVI × EVI pixel a pixel, por zona
+
+Lê os rasters de NDVI e EVI da mesma data (co-registrados) juntos, janela
+a janela, numa única passada com memória limitada (algumas janelas por vez,
+processadas em paralelo por execucao_em_blocos.py, mais os acumuladores). Para cada zona (PNSJ, PESF e a cena inteira):
+
+- histograma conjunto 2-D (NDVI em [-1, 1], EVI em [-1, 2], passo 0,005);
+- correlação de Pearson, pelos momentos combinados entre janelas;
+- correlação de Spearman, pelos postos médios das classes do histograma;
+- regressão linear EVI = a + b·NDVI (com R²);
+- discrepância por pixel, d = min(EVI/2, 1) − NDVI (EVI levado à escala do
+  NDVI, como no mapa de análise), com média, média absoluta e a fração de
+  pixels com concordância alta (|d| < 0,1), moderada (< 0,2) e baixa.
+
+A discrepância também é gravada como raster (float32, NaN sem dado; com
+--compacto, int16 com escala, ver formato_indices.py), o
+resumo vai para analise_conjunta_ndvi_evi.json, usado nos popups de
+gerar_analise_ndvi_vs_evi.py, e os histogramas completos para
+histogramas_ndvi_evi.npz (gráficos de densidade_dispersao.py).
+
+O par NDVI/EVI é o de datas mais próximas (até TOLERANCIA_DIAS de
+diferença) ou, quando um dos nomes só tem o ano (NDVI_Landsat8_2025.tif),
+o do mesmo ano. Sem par, nada é gerado e o mapa usa só as estatísticas.
+
+Uso:
+    python analise_conjunta_ndvi_evi.py
+    python analise_conjunta_ndvi_evi.py --data 2025-06-25
+    python analise_conjunta_ndvi_evi.py --compacto
+"""
+
+import argparse
+import json
+from datetime import date, datetime
+
+import numpy as np
+import rasterio
+from rasterio.features import rasterize
+from rasterio.windows import Window, bounds as limites_janela
+
+from densidade_dispersao import ARQUIVO_HISTOGRAMAS, contar_em_classes
+from execucao_em_blocos import executar, ler_bloco
+import formato_indices
+from armazem_estatisticas import normalizar_data
+from extrair_estatisticas_indices import ZONAS, carregar_geometria_zona, listar_indices
+from instrumentacao import medir, iniciar
+from leitor_raster import abrir
+
+ARQUIVO_SAIDA = 'analise_conjunta_ndvi_evi.json'
+RASTER_DISCREPANCIA = 'discrepancia_ndvi_evi.tif'
+ZONA_CENA = 'CENA'
+TAMANHO_JANELA = 512
+
+# Faixas válidas e classes do histograma conjunto
+FAIXA_NDVI = (-1.0, 1.0)
+FAIXA_EVI = (-1.0, 2.0)
+PASSO_HISTOGRAMA = 0.005
+ORIGEM_HISTOGRAMA = (FAIXA_NDVI[0], FAIXA_EVI[0])
+# Histograma gravado no JSON: classes agrupadas de REDUCAO em REDUCAO
+REDUCAO_HISTOGRAMA = 10
+LIMIARES_CONCORDANCIA = (0.1, 0.2)
+# Diferença máxima entre as datas do NDVI e do EVI: um ciclo de revisita do Landsat
+TOLERANCIA_DIAS = 16
+
+
+def _classes(faixa):
+    return int(round((faixa[1] - faixa[0]) / PASSO_HISTOGRAMA))
+
+
+class AcumuladorConjunto:
+    """
+    Estatísticas conjuntas de NDVI (x) e EVI (y) acumuladas janela a janela
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.media_x = self.media_y = 0.0
+        self.sxx = self.syy = self.sxy = 0.0
+        self.soma_d = self.soma_abs_d = 0.0
+        self.concordancia = np.zeros(3, dtype=np.int64)
+        self.histograma = np.zeros((_classes(FAIXA_NDVI), _classes(FAIXA_EVI)), dtype=np.int64)
+
+    def adicionar(self, x, y, d):
+        nb = x.size
+        if not nb:
+            return
+        mx, my = x.mean(), y.mean()
+        dx, dy = x - mx, y - my
+        # Combinação dos momentos da janela com os acumulados (Chan et al.)
+        n = self.n + nb
+        delta_x, delta_y = mx - self.media_x, my - self.media_y
+        fator = self.n * nb / n
+        self.sxx += float(dx @ dx) + delta_x * delta_x * fator
+        self.syy += float(dy @ dy) + delta_y * delta_y * fator
+        self.sxy += float(dx @ dy) + delta_x * delta_y * fator
+        self.media_x += delta_x * nb / n
+        self.media_y += delta_y * nb / n
+        self.n = n
+
+        self.soma_d += float(d.sum())
+        abs_d = np.abs(d)
+        self.soma_abs_d += float(abs_d.sum())
+        self.concordancia += np.bincount(np.searchsorted(LIMIARES_CONCORDANCIA, abs_d, side='right'),
+                                         minlength=3)
+
+        self.histograma += contar_em_classes(x, y, ORIGEM_HISTOGRAMA, PASSO_HISTOGRAMA,
+                                             self.histograma.shape)
+
+    def spearman(self):
+        """
+        Spearman pelos postos médios das classes do histograma (empates dentro
+        da classe, exato a menos da largura de 0,005)
+        """
+        h = self.histograma.astype(np.float64)
+        n = h.sum()
+        if n < 2:
+            return None
+        cx, cy = h.sum(axis=1), h.sum(axis=0)
+        posto_x = np.cumsum(cx) - cx + (cx + 1) / 2 - (n + 1) / 2
+        posto_y = np.cumsum(cy) - cy + (cy + 1) / 2 - (n + 1) / 2
+        variancia = (cx @ posto_x ** 2) * (cy @ posto_y ** 2)
+        return float(posto_x @ h @ posto_y / np.sqrt(variancia)) if variancia > 0 else None
+
+    def resultado(self):
+        if not self.n:
+            return None
+        pearson = self.sxy / np.sqrt(self.sxx * self.syy) if self.sxx > 0 and self.syy > 0 else None
+        inclinacao = self.sxy / self.sxx if self.sxx > 0 else None
+        cx, cy = self.histograma.shape
+        reduzido = self.histograma.reshape(cx // REDUCAO_HISTOGRAMA, REDUCAO_HISTOGRAMA,
+                                           cy // REDUCAO_HISTOGRAMA, REDUCAO_HISTOGRAMA).sum(axis=(1, 3))
+        passo = PASSO_HISTOGRAMA * REDUCAO_HISTOGRAMA
+        return {
+            'pixels': self.n,
+            'media_ndvi': round(self.media_x, 4),
+            'media_evi': round(self.media_y, 4),
+            'pearson': round(pearson, 4) if pearson is not None else None,
+            'spearman': round(s, 4) if (s := self.spearman()) is not None else None,
+            'regressao': {
+                'inclinacao': round(inclinacao, 4) if inclinacao is not None else None,
+                'intercepto': round(self.media_y - inclinacao * self.media_x, 4) if inclinacao is not None else None,
+                'r2': round(pearson ** 2, 4) if pearson is not None else None,
+            },
+            'discrepancia_media': round(self.soma_d / self.n, 4),
+            'discrepancia_abs_media': round(self.soma_abs_d / self.n, 4),
+            'concordancia': {
+                classe: round(float(c) / self.n, 4)
+                for classe, c in zip(('alta', 'moderada', 'baixa'), self.concordancia)
+            },
+            'histograma': {
+                'ndvi': [round(FAIXA_NDVI[0] + i * passo, 3) for i in range(reduzido.shape[0] + 1)],
+                'evi': [round(FAIXA_EVI[0] + j * passo, 3) for j in range(reduzido.shape[1] + 1)],
+                'contagens': reduzido.tolist(),
+            },
+        }
+
+
+def _validos(dados, nodata, faixa):
+    ok = np.isfinite(dados) & (dados >= faixa[0]) & (dados <= faixa[1])
+    if nodata is not None and not np.isnan(nodata):
+        ok &= dados != nodata
+    return ok
+
+
+def janelas(largura, altura, tamanho=TAMANHO_JANELA):
+    for linha in range(0, altura, tamanho):
+        for coluna in range(0, largura, tamanho):
+            yield Window(coluna, linha, min(tamanho, largura - coluna), min(tamanho, altura - linha))
+
+
+def analisar(caminho_ndvi, caminho_evi, geometrias, caminho_discrepancia=RASTER_DISCREPANCIA,
+             compacto=False):
+    """
+    Passada única sobre o par NDVI/EVI; retorna {zona: AcumuladorConjunto}
+
+    geometrias: {zona: geometria na projeção dos rasters}
+    compacto: grava a discrepância no formato int16 com escala
+    """
+    acumuladores = {zona: AcumuladorConjunto() for zona in [ZONA_CENA, *geometrias]}
+
+    with abrir(caminho_ndvi) as ndvi_src, abrir(caminho_evi) as evi_src:
+        if (ndvi_src.transform != evi_src.transform or ndvi_src.shape != evi_src.shape
+                or ndvi_src.crs != evi_src.crs):
+            raise ValueError(f"{caminho_ndvi} e {caminho_evi} não estão co-registrados")
+
+        perfil = {
+            'driver': 'GTiff', 'width': ndvi_src.width, 'height': ndvi_src.height, 'count': 1,
+            'dtype': 'float32', 'crs': ndvi_src.crs, 'transform': ndvi_src.transform,
+            'nodata': np.nan, 'tiled': True, 'blockxsize': TAMANHO_JANELA, 'blockysize': TAMANHO_JANELA,
+            'compress': 'deflate', 'predictor': 3, 'BIGTIFF': 'IF_SAFER',
+        }
+        if compacto:
+            perfil = formato_indices.perfil_compacto(perfil)
+        transform_cena = ndvi_src.transform
+        tarefas = (_tarefa_janela(caminho_ndvi, caminho_evi, janela, transform_cena, geometrias)
+                   for janela in janelas(ndvi_src.width, ndvi_src.height))
+        with rasterio.open(caminho_discrepancia, 'w', **perfil) as saida:
+            if compacto:
+                formato_indices.gravar_escala(saida)
+            # Janelas processadas em paralelo (execucao_em_blocos); gravação e
+            # acumulação aqui, na ordem das janelas
+            for janela, discrepancia, selecoes in executar(tarefas):
+                if compacto:
+                    discrepancia = formato_indices.quantizar(discrepancia)
+                saida.write(discrepancia, 1, window=janela)
+                for zona, valores in selecoes:
+                    acumuladores[zona].adicionar(*valores)
+
+    return acumuladores
+
+
+def _tarefa_janela(caminho_ndvi, caminho_evi, janela, transform_cena, geometrias):
+    """
+    Tarefa de uma janela: (janela, discrepância, [(zona, (ndvi, evi, d))])
+    """
+    def processar():
+        ndvi, transform, nodata_ndvi = ler_bloco(caminho_ndvi, janela)
+        evi, _, nodata_evi = ler_bloco(caminho_evi, janela)
+        ndvi, evi = ndvi.astype(np.float64), evi.astype(np.float64)
+        validos = _validos(ndvi, nodata_ndvi, FAIXA_NDVI) & _validos(evi, nodata_evi, FAIXA_EVI)
+
+        discrepancia = np.full(ndvi.shape, np.nan, dtype=np.float32)
+        discrepancia[validos] = np.minimum(evi[validos] / 2.0, 1.0) - ndvi[validos]
+        if not validos.any():
+            return janela, discrepancia, []
+
+        selecoes = [(ZONA_CENA, (ndvi[validos], evi[validos], discrepancia[validos]))]
+        caixa = limites_janela(janela, transform_cena)
+        for zona, geometria in geometrias.items():
+            gx0, gy0, gx1, gy1 = geometria.bounds
+            if gx0 > caixa[2] or gx1 < caixa[0] or gy0 > caixa[3] or gy1 < caixa[1]:
+                continue
+            # Centro do pixel dentro da zona, como em rasterio.mask
+            dentro = rasterize([(geometria, 1)], out_shape=ndvi.shape, transform=transform,
+                               fill=0, dtype='uint8').astype(bool) & validos
+            selecoes.append((zona, (ndvi[dentro], evi[dentro], discrepancia[dentro])))
+        return janela, discrepancia, selecoes
+    return processar
+
+
+def salvar_histogramas(acumuladores, caminho=ARQUIVO_HISTOGRAMAS):
+    """
+    Histogramas completos por zona, para os gráficos de densidade_dispersao.py
+    """
+    np.savez_compressed(caminho, origem=np.array(ORIGEM_HISTOGRAMA), passo=PASSO_HISTOGRAMA,
+                        **{f"zona_{zona}": acc.histograma for zona, acc in acumuladores.items()})
+
+
+def _distancia(rotulo_ndvi, rotulo_evi, tolerancia):
+    """
+    Dias entre as duas datas; 0 no mesmo ano quando uma só tem o ano; None se não formam par
+    """
+    if len(rotulo_ndvi) == 4 or len(rotulo_evi) == 4:
+        return 0 if rotulo_ndvi[:4] == rotulo_evi[:4] else None
+    dias = abs((date.fromisoformat(rotulo_ndvi) - date.fromisoformat(rotulo_evi)).days)
+    return dias if dias <= tolerancia else None
+
+
+def par_da_data(rasters, data=None, tolerancia=TOLERANCIA_DIAS):
+    """
+    (data, NDVI, EVI) do par mais recente, ou do par que inclui a data pedida
+
+    Entre pares igualmente recentes, vale o de datas completas mais próximas. A data
+    do par é a mais recente das duas (o ano, se nenhuma é completa).
+    """
+    ndvis = [(d, c) for indice, d, c in rasters if indice == 'NDVI']
+    evis = [(d, c) for indice, d, c in rasters if indice == 'EVI']
+    pares = []
+    for rotulo_ndvi, caminho_ndvi in ndvis:
+        for rotulo_evi, caminho_evi in evis:
+            if data is not None and data not in (rotulo_ndvi, rotulo_evi):
+                continue
+            distancia = _distancia(rotulo_ndvi, rotulo_evi, tolerancia)
+            if distancia is None:
+                continue
+            completas = [r for r in (rotulo_ndvi, rotulo_evi) if len(r) == 10]
+            data_par = max(completas) if completas else rotulo_ndvi
+            pares.append((normalizar_data(data_par), len(completas), -distancia,
+                          data_par, caminho_ndvi, caminho_evi))
+    if not pares:
+        return None
+    return max(pares)[3:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Análise conjunta NDVI × EVI por pixel")
+    parser.add_argument('--data', help="data do NDVI ou do EVI (AAAA-MM-DD ou AAAA); padrão: o par mais recente")
+    parser.add_argument('--tolerancia', type=int, default=TOLERANCIA_DIAS,
+                        help=f"diferença máxima em dias entre NDVI e EVI (padrão: {TOLERANCIA_DIAS})")
+    parser.add_argument('--raster', default=RASTER_DISCREPANCIA, help="raster de discrepância gerado")
+    parser.add_argument('--saida', default=ARQUIVO_SAIDA)
+    parser.add_argument('--compacto', action='store_true',
+                        help="grava a discrepância como int16 com escala (formato_indices.py)")
+    args = parser.parse_args()
+
+    print("\n" + "="*70)
+    print("   ANÁLISE CONJUNTA NDVI × EVI (PIXEL A PIXEL)")
+    print("="*70)
+
+    par = par_da_data(listar_indices(), args.data, args.tolerancia)
+    if par is None:
+        # Não é erro: gerar_analise_ndvi_vs_evi.py funciona sem a análise conjunta
+        print("   ⚠️  Nenhum par NDVI/EVI com datas compatíveis; análise conjunta não gerada")
+        return
+    data, caminho_ndvi, caminho_evi = par
+    print(f"\n🛰️  Par escolhido ({data}): {caminho_ndvi} × {caminho_evi}\n")
+
+    geometrias = {zona: g for zona in ZONAS if (g := carregar_geometria_zona(zona)) is not None}
+    with medir('analise_conjunta', 'raster', data=data):
+        acumuladores = analisar(caminho_ndvi, caminho_evi, geometrias, args.raster, args.compacto)
+    zonas = {zona: acc.resultado() for zona, acc in acumuladores.items()}
+    salvar_histogramas(acumuladores)
+
+    with open(args.saida, 'w', encoding='utf-8') as f:
+        json.dump({
+            'data_aquisicao': data,
+            'ndvi': caminho_ndvi,
+            'evi': caminho_evi,
+            'raster_discrepancia': args.raster,
+            'histogramas': ARQUIVO_HISTOGRAMAS,
+            'gerado_em': datetime.now().isoformat(timespec='seconds'),
+            'zonas': zonas,
+        }, f, indent=2, ensure_ascii=False)
+
+    print("\n📊 Resumo por zona:")
+    for zona, r in zonas.items():
+        if r is None:
+            print(f"   • {zona}: sem pixels válidos")
+            continue
+        print(f"   • {zona}: {r['pixels']:,} pixels · Pearson {r['pearson']} · Spearman {r['spearman']} · "
+              f"EVI = {r['regressao']['intercepto']} + {r['regressao']['inclinacao']}·NDVI · "
+              f"concordância alta {100 * r['concordancia']['alta']:.1f}%")
+    print(f"\n✅ Resumo salvo em: {args.saida}")
+    print(f"✅ Raster de discrepância: {args.raster}")
+    print(f"✅ Histogramas conjuntos: {ARQUIVO_HISTOGRAMAS}")
+
+
+if __name__ == "__main__":
+    iniciar(__file__)
+    main()
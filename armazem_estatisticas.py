@@ -0,0 +1,289 @@
+"""
+Armazém incremental (append-only) das estatísticas dos índices de vegetação
+
+As estatísticas ficam numa tabela SQLite com chave
+(indice, zona, data_aquisicao, hash_fonte, hash_geometria). Uma nova data
+Landsat gera apenas novas linhas; o que já foi calculado nunca é recalculado,
+a menos que o raster ou o limite da zona mudem.
+
+data_aquisicao é sempre uma data completa (AAAA-MM-DD); o rótulo do nome do
+arquivo ('2025' ou '2025-06-25') fica em rotulo_data. Um raster com só o ano
+no nome entra como 1º de janeiro e, nas consultas, vale a aquisição completa
+daquele ano, quando há exatamente uma: NDVI_Landsat8_2025.tif e
+EVI_2025_06_25.tif são o mesmo período.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+from datetime import datetime
+
+from util_arquivos import hash_arquivo
+
+ARQUIVO_ARMAZEM = "estatisticas_indices.sqlite"
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS estatisticas (
+    indice TEXT NOT NULL,
+    zona TEXT NOT NULL,
+    data_aquisicao TEXT NOT NULL,
+    rotulo_data TEXT NOT NULL,
+    hash_fonte TEXT NOT NULL,
+    hash_geometria TEXT NOT NULL,
+    arquivo TEXT NOT NULL,
+    media REAL,
+    mediana REAL,
+    desvio_padrao REAL,
+    minimo REAL,
+    maximo REAL,
+    pixels INTEGER,
+    processado_em TEXT NOT NULL,
+    PRIMARY KEY (indice, zona, data_aquisicao, hash_fonte, hash_geometria)
+);
+CREATE TABLE IF NOT EXISTS amostras_parcelas (
+    indice TEXT NOT NULL,
+    data_aquisicao TEXT NOT NULL,
+    rotulo_data TEXT NOT NULL,
+    modulo TEXT NOT NULL,
+    parcela TEXT NOT NULL,
+    janela INTEGER NOT NULL,
+    hash_fonte TEXT NOT NULL,
+    valor REAL,
+    pixels INTEGER NOT NULL,
+    processado_em TEXT NOT NULL,
+    PRIMARY KEY (indice, data_aquisicao, modulo, parcela, janela, hash_fonte)
+);
+CREATE TABLE IF NOT EXISTS fontes (
+    caminho TEXT PRIMARY KEY,
+    tamanho INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    hash TEXT NOT NULL
+);
+"""
+
+CAMPOS_ESTATISTICAS = ('media', 'mediana', 'desvio_padrao', 'minimo', 'maximo', 'pixels')
+
+# Colunas que identificam um valor vigente (sem o hash da fonte/geometria)
+CHAVES_PERIODO = {
+    'estatisticas': ('indice', 'zona', 'data_aquisicao'),
+    'amostras_parcelas': ('indice', 'data_aquisicao', 'modulo', 'parcela', 'janela'),
+}
+
+
+def conectar(caminho=ARQUIVO_ARMAZEM):
+    """
+    Abre (ou cria) o armazém de estatísticas
+
+    Um armazém do esquema anterior (sem rotulo_data/hash_geometria) tem as
+    tabelas de resultados recriadas: são recalculadas na próxima extração.
+    O cache de hashes dos rasters (fontes) é mantido.
+    """
+    con = sqlite3.connect(caminho)
+    con.row_factory = sqlite3.Row
+    colunas = {linha['name'] for linha in con.execute("PRAGMA table_info(estatisticas)")}
+    if colunas and 'hash_geometria' not in colunas:
+        print(f"   ♻️  {caminho}: esquema anterior, estatísticas e amostras serão recalculadas")
+        con.executescript("DROP TABLE estatisticas; DROP TABLE IF EXISTS amostras_parcelas;")
+    con.executescript(ESQUEMA)
+    return con
+
+
+def data_do_arquivo(nome_arquivo):
+    """
+    Extrai a data de aquisição do nome do arquivo do índice
+
+    Ex.: 'EVI_2025_06_25.tif' -> '2025-06-25', 'NDVI_Landsat8_2025.tif' -> '2025'
+    """
+    nome = os.path.basename(nome_arquivo)
+    completa = re.search(r'(?<!\d)(\d{4})[-_](\d{2})[-_](\d{2})(?!\d)', nome)
+    if completa:
+        return '-'.join(completa.groups())
+    ano = re.search(r'(?<!\d)((?:19|20)\d{2})(?!\d)', nome)
+    if ano:
+        return ano.group(1)
+    return None
+
+
+def normalizar_data(rotulo):
+    """
+    Data completa (AAAA-MM-DD) de um rótulo de data_do_arquivo()
+
+    Ex.: '2025-06-25' -> '2025-06-25', '2025' -> '2025-01-01'
+    """
+    return f"{rotulo}-01-01" if len(rotulo) == 4 else rotulo
+
+
+def hash_geometria(geometria):
+    """
+    Hash (WKB) do limite da zona: um limite alterado invalida as estatísticas
+    """
+    return hashlib.sha256(geometria.wkb).hexdigest()
+
+
+def _periodos(con, tabela, linhas):
+    """
+    Resolve as datas só com o ano e mantém a linha inserida por último de cada chave
+
+    Uma linha com rótulo '2025' passa a valer a única aquisição completa de
+    2025 presente na tabela; com nenhuma (ou várias), fica em 2025-01-01.
+    """
+    completas = {}
+    for (data,) in con.execute(
+            f"SELECT DISTINCT data_aquisicao FROM {tabela} WHERE length(rotulo_data) = 10"):
+        completas.setdefault(data[:4], []).append(data)
+
+    vigentes = {}
+    for linha in linhas:
+        linha = dict(linha)
+        if len(linha['rotulo_data']) == 4 and len(completas.get(linha['rotulo_data'], [])) == 1:
+            linha['data_aquisicao'] = completas[linha['rotulo_data']][0]
+        chave = tuple(linha[c] for c in CHAVES_PERIODO[tabela])
+        # As linhas chegam em ordem de rowid: a última inserida sobrescreve
+        vigentes[chave] = linha
+    return list(vigentes.values())
+
+
+def hash_fonte(con, caminho):
+    """
+    Retorna o hash do raster de origem
+
+    O hash só é recalculado quando tamanho ou data de modificação mudam,
+    para que a verificação diária não precise reler o acervo inteiro.
+    """
+    st = os.stat(caminho)
+    linha = con.execute(
+        "SELECT tamanho, mtime_ns, hash FROM fontes WHERE caminho = ?", (caminho,)
+    ).fetchone()
+    if linha and linha['tamanho'] == st.st_size and linha['mtime_ns'] == st.st_mtime_ns:
+        return linha['hash']
+
+    h = hash_arquivo(caminho)
+    con.execute(
+        "INSERT OR REPLACE INTO fontes (caminho, tamanho, mtime_ns, hash) VALUES (?, ?, ?, ?)",
+        (caminho, st.st_size, st.st_mtime_ns, h)
+    )
+    con.commit()
+    return h
+
+
+def ja_processado(con, indice, zona, rotulo_data, hash_fonte, hash_geometria):
+    """
+    Verifica se a combinação já está no armazém
+    """
+    linha = con.execute(
+        """SELECT 1 FROM estatisticas
+           WHERE indice = ? AND zona = ? AND data_aquisicao = ? AND hash_fonte = ?
+             AND hash_geometria = ?""",
+        (indice, zona, normalizar_data(rotulo_data), hash_fonte, hash_geometria)
+    ).fetchone()
+    return linha is not None
+
+
+def registrar(con, indice, zona, rotulo_data, hash_fonte, hash_geometria, arquivo, estatisticas):
+    """
+    Acrescenta as estatísticas de uma (indice, zona, data) ao armazém
+    """
+    con.execute(
+        """INSERT OR IGNORE INTO estatisticas
+           (indice, zona, data_aquisicao, rotulo_data, hash_fonte, hash_geometria, arquivo,
+            media, mediana, desvio_padrao, minimo, maximo, pixels, processado_em)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        (indice, zona, normalizar_data(rotulo_data), rotulo_data, hash_fonte, hash_geometria, arquivo,
+         *(estatisticas[c] for c in CAMPOS_ESTATISTICAS),
+         datetime.now().isoformat(timespec='seconds'))
+    )
+    con.commit()
+
+
+def consultar(con, indice=None, zona=None, inicio=None, fim=None):
+    """
+    Retorna as estatísticas vigentes, uma linha por (indice, zona, data)
+
+    Se a mesma data foi reprocessada a partir de um raster (ou limite)
+    diferente, vale a versão inserida por último (a tabela só recebe
+    acréscimos). inicio/fim são datas completas (AAAA-MM-DD).
+    """
+    filtros, params = [], []
+    for coluna, valor in (('indice', indice), ('zona', zona)):
+        if valor is not None:
+            filtros.append(f"{coluna} = ?")
+            params.append(valor)
+    where = ("WHERE " + " AND ".join(filtros)) if filtros else ""
+
+    linhas = con.execute(f"SELECT * FROM estatisticas {where} ORDER BY rowid", params).fetchall()
+    # Filtro de datas depois de resolver os rótulos só com o ano
+    linhas = [linha for linha in _periodos(con, 'estatisticas', linhas)
+              if (inicio is None or linha['data_aquisicao'] >= inicio)
+              and (fim is None or linha['data_aquisicao'] <= fim)]
+    return sorted(linhas, key=lambda l: (l['data_aquisicao'], l['indice'], l['zona']))
+
+
+def exportar_json_legado(con, caminho):
+    """
+    Gera o JSON no formato antigo ({indice: {zona: stats}}) com a data
+    mais recente de cada índice, usado por gerar_analise_ndvi_vs_evi.py
+    """
+    resultados = {}
+    for linha in consultar(con):
+        # consultar() ordena por data, então a última data sobrescreve as anteriores
+        resultados.setdefault(linha['indice'], {})[linha['zona']] = {
+            'parque': linha['zona'],
+            **{c: linha[c] for c in CAMPOS_ESTATISTICAS},
+            'data_aquisicao': linha['data_aquisicao'],
+            'rotulo_data': linha['rotulo_data'],
+        }
+
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(resultados, f, indent=2, ensure_ascii=False)
+    return resultados
+
+
+def amostras_processadas(con, indice, rotulo_data, hash_fonte, janela):
+    """
+    Parcelas (modulo, parcela) já amostradas neste raster com esta janela
+    """
+    linhas = con.execute(
+        """SELECT modulo, parcela FROM amostras_parcelas
+           WHERE indice = ? AND data_aquisicao = ? AND hash_fonte = ? AND janela = ?""",
+        (indice, normalizar_data(rotulo_data), hash_fonte, janela)
+    ).fetchall()
+    return {(linha['modulo'], linha['parcela']) for linha in linhas}
+
+
+def registrar_amostras(con, indice, rotulo_data, hash_fonte, janela, amostras):
+    """
+    Acrescenta as amostras de um raster: amostras = [(modulo, parcela, valor, pixels)]
+    """
+    processado_em = datetime.now().isoformat(timespec='seconds')
+    data_aquisicao = normalizar_data(rotulo_data)
+    con.executemany(
+        """INSERT OR IGNORE INTO amostras_parcelas
+           (indice, data_aquisicao, rotulo_data, modulo, parcela, janela, hash_fonte,
+            valor, pixels, processado_em)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        [(indice, data_aquisicao, rotulo_data, modulo, parcela, janela, hash_fonte,
+          valor, pixels, processado_em)
+         for modulo, parcela, valor, pixels in amostras]
+    )
+    con.commit()
+
+
+def consultar_amostras(con, indice=None, modulo=None, parcela=None, janela=1):
+    """
+    Série temporal das parcelas, uma linha por (indice, data, modulo, parcela)
+
+    Como em consultar(), vale a amostra do raster inserido por último.
+    """
+    filtros, params = ["janela = ?"], [janela]
+    for coluna, valor in (('indice', indice), ('modulo', modulo), ('parcela', parcela)):
+        if valor is not None:
+            filtros.append(f"{coluna} = ?")
+            params.append(valor)
+
+    linhas = con.execute(
+        f"SELECT * FROM amostras_parcelas WHERE {' AND '.join(filtros)} ORDER BY rowid", params
+    ).fetchall()
+    return sorted(_periodos(con, 'amostras_parcelas', linhas),
+                  key=lambda l: (l['modulo'], l['parcela'], l['data_aquisicao'], l['indice']))
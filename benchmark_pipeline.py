@@ -0,0 +1,461 @@
+"""
+Benchmark reprodutível das etapas do pipeline PELD com dados sintéticos
+
+Gera, sem acesso à rede, rasters de índice em UTM zona 22 (EPSG:32622) de
+tamanho configurável, polígonos com formato de parque e número de vértices
+configurável, e CSVs de parcelas com N linhas. Mede cada etapa contra esses
+dados e acumula os resultados em .benchmark/resultados.jsonl, identificados
+pelo commit, para comparação entre versões.
+
+Etapas medidas:
+    estatisticas     extrair_estatisticas_parque (recorte + estatísticas), no processo
+    contornos        gerar_contornos_altimetria.py sobre um MDE sintético
+    mapa_peld        gerar_mapa_peld.py (conversão dos shapefiles + marcadores)
+    indices_parques  gerar_mapa_indices_parques_v2.py
+    temporal         gerar_visualizacoes_temporais.py sobre um armazém sintético
+
+Os scripts rodam num diretório isolado (.benchmark/caso_*) que imita a
+estrutura de pastas do projeto; os dados gerados são reaproveitados entre
+execuções (mesma semente -> mesmos arquivos).
+
+Uso:
+    python benchmark_pipeline.py                        # perfil padrão
+    python benchmark_pipeline.py --perfil rapido
+    python benchmark_pipeline.py --tamanhos 1000 20000 --vertices 500 50000
+    python benchmark_pipeline.py --comparar HEAD~1 --limite 0.15   # falha se regredir
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import rasterio
+from rasterio.transform import from_origin
+from shapely.geometry import Polygon
+
+import armazem_estatisticas as armazem
+from extrair_estatisticas_indices import extrair_estatisticas_parque
+from leitor_raster import cache_blocos
+
+PASTA_BENCHMARK = '.benchmark'
+ARQUIVO_RESULTADOS = os.path.join(PASTA_BENCHMARK, 'resultados.jsonl')
+PASTA_SCRIPTS = os.path.dirname(os.path.abspath(__file__))
+
+SEMENTE = 42
+EPSG_UTM = 32622
+TAMANHO_PIXEL = 30.0  # metros, como o Landsat
+# Canto superior esquerdo perto do PARNA São Joaquim. Os produtos Landsat usam
+# a zona UTM 22 norte também no hemisfério sul, com northing negativo
+ORIGEM_X, ORIGEM_Y = 600000.0, -3070000.0
+
+PERFIS = {
+    'rapido': {'tamanhos': [1000], 'vertices': [200], 'linhas': [500], 'periodos': [5]},
+    'padrao': {'tamanhos': [1000, 4000], 'vertices': [200, 5000], 'linhas': [1000, 10000],
+               'periodos': [10]},
+    'completo': {'tamanhos': [1000, 5000, 10000, 20000], 'vertices': [200, 5000, 50000],
+                 'linhas': [1000, 10000, 100000], 'periodos': [10, 40]},
+}
+
+ETAPAS = ('estatisticas', 'contornos', 'mapa_peld', 'indices_parques', 'temporal')
+
+# ============================================================================
+# DADOS SINTÉTICOS
+# ============================================================================
+
+def campo_suave(linhas, colunas, base, amplitude, ruido, semente):
+    """
+    Superfície suave com ruído, em float32, para um bloco de linhas do raster
+    """
+    y = linhas[:, None].astype(np.float32)
+    x = colunas[None, :].astype(np.float32)
+    valores = base + amplitude * (np.sin(x / 157.0) * np.cos(y / 211.0)
+                                  + 0.5 * np.sin((x + y) / 73.0))
+    rng = np.random.default_rng(semente)
+    return (valores + rng.normal(0, ruido, valores.shape)).astype(np.float32)
+
+
+def gerar_raster(caminho, tamanho, tipo='indice'):
+    """
+    Raster tamanho x tamanho em EPSG:32622, gravado em blocos de 512 linhas
+    para que 20k² não precise caber na memória
+    """
+    if os.path.exists(caminho):
+        return caminho
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    perfil = {
+        'driver': 'GTiff', 'width': tamanho, 'height': tamanho, 'count': 1,
+        'dtype': 'float32', 'crs': f"EPSG:{EPSG_UTM}",
+        'transform': from_origin(ORIGEM_X, ORIGEM_Y, TAMANHO_PIXEL, TAMANHO_PIXEL),
+        'nodata': -9999.0, 'tiled': True, 'blockxsize': 512, 'blockysize': 512,
+        'BIGTIFF': 'IF_SAFER',
+    }
+    colunas = np.arange(tamanho)
+    with rasterio.open(caminho + '.tmp', 'w', **perfil) as dst:
+        for inicio in range(0, tamanho, 512):
+            linhas = np.arange(inicio, min(inicio + 512, tamanho))
+            if tipo == 'mde':
+                bloco = campo_suave(linhas, colunas, 1300, 400, 5, SEMENTE + inicio)
+            else:
+                bloco = np.clip(campo_suave(linhas, colunas, 0.55, 0.2, 0.05, SEMENTE + inicio), -1, 1)
+            # Faixa sem dados na borda, como nas cenas reais
+            bloco[:, :tamanho // 50] = -9999.0
+            dst.write(bloco, 1, window=((linhas[0], linhas[-1] + 1), (0, tamanho)))
+    os.replace(caminho + '.tmp', caminho)
+    return caminho
+
+
+def poligono_parque(tamanho, vertices, escala=0.35, deslocamento=(0.0, 0.0), semente=SEMENTE):
+    """
+    Polígono estrelado (sempre válido) com contorno irregular de parque,
+    centrado no raster de lado 'tamanho'
+    """
+    rng = np.random.default_rng(semente)
+    harmonicos = rng.normal(0, 1, (6, 2))
+    angulos = np.linspace(0, 2 * np.pi, vertices, endpoint=False)
+    raio = np.ones_like(angulos)
+    for k, (a, b) in enumerate(harmonicos, start=2):
+        raio += 0.04 * (a * np.cos(k * angulos) + b * np.sin(k * angulos))
+    raio += rng.normal(0, 0.005, vertices)
+
+    extensao = tamanho * TAMANHO_PIXEL
+    cx = ORIGEM_X + extensao * (0.5 + deslocamento[0])
+    cy = ORIGEM_Y - extensao * (0.5 + deslocamento[1])
+    r = extensao * escala * np.clip(raio, 0.5, None)
+    return Polygon(np.column_stack([cx + r * np.cos(angulos), cy + r * np.sin(angulos)]))
+
+
+def gravar_shapefile(caminho, geometrias, atributos=None):
+    if os.path.exists(caminho):
+        return
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    gdf = gpd.GeoDataFrame(atributos or {}, geometry=geometrias, crs=f"EPSG:{EPSG_UTM}")
+    gdf.to_file(caminho)
+
+
+def gerar_csv_parcelas(caminho, linhas):
+    """
+    CSV no formato de amb_csv/ppbio_sc-coordenadas_parcelas.csv
+    """
+    if os.path.exists(caminho):
+        return
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    rng = np.random.default_rng(SEMENTE)
+    pd.DataFrame({
+        'module': [f"M{i // 20 + 1}" for i in range(linhas)],
+        'name': [f"Parcela {i + 1}" for i in range(linhas)],
+        'type': np.where(rng.random(linhas) < 0.7, 'Terrestre', 'Ripária'),
+        'lat': np.round(rng.uniform(-28.35, -27.95, linhas), 6),
+        'long': np.round(rng.uniform(-49.75, -49.30, linhas), 6),
+    }).to_csv(caminho, sep=';', encoding='latin1', index=False)
+
+
+def preparar_caso(nome):
+    """
+    Diretório isolado onde os scripts rodam com os dados sintéticos
+    """
+    pasta = os.path.join(PASTA_BENCHMARK, nome)
+    os.makedirs(pasta, exist_ok=True)
+    return pasta
+
+
+def preparar_projeto(pasta, vertices, linhas):
+    """
+    Estrutura de pastas esperada por gerar_mapa_peld.py e gerar_mapa_indices_parques_v2.py
+    """
+    tamanho = 2000  # só define a extensão dos polígonos (60 km)
+    gerar_csv_parcelas(os.path.join(pasta, 'amb_csv', 'ppbio_sc-coordenadas_parcelas.csv'), linhas)
+    gravar_shapefile(
+        os.path.join(pasta, 'PROJETO_PELDSC', 'PARNA_SAO_JOAQUIM_SHP', 'PARNA SAO JOAQUIM SHP',
+                     'PARNASJlimites.shp'),
+        [poligono_parque(tamanho, vertices, 0.2, (-0.2, 0.1))])
+    gravar_shapefile(
+        os.path.join(pasta, 'Projeto_PARNA_PESF', 'PARQUE_PESF_1_temp.shp'),
+        [poligono_parque(tamanho, vertices, 0.1, (0.25, -0.2), SEMENTE + 1)])
+    cidades = [poligono_parque(tamanho, max(vertices // 10, 16), 0.08,
+                               (0.3 * np.cos(k), 0.3 * np.sin(k)), SEMENTE + 10 + k) for k in range(10)]
+    gravar_shapefile(
+        os.path.join(pasta, 'Projeto_PARNA_PESF', 'Cidades_parna_sj_temp.shp'), cidades,
+        {'NM_MUN': [f"Município {k + 1}" for k in range(10)],
+         'AREA_KM2': [round(c.area / 1e6, 2) for c in cidades]})
+    gravar_shapefile(
+        os.path.join(pasta, 'Organizacao Territorio', 'SC_UF_2024', 'SC_UF_2024.shp'),
+        [poligono_parque(tamanho, vertices * 4, 0.48, semente=SEMENTE + 2)], {'NM_UF': ['Santa Catarina']})
+
+
+def preparar_armazem(pasta, periodos):
+    """
+    Armazém de estatísticas com 'periodos' datas para os dois parques
+    """
+    caminho = os.path.join(pasta, armazem.ARQUIVO_ARMAZEM)
+    if os.path.exists(caminho):
+        return
+    rng = np.random.default_rng(SEMENTE)
+    con = armazem.conectar(caminho)
+    for p in range(periodos):
+        data = f"{2000 + p // 4:04d}-{1 + 3 * (p % 4):02d}-15"
+        for zona in ('PNSJ', 'PESF'):
+            for indice, base in (('NDVI', 0.75), ('EVI', 0.55), ('SAVI', 0.6), ('ARVI', 0.7)):
+                media = float(base + rng.normal(0, 0.03))
+                armazem.registrar(con, indice, zona, data, f"sintetico-{p}", "sintetico",
+                                  f"{indice}_{data}.tif", {
+                    'media': media, 'mediana': media, 'desvio_padrao': 0.1,
+                    'minimo': media - 0.4, 'maximo': min(media + 0.2, 1.0), 'pixels': 100000,
+                })
+    con.close()
+
+# ============================================================================
+# MEDIÇÃO
+# ============================================================================
+
+def cronometrar(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return tempos
+
+
+def rodar_script(script, pasta, argumentos=()):
+    """
+    Executa um script do pipeline dentro da pasta do caso; retorna o
+    relatório de instrumentação (pico de memória e trechos)
+    """
+    relatorios = os.path.abspath(os.path.join(pasta, 'relatorios'))
+    processo = subprocess.run(
+        [sys.executable, os.path.join(PASTA_SCRIPTS, script), *argumentos],
+        cwd=pasta, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+        env={**os.environ, 'PYTHONIOENCODING': 'utf-8', 'PELD_RELATORIOS': relatorios,
+             'MPLBACKEND': 'Agg'}
+    )
+    if processo.returncode != 0:
+        raise RuntimeError(f"{script} falhou:\n{processo.stderr[-2000:]}")
+    caminho = os.path.join(relatorios, os.path.splitext(script)[0] + '.json')
+    if os.path.exists(caminho):
+        with open(caminho, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def medir_script(script, pasta, repeticoes, argumentos=()):
+    relatorio = {}
+
+    def executar():
+        relatorio.update(rodar_script(script, pasta, argumentos))
+
+    tempos = cronometrar(executar, repeticoes)
+    return tempos, relatorio.get('pico_memoria_mb'), relatorio.get('categorias', {})
+
+
+def casos(config):
+    """
+    Lista (etapa, parâmetros) a medir conforme o perfil/argumentos
+    """
+    lista = []
+    for tamanho in config['tamanhos']:
+        for vertices in config['vertices']:
+            lista.append(('estatisticas', {'tamanho': tamanho, 'vertices': vertices}))
+    lista.append(('contornos', {'tamanho': min(config['tamanhos'])}))
+    for vertices in config['vertices']:
+        for linhas in config['linhas']:
+            lista.append(('mapa_peld', {'vertices': vertices, 'linhas': linhas}))
+    for linhas in config['linhas']:
+        lista.append(('indices_parques', {'linhas': linhas}))
+    for periodos in config['periodos']:
+        lista.append(('temporal', {'periodos': periodos}))
+    return [(etapa, p) for etapa, p in lista if etapa in config['etapas']]
+
+
+def executar_caso(etapa, parametros, repeticoes):
+    """
+    Prepara os dados e mede uma etapa; retorna (tempos, pico_mb, categorias)
+    """
+    dados = os.path.join(PASTA_BENCHMARK, 'dados')
+
+    if etapa == 'estatisticas':
+        raster = gerar_raster(os.path.join(dados, f"NDVI_{parametros['tamanho']}.tif"),
+                              parametros['tamanho'])
+        geometria = poligono_parque(parametros['tamanho'], parametros['vertices'])
+        resultado = {}
+
+        def extrair():
+            # Cada repetição mede a decodificação completa, sem os blocos da anterior
+            cache_blocos.limpar()
+            resultado['stats'] = extrair_estatisticas_parque(raster, geometria, 'SINTETICO')
+
+        tempos = cronometrar(extrair, repeticoes)
+        if not resultado['stats']:
+            raise RuntimeError("extrair_estatisticas_parque não retornou estatísticas")
+        return tempos, None, {}
+
+    if etapa == 'contornos':
+        pasta = preparar_caso(f"caso_contornos_{parametros['tamanho']}")
+        mde = os.path.join(pasta, 'Projeto_PARNA_PESF', 'MDE_Completo_Cidades.tif')
+        if not os.path.exists(mde):
+            os.makedirs(os.path.dirname(mde), exist_ok=True)
+            shutil.copy(gerar_raster(os.path.join(dados, f"MDE_{parametros['tamanho']}.tif"),
+                                     parametros['tamanho'], 'mde'), mde)
+        return medir_script('gerar_contornos_altimetria.py', pasta, repeticoes)
+
+    if etapa in ('mapa_peld', 'indices_parques'):
+        vertices = parametros.get('vertices', 200)
+        pasta = preparar_caso(f"caso_projeto_{vertices}v_{parametros['linhas']}l")
+        preparar_projeto(pasta, vertices, parametros['linhas'])
+        script = 'gerar_mapa_peld.py' if etapa == 'mapa_peld' else 'gerar_mapa_indices_parques_v2.py'
+        return medir_script(script, pasta, repeticoes)
+
+    if etapa == 'temporal':
+        pasta = preparar_caso(f"caso_temporal_{parametros['periodos']}p")
+        preparar_armazem(pasta, parametros['periodos'])
+        return medir_script('gerar_visualizacoes_temporais.py', pasta, repeticoes,
+                            ['--fonte', 'armazem'])
+
+    raise ValueError(f"Etapa desconhecida: {etapa}")
+
+# ============================================================================
+# HISTÓRICO E COMPARAÇÃO
+# ============================================================================
+
+def commit_atual():
+    """
+    (hash, alterado): commit do HEAD e se há mudanças não commitadas
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=PASTA_SCRIPTS,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                cwd=PASTA_SCRIPTS, capture_output=True, text=True).stdout
+        return commit, bool(status.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return 'desconhecido', True
+
+
+def resolver_commit(referencia):
+    try:
+        return subprocess.run(['git', 'rev-parse', referencia], cwd=PASTA_SCRIPTS,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return referencia
+
+
+def chave_caso(etapa, parametros):
+    return etapa + ' ' + ' '.join(f"{k}={v}" for k, v in sorted(parametros.items()))
+
+
+def carregar_historico():
+    if not os.path.exists(ARQUIVO_RESULTADOS):
+        return []
+    with open(ARQUIVO_RESULTADOS, 'r', encoding='utf-8') as f:
+        return [json.loads(linha) for linha in f if linha.strip()]
+
+
+def referencia_de(historico, commit, maquina):
+    """
+    Mediana mais recente de cada caso medido no commit, na mesma máquina
+    """
+    referencia = {}
+    for r in historico:
+        if r['commit'].startswith(commit) and r['maquina'] == maquina:
+            referencia[r['caso']] = r['mediana_s']
+    return referencia
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline PELD com dados sintéticos")
+    parser.add_argument('--perfil', choices=PERFIS, default='padrao')
+    parser.add_argument('--tamanhos', type=int, nargs='+', help="lados dos rasters (pixels)")
+    parser.add_argument('--vertices', type=int, nargs='+', help="vértices dos polígonos dos parques")
+    parser.add_argument('--linhas', type=int, nargs='+', help="linhas do CSV de parcelas")
+    parser.add_argument('--periodos', type=int, nargs='+', help="períodos no armazém sintético")
+    parser.add_argument('--etapas', nargs='+', choices=ETAPAS, default=list(ETAPAS))
+    parser.add_argument('-n', '--repeticoes', type=int, default=3)
+    parser.add_argument('--comparar', metavar='COMMIT',
+                        help="compara com os resultados gravados desse commit (ex.: HEAD~1)")
+    parser.add_argument('--limite', type=float, default=0.15,
+                        help="regressão tolerada na comparação (padrão: 0.15 = 15%%)")
+    parser.add_argument('--limpar', action='store_true', help="apaga os dados sintéticos gerados")
+    args = parser.parse_args()
+
+    if args.limpar:
+        for nome in os.listdir(PASTA_BENCHMARK) if os.path.isdir(PASTA_BENCHMARK) else []:
+            if nome != os.path.basename(ARQUIVO_RESULTADOS):
+                shutil.rmtree(os.path.join(PASTA_BENCHMARK, nome), ignore_errors=True)
+        print("🧹 Dados sintéticos removidos (histórico mantido)")
+        return
+
+    config = dict(PERFIS[args.perfil])
+    for campo in ('tamanhos', 'vertices', 'linhas', 'periodos'):
+        if getattr(args, campo):
+            config[campo] = getattr(args, campo)
+    config['etapas'] = args.etapas
+
+    commit, alterado = commit_atual()
+    maquina = f"{platform.node()} ({platform.machine()}, {os.cpu_count()} CPUs)"
+    historico = carregar_historico()
+    referencia = referencia_de(historico, resolver_commit(args.comparar), maquina) if args.comparar else {}
+
+    print("\n" + "="*70)
+    print("   BENCHMARK DO PIPELINE PELD (DADOS SINTÉTICOS)")
+    print("="*70)
+    print(f"\n🔖 Commit: {commit[:10]}{' (com alterações)' if alterado else ''}")
+    print(f"💻 Máquina: {maquina}")
+    if args.comparar:
+        print(f"📐 Comparando com {args.comparar} ({len(referencia)} casos no histórico)")
+
+    os.makedirs(PASTA_BENCHMARK, exist_ok=True)
+    print(f"\n{'Caso':<48} {'Mediana':>9} {'Mínimo':>9} {'Pico':>9} {'Variação':>9}")
+    print("─"*88)
+
+    regressoes = []
+    with open(ARQUIVO_RESULTADOS, 'a', encoding='utf-8') as saida:
+        for etapa, parametros in casos(config):
+            caso = chave_caso(etapa, parametros)
+            try:
+                tempos, pico, categorias = executar_caso(etapa, parametros, args.repeticoes)
+            except Exception as e:
+                print(f"{caso:<48} ❌ {str(e).splitlines()[0]}")
+                continue
+
+            mediana = statistics.median(tempos)
+            variacao = ''
+            if caso in referencia:
+                delta = (mediana - referencia[caso]) / referencia[caso]
+                variacao = f"{delta:+.0%}"
+                if delta > args.limite:
+                    regressoes.append((caso, delta))
+                    variacao += ' ⚠️'
+            print(f"{caso:<48} {mediana:>8.3f}s {min(tempos):>8.3f}s "
+                  f"{(f'{pico:.0f} MB' if pico else '—'):>9} {variacao:>9}")
+
+            saida.write(json.dumps({
+                'commit': commit, 'alterado': alterado, 'maquina': maquina,
+                'data': datetime.now().isoformat(timespec='seconds'),
+                'caso': caso, 'etapa': etapa, 'parametros': parametros,
+                'tempos_s': [round(t, 4) for t in tempos],
+                'mediana_s': round(mediana, 4), 'pico_memoria_mb': pico,
+                'categorias': categorias,
+            }, ensure_ascii=False) + '\n')
+            saida.flush()
+
+    print(f"\n📄 Resultados acumulados em: {ARQUIVO_RESULTADOS}")
+    if regressoes:
+        print(f"\n❌ {len(regressoes)} caso(s) mais lentos que {args.comparar} além de {args.limite:.0%}:")
+        for caso, delta in regressoes:
+            print(f"   • {caso}: {delta:+.0%}")
+        sys.exit(1)
+    if args.comparar:
+        print(f"\n✅ Nenhuma regressão acima de {args.limite:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Camadas vetoriais do projeto reunidas num único GeoPackage (camadas_peld.gpkg)
+
+Os limites dos parques, os municípios, o limite estadual e as curvas de nível
+ficavam em shapefiles e GeoJSON avulsos, em CRSs diferentes, relidos e
+reprojetados por cada script. Este passo de ingestão grava cada camada duas
+vezes no GeoPackage, já projetada: '<camada>_32622' (UTM 22, mesma projeção
+das imagens) e '<camada>_4326' (WGS84, para os mapas), com índice espacial
+R-tree. Só as camadas cujas fontes mudaram são regravadas; a impressão das
+fontes de cada camada fica num JSON ao lado do GeoPackage (camadas_peld.json),
+que construir_site.py usa como impressão digital da camada.
+
+ler_camada() lê do GeoPackage, opcionalmente só as feições que cruzam um
+retângulo (bbox), usando o R-tree; sem o GeoPackage, cai na fonte original.
+
+Uso:
+    python camadas_vetoriais.py            # ingere/atualiza as camadas
+    python camadas_vetoriais.py --forcar   # regrava todas
+
+    from camadas_vetoriais import ler_camada, extensao
+    gdf = ler_camada('cidades', bbox=extensao(df['long'], df['lat']))
+"""
+
+import argparse
+import glob
+import json
+import os
+
+import geopandas as gpd
+import numpy as np
+from shapely.geometry import box
+
+from instrumentacao import medir, iniciar
+
+ARQUIVO_CAMADAS = 'camadas_peld.gpkg'
+ARQUIVO_FONTES = 'camadas_peld.json'  # arquivo_fontes(ARQUIVO_CAMADAS)
+EPSG_IMAGENS = 32622
+EPSG_MAPAS = 4326
+PROJECOES = (EPSG_IMAGENS, EPSG_MAPAS)
+
+# Camada -> arquivo de origem (as curvas de nível são opcionais)
+FONTES = {
+    'pnsj': 'PROJETO_PELDSC/PARNA_SAO_JOAQUIM_SHP/PARNA SAO JOAQUIM SHP/PARNASJlimites.shp',
+    'pesf': 'Projeto_PARNA_PESF/PARQUE_PESF_1_temp.shp',
+    'cidades': 'Projeto_PARNA_PESF/Cidades_parna_sj_temp.shp',
+    'estado': 'Organizacao Territorio/SC_UF_2024/SC_UF_2024.shp',
+    'contornos': 'contornos_altimetria_wgs84.geojson',
+}
+
+# Camadas presentes em cada GeoPackage (lidas uma vez por processo e arquivo)
+_camadas_gpkg = {}
+
+
+def arquivos_fonte(caminho):
+    """
+    Arquivos que compõem a fonte: um shapefile inclui .dbf/.shx/.prj
+    """
+    if caminho.lower().endswith('.shp'):
+        return sorted(glob.glob(glob.escape(caminho[:-4]) + '.*'))
+    return [caminho] if os.path.exists(caminho) else []
+
+
+def impressao_fonte(caminho):
+    """
+    Tamanho e data de modificação de cada arquivo da fonte
+    """
+    impressao = {}
+    for arquivo in arquivos_fonte(caminho):
+        st = os.stat(arquivo)
+        impressao[arquivo] = [st.st_size, st.st_mtime_ns]
+    return impressao
+
+
+def arquivo_fontes(caminho=ARQUIVO_CAMADAS):
+    """
+    JSON com as impressões das fontes gravadas no GeoPackage: 'x.gpkg' -> 'x.json'
+    """
+    return os.path.splitext(caminho)[0] + '.json'
+
+
+def _ler_fontes_registradas(caminho=ARQUIVO_CAMADAS):
+    try:
+        with open(arquivo_fontes(caminho), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def camadas_gpkg(caminho=ARQUIVO_CAMADAS):
+    chave = os.path.abspath(caminho)
+    if chave not in _camadas_gpkg:
+        _camadas_gpkg[chave] = set(gpd.list_layers(caminho)['name']) if os.path.exists(caminho) else set()
+    return _camadas_gpkg[chave]
+
+
+def ingerir(forcar=False, caminho=ARQUIVO_CAMADAS):
+    """
+    Grava no GeoPackage as camadas cujas fontes mudaram; retorna {camada: situação}
+    """
+    registradas = _ler_fontes_registradas(caminho) if os.path.exists(caminho) else {}
+    existentes = camadas_gpkg(caminho)
+    situacao = {}
+
+    for nome, fonte in FONTES.items():
+        impressao = impressao_fonte(fonte)
+        if not impressao:
+            situacao[nome] = 'sem fonte'
+            continue
+        completa = all(f"{nome}_{epsg}" in existentes for epsg in PROJECOES)
+        if not forcar and completa and registradas.get(nome) == impressao:
+            situacao[nome] = 'atual'
+            continue
+
+        with medir('read_file', 'vetor', arquivo=os.path.basename(fonte)):
+            gdf = gpd.read_file(fonte)
+        if gdf.crs is None:
+            gdf = gdf.set_crs(epsg=EPSG_MAPAS)
+        for epsg in PROJECOES:
+            with medir('to_crs', 'vetor', camada=nome, epsg=epsg):
+                projetada = gdf.to_crs(epsg=epsg)
+            # O driver GPKG cria o índice espacial R-tree de cada camada
+            with medir('to_gpkg', 'vetor', camada=f"{nome}_{epsg}", feicoes=len(projetada)):
+                projetada.to_file(caminho, layer=f"{nome}_{epsg}", driver='GPKG')
+        registradas[nome] = impressao
+        situacao[nome] = f"{len(gdf):,} feições"
+
+    with open(arquivo_fontes(caminho), 'w', encoding='utf-8') as f:
+        json.dump(registradas, f, indent=2, ensure_ascii=False)
+    _camadas_gpkg.pop(os.path.abspath(caminho), None)
+    return situacao
+
+
+def extensao(lon, lat, margem=0.05):
+    """
+    Retângulo (minx, miny, maxx, maxy) em graus que cobre os pontos, com margem
+    """
+    lon = np.asarray(lon, dtype=float)
+    lat = np.asarray(lat, dtype=float)
+    return (float(lon.min()) - margem, float(lat.min()) - margem,
+            float(lon.max()) + margem, float(lat.max()) + margem)
+
+
+def ler_camada(nome, epsg=EPSG_MAPAS, bbox=None, caminho=ARQUIVO_CAMADAS):
+    """
+    GeoDataFrame da camada na projeção pedida (32622 ou 4326)
+
+    bbox: (minx, miny, maxx, maxy) em EPSG:4326; só as feições que cruzam o
+    retângulo são lidas.
+    """
+    camada = f"{nome}_{epsg}"
+    filtro = None
+    if bbox is not None:
+        filtro = gpd.GeoSeries([box(*bbox)], crs=EPSG_MAPAS)
+        if epsg != EPSG_MAPAS:
+            filtro = filtro.to_crs(epsg=epsg)
+
+    if camada in camadas_gpkg(caminho):
+        with medir('read_gpkg', 'vetor', camada=camada, bbox=bbox is not None):
+            return gpd.read_file(caminho, layer=camada,
+                                 bbox=tuple(filtro.total_bounds) if filtro is not None else None)
+
+    # Sem o GeoPackage (ingestão não executada): lê e projeta a fonte original
+    fonte = FONTES[nome]
+    with medir('read_file', 'vetor', arquivo=os.path.basename(fonte)):
+        gdf = gpd.read_file(fonte, bbox=filtro)
+    if gdf.crs is None:
+        gdf = gdf.set_crs(epsg=EPSG_MAPAS)
+    with medir('to_crs', 'vetor', camada=nome, epsg=epsg):
+        return gdf.to_crs(epsg=epsg)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reúne as camadas vetoriais num GeoPackage")
+    parser.add_argument('--forcar', action='store_true', help="regrava todas as camadas")
+    args = parser.parse_args()
+
+    print("\n" + "="*70)
+    print("   INGESTÃO DAS CAMADAS VETORIAIS")
+    print("="*70 + "\n")
+
+    situacao = ingerir(args.forcar)
+    for nome, estado in situacao.items():
+        icone = {'atual': '⏭️ ', 'sem fonte': '⚠️ '}.get(estado, '✅')
+        print(f"   {icone} {nome}: {estado}")
+    print(f"\n🗂️  {len(camadas_gpkg())} camadas em: {ARQUIVO_CAMADAS}")
+
+
+if __name__ == "__main__":
+    iniciar(__file__)
+    main()
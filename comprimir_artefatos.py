@@ -0,0 +1,126 @@
+"""
+Script para gerar versões pré-comprimidas (.gz e .br) dos artefatos publicados
+
+Cada HTML, GeoJSON, JSON de dados e asset de static/ ganha arquivos irmãos
+<arquivo>.gz (gzip nível 9) e <arquivo>.br (brotli qualidade 11, se o módulo
+'brotli' estiver instalado), prontos para servidores que entregam conteúdo
+pré-comprimido. Só recomprime o que mudou desde a última execução.
+
+Ao final é gravado um relatório de tamanhos por artefato.
+"""
+
+import glob
+import gzip
+import json
+import os
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+PADROES_ARTEFATOS = [
+    '*.html',
+    '*.geojson',
+    'estatisticas_indices_*.json',
+    'dados_temporais/*.json',
+    'valores_ao_vivo.js',
+    'static/**/*.js',
+    'static/**/*.css',
+    'static/**/*.svg',
+    'static/**/*.ttf',
+]
+
+# Abaixo disso o ganho não compensa o arquivo extra
+TAMANHO_MINIMO = 1024
+
+ARQUIVO_RELATORIO = 'relatorio_compressao.json'
+
+
+def listar_artefatos():
+    encontrados = set()
+    for padrao in PADROES_ARTEFATOS:
+        encontrados.update(glob.glob(padrao, recursive=True))
+    return sorted(os.path.normpath(p) for p in encontrados
+                  if os.path.getsize(p) >= TAMANHO_MINIMO)
+
+
+def atualizado(origem, destino):
+    return os.path.exists(destino) and os.path.getmtime(destino) >= os.path.getmtime(origem)
+
+
+def comprimir_gzip(dados):
+    # mtime=0 deixa a saída reprodutível (mesmo conteúdo -> mesmos bytes)
+    return gzip.compress(dados, compresslevel=9, mtime=0)
+
+
+def comprimir_brotli(dados, caminho):
+    modo = brotli.MODE_TEXT if caminho.endswith(('.html', '.json', '.geojson', '.js', '.css', '.svg')) \
+        else brotli.MODE_GENERIC
+    return brotli.compress(dados, mode=modo, quality=11)
+
+
+def comprimir(caminho):
+    """
+    Gera os irmãos comprimidos de um artefato e retorna os tamanhos
+    """
+    tamanhos = {'arquivo': caminho, 'original': os.path.getsize(caminho)}
+    formatos = [('gz', comprimir_gzip)]
+    if brotli is not None:
+        formatos.append(('br', lambda d: comprimir_brotli(d, caminho)))
+
+    dados = None
+    for ext, funcao in formatos:
+        destino = f"{caminho}.{ext}"
+        if not atualizado(caminho, destino):
+            if dados is None:
+                with open(caminho, 'rb') as f:
+                    dados = f.read()
+            with open(destino, 'wb') as f:
+                f.write(funcao(dados))
+        tamanhos[ext] = os.path.getsize(destino)
+    return tamanhos
+
+
+def formatar_kb(n):
+    return f"{n / 1024:,.1f} KB"
+
+
+def main():
+    print("\n" + "="*70)
+    print("   PRÉ-COMPRESSÃO DOS ARTEFATOS PUBLICADOS")
+    print("="*70)
+
+    if brotli is None:
+        print("\n⚠️  Módulo 'brotli' não instalado: gerando apenas .gz (pip install brotli)")
+
+    relatorio = [comprimir(caminho) for caminho in listar_artefatos()]
+
+    print(f"\n{'Arquivo':<45} {'Original':>12} {'gzip':>12} {'brotli':>12} {'Redução':>8}")
+    print("─"*93)
+    for r in relatorio:
+        melhor = min(r.get('br', r['gz']), r['gz'])
+        r['reducao'] = round(r['original'] / melhor, 2)
+        print(f"{r['arquivo'][:45]:<45} {formatar_kb(r['original']):>12} {formatar_kb(r['gz']):>12} "
+              f"{formatar_kb(r['br']) if 'br' in r else '—':>12} {r['reducao']:>7.1f}x")
+
+    total_original = sum(r['original'] for r in relatorio)
+    total_gz = sum(r['gz'] for r in relatorio)
+    total_br = sum(r['br'] for r in relatorio) if brotli is not None else None
+    total_melhor = sum(min(r.get('br', r['gz']), r['gz']) for r in relatorio)
+    print("─"*93)
+    print(f"{'TOTAL':<45} {formatar_kb(total_original):>12} {formatar_kb(total_gz):>12} "
+          f"{formatar_kb(total_br) if total_br is not None else '—':>12} "
+          f"{total_original / max(total_melhor, 1):>7.1f}x")
+
+    with open(ARQUIVO_RELATORIO, 'w', encoding='utf-8') as f:
+        json.dump({'artefatos': relatorio,
+                   'total_original': total_original,
+                   'total_comprimido': total_melhor}, f, indent=2, ensure_ascii=False)
+
+    print(f"\n✅ {len(relatorio)} artefatos comprimidos")
+    print(f"📄 Relatório salvo em: {ARQUIVO_RELATORIO}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+"""
+Orquestrador da construção do site PELD
+
+Cada etapa do pipeline declara o script que executa, os arquivos de entrada
+e os de saída. Antes de rodar, as entradas (e o próprio script) recebem uma
+impressão digital (SHA-256); a etapa só é executada se essa impressão mudou
+desde a última construção ou se alguma saída não existe. Etapas independentes
+rodam em paralelo, cada uma num processo Python separado. Cada construção
+grava um relatório de tempo e memória em relatorios_execucao/<data-hora>/.
+
+Uso:
+    python construir_site.py              # reconstrói apenas o que mudou
+    python construir_site.py --forcar     # reconstrói tudo
+    python construir_site.py temporal     # só a etapa (e suas dependências)
+    python construir_site.py --listar     # mostra o estado de cada etapa
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+
+from comprimir_artefatos import PADROES_ARTEFATOS
+from instrumentacao import PASTA_RELATORIOS, salvar_relatorio_construcao
+from util_arquivos import hash_arquivo
+
+PASTA_ESTADO = '.construcao'
+ARQUIVO_ESTADO = os.path.join(PASTA_ESTADO, 'estado.json')
+
+CSV_PARCELAS = 'amb_csv/ppbio_sc-coordenadas_parcelas.csv'
+SHP_PNSJ = 'PROJETO_PELDSC/PARNA_SAO_JOAQUIM_SHP/PARNA SAO JOAQUIM SHP/PARNASJlimites.shp'
+SHP_PESF = 'Projeto_PARNA_PESF/PARQUE_PESF_1_temp.shp'
+SHP_CIDADES = 'Projeto_PARNA_PESF/Cidades_parna_sj_temp.shp'
+SHP_ESTADO = 'Organizacao Territorio/SC_UF_2024/SC_UF_2024.shp'
+GPKG_CAMADAS = 'camadas_peld.gpkg'
+# Impressões das fontes de cada camada, gravadas pela ingestão (camadas_vetoriais.py)
+FONTES_CAMADAS = 'camadas_peld.json'
+PREFIXO_CAMADA = 'camada:'
+
+
+def camadas(*nomes):
+    """
+    Entradas 'camada:<nome>': a etapa só depende das camadas do GeoPackage que lê
+    """
+    return [PREFIXO_CAMADA + nome for nome in nomes]
+
+
+# Etapas do pipeline. 'depende' define a ordem; 'entradas' aceita padrões glob
+# e camadas do GeoPackage (camadas()).
+ETAPAS = {
+    'camadas': {
+        'script': 'camadas_vetoriais.py',
+        'entradas': [SHP_PNSJ, SHP_PESF, SHP_CIDADES, SHP_ESTADO, 'contornos_altimetria_wgs84.geojson'],
+        'saidas': [GPKG_CAMADAS, FONTES_CAMADAS],
+        'depende': [],
+    },
+    'vector_tiles': {
+        'script': 'gerar_vector_tiles.py',
+        'entradas': [*camadas('pnsj', 'pesf', 'cidades', 'estado', 'contornos'), 'camadas_vetoriais.py'],
+        'saidas': ['vector_tiles/metadata.json', 'vector_tiles/camadas.js'],
+        'depende': ['camadas'],
+    },
+    # Única etapa que grava os .geojson das camadas; as demais leem camadas_peld.gpkg
+    'conversao': {
+        'script': 'gerar_mapa_peld.py',
+        'entradas': [CSV_PARCELAS, *camadas('pnsj', 'pesf', 'cidades', 'estado'), 'camadas_vetoriais.py',
+                     'parcelas.py', 'juncao_espacial.py', 'amostrar_indices_parcelas.py',
+                     'estatisticas_indices.sqlite', 'gerar_vector_tiles.py', 'vector_tiles/metadata.json'],
+        'saidas': ['parque_nacional_sj.geojson', 'parque_estadual_serra_furada.geojson',
+                   'cidades_afetadas.geojson', 'limite_santa_catarina.geojson',
+                   'mapa_interativo_peld.html'],
+        'depende': ['camadas', 'vector_tiles', 'estatisticas', 'amostragem'],
+    },
+    'estatisticas': {
+        'script': 'extrair_estatisticas_indices.py',
+        'entradas': ['Indice_vegetacao/*.tif', 'leitor_raster.py', 'execucao_em_blocos.py',
+                     *camadas('pnsj', 'pesf'), 'camadas_vetoriais.py'],
+        'saidas': ['estatisticas_indices.sqlite', 'estatisticas_indices_2025.json'],
+        'depende': ['camadas'],
+    },
+    'juncao': {
+        'script': 'juncao_espacial.py',
+        'entradas': [CSV_PARCELAS, 'parcelas.py', *camadas('pnsj', 'pesf', 'cidades'), 'camadas_vetoriais.py',
+                     'estatisticas_indices.sqlite'],
+        'saidas': ['parcelas_zonas.csv'],
+        'depende': ['camadas', 'estatisticas', 'amostragem'],
+    },
+    # Grava no armazém: as etapas que leem o .sqlite dependem dela, para não
+    # registrarem a impressão do armazém no meio da gravação
+    'amostragem': {
+        'script': 'amostrar_indices_parcelas.py',
+        'entradas': [CSV_PARCELAS, 'parcelas.py', 'leitor_raster.py', 'Indice_vegetacao/*.tif',
+                     'estatisticas_indices.sqlite', 'armazem_estatisticas.py'],
+        'saidas': ['series_parcelas.csv'],
+        'depende': ['estatisticas'],
+    },
+    'indices': {
+        'script': 'gerar_mapa_indices_simples.py',
+        'entradas': [CSV_PARCELAS, 'parcelas.py', 'leitor_raster.py', 'execucao_em_blocos.py',
+                     *camadas('pnsj', 'pesf', 'cidades', 'estado'), 'camadas_vetoriais.py', 'servidor_tiles_raster.py', 'servidor_http.py',
+                     'gerar_vector_tiles.py', 'vector_tiles/metadata.json', 'Projeto_PARNA_PESF/*.tif'],
+        'saidas': ['mapa_indices_vegetacao.html'],
+        'depende': ['camadas', 'vector_tiles'],
+    },
+    'indices_parques': {
+        'script': 'gerar_mapa_indices_parques_v2.py',
+        'entradas': [CSV_PARCELAS, 'parcelas.py', *camadas('pnsj', 'pesf'), 'camadas_vetoriais.py',
+                     'estatisticas_indices_2025.json', 'servidor_api_zonas.py', 'servidor_http.py',
+                     'gerar_vector_tiles.py', 'vector_tiles/metadata.json'],
+        'saidas': ['mapa_indices_parques.html'],
+        'depende': ['camadas', 'vector_tiles', 'estatisticas'],
+    },
+    'temporal': {
+        'script': 'gerar_visualizacoes_temporais.py',
+        'entradas': ['estatisticas_indices.sqlite', 'trabalhos_render.py'],
+        'saidas': ['mapa_slider_temporal.html', 'mapa_comparacao_lado_a_lado.html',
+                   'mapa_serie_temporal.html'],
+        'depende': ['estatisticas', 'amostragem'],
+    },
+    'analise_conjunta': {
+        'script': 'analise_conjunta_ndvi_evi.py',
+        'entradas': ['Indice_vegetacao/*.tif', 'leitor_raster.py', 'execucao_em_blocos.py', 'formato_indices.py',
+                     'extrair_estatisticas_indices.py', *camadas('pnsj', 'pesf'), 'camadas_vetoriais.py'],
+        'saidas': ['analise_conjunta_ndvi_evi.json', 'discrepancia_ndvi_evi.tif', 'histogramas_ndvi_evi.npz'],
+        'depende': ['camadas'],
+    },
+    'ndvi_vs_evi': {
+        'script': 'gerar_analise_ndvi_vs_evi.py',
+        'entradas': ['estatisticas_indices_2025.json', 'analise_conjunta_ndvi_evi.json',
+                     'histogramas_ndvi_evi.npz', 'densidade_dispersao.py'],
+        'saidas': ['mapa_analise_ndvi_vs_evi.html'],
+        'depende': ['estatisticas', 'analise_conjunta'],
+    },
+    # As etapas 'no_lugar' alteram os próprios HTML de entrada: suas impressões
+    # são registradas de novo ao fim da construção, para não dispararem sozinhas
+    'creditos': {
+        'script': 'adicionar_creditos_mapas.py',
+        'entradas': ['*.html'],
+        'saidas': [],
+        'depende': ['conversao', 'indices', 'indices_parques', 'temporal', 'ndvi_vs_evi'],
+        'no_lugar': True,
+    },
+    'assets': {
+        'script': 'empacotar_assets.py',
+        'entradas': ['*.html'],
+        'saidas': ['static/manifest.json'],
+        'depende': ['creditos'],
+        'no_lugar': True,
+    },
+    'compressao': {
+        'script': 'comprimir_artefatos.py',
+        # Os mesmos padrões que o script comprime
+        'entradas': list(PADROES_ARTEFATOS),
+        'saidas': ['relatorio_compressao.json'],
+        'depende': ['assets'],
+    },
+}
+
+
+def expandir(padrao):
+    """
+    Expande um padrão de entrada em arquivos; shapefiles incluem .dbf/.shx/.prj
+    """
+    if padrao.lower().endswith('.shp'):
+        raiz = padrao[:-4]
+        return sorted(glob.glob(glob.escape(raiz) + '.*'))
+    if any(c in padrao for c in '*?['):
+        return sorted(glob.glob(padrao, recursive=True))
+    return [padrao] if os.path.exists(padrao) else []
+
+
+def ler_fontes_camadas(caminho=FONTES_CAMADAS):
+    """
+    {camada: impressão das fontes} gravado pela ingestão; vazio sem a ingestão
+    """
+    try:
+        with open(caminho, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+class Estado:
+    """
+    Impressões digitais da última construção, com cache dos hashes por
+    (tamanho, mtime) para não reler arquivos grandes que não mudaram
+    """
+
+    def __init__(self, caminho=ARQUIVO_ESTADO):
+        self.caminho = caminho
+        self.dados = {'etapas': {}, 'hashes': {}}
+        if os.path.exists(caminho):
+            with open(caminho, 'r', encoding='utf-8') as f:
+                self.dados = json.load(f)
+
+    def salvar(self):
+        os.makedirs(os.path.dirname(self.caminho), exist_ok=True)
+        with open(self.caminho, 'w', encoding='utf-8') as f:
+            json.dump(self.dados, f, indent=2, sort_keys=True)
+
+    def hash(self, caminho):
+        st = os.stat(caminho)
+        salvo = self.dados['hashes'].get(caminho)
+        if salvo and salvo[0] == st.st_size and salvo[1] == st.st_mtime_ns:
+            return salvo[2]
+        h = hash_arquivo(caminho)
+        self.dados['hashes'][caminho] = [st.st_size, st.st_mtime_ns, h]
+        return h
+
+    def impressao(self, nome):
+        """
+        Impressão digital de uma etapa: script + todas as entradas
+
+        Uma camada do GeoPackage entra pela impressão das suas fontes em
+        camadas_peld.json: regravar outra camada não afeta a etapa.
+        """
+        etapa = ETAPAS[nome]
+        digest = hashlib.sha256()
+        digest.update(f"{etapa['script']}:{self.hash(etapa['script'])}\n".encode())
+        fontes = None
+        for padrao in etapa['entradas']:
+            if padrao.startswith(PREFIXO_CAMADA):
+                if fontes is None:
+                    fontes = ler_fontes_camadas()
+                camada = fontes.get(padrao[len(PREFIXO_CAMADA):], '<ausente>')
+                digest.update(f"{padrao}:{json.dumps(camada, sort_keys=True)}\n".encode())
+                continue
+            arquivos = expandir(padrao)
+            if not arquivos:
+                digest.update(f"{padrao}:<ausente>\n".encode())
+            for arquivo in arquivos:
+                digest.update(f"{arquivo}:{self.hash(arquivo)}\n".encode())
+        return digest.hexdigest()
+
+    def desatualizada(self, nome):
+        """
+        Retorna o motivo pelo qual a etapa precisa rodar, ou None
+        """
+        faltando = [s for s in ETAPAS[nome]['saidas'] if not os.path.exists(s)]
+        if faltando:
+            return f"saída ausente: {faltando[0]}"
+        if self.dados['etapas'].get(nome) != self.impressao(nome):
+            return "entradas alteradas" if nome in self.dados['etapas'] else "nunca construída"
+        return None
+
+
+def fechar_dependencias(alvos):
+    """
+    Inclui as dependências (diretas e indiretas) das etapas pedidas
+    """
+    selecionadas, fila = set(), list(alvos)
+    while fila:
+        nome = fila.pop()
+        if nome not in selecionadas:
+            selecionadas.add(nome)
+            fila.extend(ETAPAS[nome]['depende'])
+    return selecionadas
+
+
+def executar_etapa(nome, pasta_relatorios):
+    """
+    Roda o script da etapa num processo separado, com o log em .construcao/logs
+
+    O relatório de instrumentação do script vai para a pasta da construção.
+    """
+    pasta_logs = os.path.join(PASTA_ESTADO, 'logs')
+    os.makedirs(pasta_logs, exist_ok=True)
+    inicio = time.perf_counter()
+    with open(os.path.join(pasta_logs, f"{nome}.log"), 'w', encoding='utf-8') as log:
+        processo = subprocess.run(
+            [sys.executable, ETAPAS[nome]['script']],
+            stdout=log, stderr=subprocess.STDOUT,
+            env={**os.environ, 'PYTHONIOENCODING': 'utf-8', 'PELD_RELATORIOS': pasta_relatorios}
+        )
+    return processo.returncode, time.perf_counter() - inicio
+
+
+def construir(alvos=None, forcar=False, trabalhadores=None):
+    """
+    Executa as etapas desatualizadas respeitando as dependências
+    """
+    estado = Estado()
+    etapas = fechar_dependencias(alvos or ETAPAS)
+    concluidas, falhas, puladas = set(), set(), set()
+    em_execucao = {}
+    medidas = {}
+    pasta_relatorios = os.path.join(PASTA_RELATORIOS, datetime.now().strftime('%Y%m%d-%H%M%S'))
+
+    with ThreadPoolExecutor(max_workers=trabalhadores or os.cpu_count()) as executor:
+        while len(concluidas) + len(falhas) + len(puladas) < len(etapas):
+            for nome in sorted(etapas - concluidas - falhas - puladas - set(em_execucao.values())):
+                deps = set(ETAPAS[nome]['depende']) & etapas
+                if deps & (falhas | puladas):
+                    puladas.add(nome)
+                    print(f"   ⏭️  {nome}: pulada (dependência falhou)")
+                    continue
+                if not deps <= concluidas:
+                    continue
+
+                motivo = "forçada" if forcar else estado.desatualizada(nome)
+                if motivo is None:
+                    concluidas.add(nome)
+                    print(f"   ✅ {nome}: atualizada")
+                    continue
+
+                print(f"   🔨 {nome}: executando ({motivo})")
+                em_execucao[executor.submit(executar_etapa, nome, pasta_relatorios)] = nome
+
+            if not em_execucao:
+                continue
+
+            prontas, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+            for futuro in prontas:
+                nome = em_execucao.pop(futuro)
+                codigo, duracao = futuro.result()
+                medidas[nome] = {'script': ETAPAS[nome]['script'], 'codigo': codigo,
+                                 'parede_s': round(duracao, 3)}
+                if codigo == 0:
+                    estado.dados['etapas'][nome] = estado.impressao(nome)
+                    estado.salvar()
+                    concluidas.add(nome)
+                    print(f"   ✅ {nome}: concluída em {duracao:.1f}s")
+                else:
+                    falhas.add(nome)
+                    print(f"   ❌ {nome}: falhou (código {codigo}), "
+                          f"veja {PASTA_ESTADO}/logs/{nome}.log")
+
+    for nome in concluidas:
+        if ETAPAS[nome].get('no_lugar'):
+            estado.dados['etapas'][nome] = estado.impressao(nome)
+    estado.salvar()
+
+    if medidas:
+        print(f"\n⏱️  Relatório da construção: {salvar_relatorio_construcao(pasta_relatorios, medidas)}")
+    return not falhas
+
+
+def listar():
+    estado = Estado()
+    for nome, etapa in ETAPAS.items():
+        motivo = estado.desatualizada(nome)
+        situacao = "✅ atualizada" if motivo is None else f"🔨 {motivo}"
+        deps = f" (após {', '.join(etapa['depende'])})" if etapa['depende'] else ""
+        print(f"   {nome:<16} {situacao}{deps}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Constrói o site PELD de forma incremental")
+    parser.add_argument('etapas', nargs='*', metavar='etapa',
+                        help=f"etapas a construir (padrão: todas): {', '.join(ETAPAS)}")
+    parser.add_argument('--forcar', action='store_true', help="ignora as impressões digitais")
+    parser.add_argument('-j', '--trabalhadores', type=int, default=None,
+                        help="número de etapas em paralelo (padrão: nº de CPUs)")
+    parser.add_argument('--listar', action='store_true', help="mostra o estado das etapas")
+    args = parser.parse_args()
+
+    desconhecidas = [e for e in args.etapas if e not in ETAPAS]
+    if desconhecidas:
+        parser.error(f"etapa(s) desconhecida(s): {', '.join(desconhecidas)}")
+
+    print("\n" + "="*70)
+    print("   CONSTRUÇÃO INCREMENTAL DO SITE PELD")
+    print("="*70 + "\n")
+
+    if args.listar:
+        listar()
+        return
+
+    inicio = time.perf_counter()
+    ok = construir(args.etapas or None, args.forcar, args.trabalhadores)
+    print(f"\n{'✅ Construção concluída' if ok else '❌ Construção com falhas'} "
+          f"em {time.perf_counter() - inicio:.1f}s")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
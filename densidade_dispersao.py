@@ -0,0 +1,234 @@
+"""
+Gráficos de dispersão por densidade (histograma 2-D) para comparar índices
+
+Centenas de milhares de pixels por parque não cabem num gráfico de
+dispersão no navegador nem num scatter do matplotlib. Aqui os pontos são
+contados em classes fixas com NumPy (contar_em_classes) e só a grade de
+contagens é desenhada: um PNG pequeno, com a densidade em escala log, ou
+uma grade JSON esparsa para gráficos no navegador. O tamanho do artefato
+não depende do número de pixels.
+
+Os PNGs ficam em graficos_densidade/, um por (zona, data, par de índices),
+com um JSON ao lado guardando a impressão das contagens: só são
+redesenhados quando os dados mudam.
+
+Uso:
+    python densidade_dispersao.py           # a partir de histogramas_ndvi_evi.npz
+    python densidade_dispersao.py --json    # também grava as grades JSON
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+from io import BytesIO
+
+import numpy as np
+
+from instrumentacao import medir, iniciar
+
+PASTA_GRAFICOS = 'graficos_densidade'
+ARQUIVO_HISTOGRAMAS = 'histogramas_ndvi_evi.npz'
+ARQUIVO_ANALISE = 'analise_conjunta_ndvi_evi.json'
+# Lado máximo da grade desenhada (classes agrupadas acima disso)
+MAX_CLASSES = 120
+# Versão do desenho: muda quando o estilo do gráfico muda, invalidando o cache
+VERSAO_GRAFICO = 1
+
+
+def contar_em_classes(x, y, origem, passo, forma):
+    """
+    Contagem dos pontos (x, y) numa grade forma = (nx, ny) de classes de
+    lado 'passo' a partir de origem = (x0, y0); pontos fora vão para a borda
+    """
+    nx, ny = forma
+    ix = np.clip(((np.asarray(x) - origem[0]) / passo).astype(np.int64), 0, nx - 1)
+    iy = np.clip(((np.asarray(y) - origem[1]) / passo).astype(np.int64), 0, ny - 1)
+    return np.bincount(ix * ny + iy, minlength=nx * ny).reshape(nx, ny)
+
+
+def recortar(contagens, margem=2):
+    """
+    Fatias (x, y) da região ocupada da grade, com margem em classes
+    """
+    ocupadas_x = np.flatnonzero(contagens.any(axis=1))
+    ocupadas_y = np.flatnonzero(contagens.any(axis=0))
+    if not len(ocupadas_x):
+        return slice(0, 0), slice(0, 0)
+    return (slice(max(ocupadas_x[0] - margem, 0), min(ocupadas_x[-1] + 1 + margem, contagens.shape[0])),
+            slice(max(ocupadas_y[0] - margem, 0), min(ocupadas_y[-1] + 1 + margem, contagens.shape[1])))
+
+
+def reagrupar(contagens, max_classes=MAX_CLASSES):
+    """
+    Agrupa classes vizinhas até nenhum lado passar de max_classes; retorna (grade, fator)
+    """
+    fator = max(1, -(-max(contagens.shape) // max_classes))
+    if fator == 1:
+        return contagens, 1
+    nx, ny = (-(-n // fator) * fator for n in contagens.shape)
+    completa = np.zeros((nx, ny), dtype=contagens.dtype)
+    completa[:contagens.shape[0], :contagens.shape[1]] = contagens
+    return completa.reshape(nx // fator, fator, ny // fator, fator).sum(axis=(1, 3)), fator
+
+
+def preparar(contagens, origem, passo, max_classes=MAX_CLASSES):
+    """
+    Recorta a região ocupada e reagrupa; retorna (grade, origem, passo)
+    """
+    fx, fy = recortar(contagens)
+    grade, fator = reagrupar(contagens[fx, fy], max_classes)
+    return grade, (origem[0] + fx.start * passo, origem[1] + fy.start * passo), passo * fator
+
+
+def grade_json(contagens, origem, passo, max_classes=MAX_CLASSES):
+    """
+    Grade esparsa compacta: só as células com pontos, como [i, j, contagem]
+    """
+    grade, (x0, y0), passo = preparar(contagens, origem, passo, max_classes)
+    i, j = np.nonzero(grade)
+    return {
+        'x0': round(x0, 6), 'y0': round(y0, 6), 'passo': round(passo, 6),
+        'nx': grade.shape[0], 'ny': grade.shape[1], 'total': int(grade.sum()),
+        'celulas': np.column_stack([i, j, grade[i, j]]).tolist(),
+    }
+
+
+def renderizar_png(contagens, origem, passo, rotulo_x, rotulo_y, titulo=None, retas=(),
+                   tamanho=(3.6, 2.9), dpi=90):
+    """
+    PNG da densidade (contagens em escala log); retas: [(rótulo, a, b, estilo)] para y = a + b·x
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import LogNorm
+
+    grade, (x0, y0), passo = preparar(contagens, origem, passo)
+    x1, y1 = x0 + grade.shape[0] * passo, y0 + grade.shape[1] * passo
+
+    fig, ax = plt.subplots(figsize=tamanho, dpi=dpi)
+    if grade.any():
+        mascarada = np.ma.masked_equal(grade.T, 0)
+        im = ax.imshow(mascarada, origin='lower', extent=(x0, x1, y0, y1), aspect='auto',
+                       cmap='viridis', norm=LogNorm(vmin=1, vmax=grade.max()), interpolation='nearest')
+        fig.colorbar(im, ax=ax, pad=0.02).set_label('pixels', fontsize=7)
+    xs = np.array([x0, x1])
+    for rotulo, a, b, estilo in retas:
+        ax.plot(xs, a + b * xs, estilo, linewidth=1, label=rotulo)
+    if retas:
+        ax.legend(fontsize=6, loc='upper left')
+    ax.set_xlim(x0, x1)
+    ax.set_ylim(y0, y1)
+    ax.set_xlabel(rotulo_x, fontsize=8)
+    ax.set_ylabel(rotulo_y, fontsize=8)
+    ax.tick_params(labelsize=7)
+    if titulo:
+        ax.set_title(titulo, fontsize=8)
+    fig.tight_layout()
+
+    buffer = BytesIO()
+    fig.savefig(buffer, format='png')
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+def _impressao(contagens, *parametros):
+    h = hashlib.sha1(np.ascontiguousarray(contagens).tobytes())
+    h.update(repr((VERSAO_GRAFICO, *parametros)).encode('utf-8'))
+    return h.hexdigest()
+
+
+def grafico_densidade(zona, data, par, contagens, origem, passo, retas=(), pasta=PASTA_GRAFICOS):
+    """
+    Caminho do PNG da zona/data/par, redesenhado só se as contagens mudaram
+    """
+    x, y = par
+    caminho = os.path.join(pasta, f"{x.lower()}_{y.lower()}_{zona}_{data}.png")
+    impressao = _impressao(contagens, origem, passo, tuple(retas))
+    meta = caminho[:-4] + '.json'
+    if os.path.exists(caminho) and os.path.exists(meta):
+        with open(meta, 'r', encoding='utf-8') as f:
+            if json.load(f).get('impressao') == impressao:
+                return caminho
+
+    with medir('densidade_png', 'render', zona=zona, data=data):
+        png = renderizar_png(contagens, origem, passo, x, y, f"{zona} · {data}", retas)
+    os.makedirs(pasta, exist_ok=True)
+    with open(caminho, 'wb') as f:
+        f.write(png)
+    with open(meta, 'w', encoding='utf-8') as f:
+        json.dump({'zona': zona, 'data': data, 'par': [x, y], 'impressao': impressao,
+                   'pixels': int(contagens.sum())}, f, indent=2)
+    return caminho
+
+
+def png_base64(caminho):
+    with open(caminho, 'rb') as f:
+        return base64.b64encode(f.read()).decode('ascii')
+
+
+def carregar_histogramas(caminho=ARQUIVO_HISTOGRAMAS):
+    """
+    {zona: contagens}, origem, passo, gravados por analise_conjunta_ndvi_evi.py
+    """
+    if not os.path.exists(caminho):
+        return {}, None, None
+    with np.load(caminho) as dados:
+        origem = tuple(float(v) for v in dados['origem'])
+        passo = float(dados['passo'])
+        return {k[len('zona_'):]: dados[k] for k in dados.files if k.startswith('zona_')}, origem, passo
+
+
+def retas_ndvi_evi(resultado):
+    """
+    Regressão da zona e a reta de concordância (EVI/2 = NDVI)
+    """
+    retas = [('EVI = 2·NDVI', 0.0, 2.0, 'k--')]
+    regressao = (resultado or {}).get('regressao') or {}
+    if regressao.get('inclinacao') is not None:
+        r2 = regressao.get('r2')
+        rotulo = f"regressão (R² {r2:.2f})" if r2 is not None else "regressão"
+        retas.append((rotulo, regressao['intercepto'], regressao['inclinacao'], 'r-'))
+    return retas
+
+
+def graficos_ndvi_evi(analise, gravar_json=False):
+    """
+    PNG (e opcionalmente a grade JSON) de cada zona da análise conjunta: {zona: caminho PNG}
+    """
+    histogramas, origem, passo = carregar_histogramas()
+    data = analise.get('data_aquisicao', 'sem_data')
+    caminhos = {}
+    for zona, contagens in histogramas.items():
+        if not contagens.any():
+            continue
+        caminhos[zona] = grafico_densidade(zona, data, ('NDVI', 'EVI'), contagens, origem, passo,
+                                           retas_ndvi_evi(analise['zonas'].get(zona)))
+        if gravar_json:
+            with open(caminhos[zona][:-4] + '_grade.json', 'w', encoding='utf-8') as f:
+                json.dump(grade_json(contagens, origem, passo), f, separators=(',', ':'))
+    return caminhos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gráficos de densidade NDVI × EVI por zona")
+    parser.add_argument('--json', action='store_true', help="grava também a grade JSON esparsa")
+    args = parser.parse_args()
+
+    if not os.path.exists(ARQUIVO_ANALISE):
+        print(f"   ❌ {ARQUIVO_ANALISE} não encontrado; execute analise_conjunta_ndvi_evi.py")
+        exit(1)
+    with open(ARQUIVO_ANALISE, 'r', encoding='utf-8') as f:
+        analise = json.load(f)
+
+    caminhos = graficos_ndvi_evi(analise, args.json)
+    for zona, caminho in caminhos.items():
+        print(f"   ✅ {zona}: {caminho} ({os.path.getsize(caminho) / 1024:.1f} KB)")
+    print(f"\n📈 {len(caminhos)} gráfico(s) em {PASTA_GRAFICOS}/")
+
+
+if __name__ == "__main__":
+    iniciar(__file__)
+    main()
@@ -0,0 +1,275 @@
+"""
+Script para empacotar os assets estáticos (JS/CSS) de todos os mapas HTML
+
+- Baixa uma única vez cada biblioteca referenciada por CDN para a pasta static/,
+  com o hash do conteúdo no nome do arquivo (cache longo no navegador)
+- Baixa também fontes e imagens referenciadas pelos CSS (url(...))
+- Remove o jQuery duplicado (code.jquery.com + cdnjs)
+- Move para static/ os blocos <style>/<script> inline repetidos em várias páginas
+- Reescreve cada página para usar os arquivos locais, que funcionam offline
+
+Os downloads ficam registrados em static/manifest.json; execuções seguintes
+não acessam a rede para URLs já empacotadas.
+"""
+
+import hashlib
+import json
+import os
+import re
+import urllib.request
+from urllib.parse import urljoin
+
+from util_arquivos import listar_paginas_html
+
+PASTA_STATIC = 'static'
+ARQUIVO_MANIFESTO = os.path.join(PASTA_STATIC, 'manifest.json')
+
+RE_SCRIPT_CDN = re.compile(r'<script\b[^>]*\bsrc="(https?://[^"]+)"[^>]*>\s*</script>[ \t]*\n?', re.I)
+RE_LINK = re.compile(r'<link\b[^>]*>[ \t]*\n?', re.I)
+RE_HREF = re.compile(r'\bhref="(https?://[^"]+)"', re.I)
+RE_BLOCO_INLINE = re.compile(r'<(style|script)>(.*?)</\1>', re.S | re.I)
+RE_URL_CSS = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+
+
+def hash_conteudo(conteudo):
+    return hashlib.sha256(conteudo).hexdigest()[:10]
+
+
+def chave_biblioteca(url):
+    """
+    Identifica a mesma biblioteca servida por CDNs diferentes
+
+    Ex.: code.jquery.com/jquery-3.7.1.min.js e
+    cdnjs.cloudflare.com/ajax/libs/jquery/3.7.1/jquery.min.js -> 'jquery@3.7.1'
+    """
+    nome = url.rsplit('/', 1)[-1]
+    if re.fullmatch(r'jquery(-\d+(\.\d+)*)?(\.min)?\.js', nome):
+        versao = re.search(r'(\d+\.\d+\.\d+)', url)
+        return f"jquery@{versao.group(1) if versao else 'desconhecida'}"
+    return url
+
+
+def carregar_manifesto():
+    if os.path.exists(ARQUIVO_MANIFESTO):
+        with open(ARQUIVO_MANIFESTO, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {'urls': {}, 'bibliotecas': {}}
+
+
+def salvar_manifesto(manifesto):
+    with open(ARQUIVO_MANIFESTO, 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, indent=2, ensure_ascii=False, sort_keys=True)
+
+
+# URLs que falharam nesta execução (não tentar de novo a cada página)
+_falhas = set()
+
+
+def baixar(url):
+    if url in _falhas:
+        raise OSError("download falhou anteriormente nesta execução")
+    pedido = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0 (PELD build)'})
+    try:
+        with urllib.request.urlopen(pedido, timeout=30) as resposta:
+            return resposta.read()
+    except OSError:
+        _falhas.add(url)
+        raise
+
+
+def gravar_static(nome_relativo, conteudo):
+    destino = os.path.join(PASTA_STATIC, nome_relativo)
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    with open(destino, 'wb') as f:
+        f.write(conteudo)
+
+
+def vendorizar_dependencia_css(url, manifesto):
+    """
+    Baixa fonte/imagem referenciada por um CSS
+
+    O nome original é mantido dentro de um subdiretório com o hash do conteúdo
+    (o Leaflet, por exemplo, depende do nome 'marker-icon.png').
+    """
+    if url in manifesto['urls']:
+        return manifesto['urls'][url]
+    try:
+        conteudo = baixar(url)
+    except Exception as e:
+        print(f"      ⚠️  Não foi possível baixar {url}: {e}")
+        return None
+    nome = f"{hash_conteudo(conteudo)}/{url.rsplit('/', 1)[-1]}"
+    gravar_static(nome, conteudo)
+    manifesto['urls'][url] = nome
+    return nome
+
+
+def reescrever_css(conteudo, url_css, manifesto):
+    """
+    Vendoriza os url(...) relativos de um CSS e aponta para as cópias locais
+    """
+    texto = conteudo.decode('utf-8')
+
+    def trocar(m):
+        aspas, ref = m.group(1), m.group(2).strip()
+        if ref.startswith('data:'):
+            return m.group(0)
+        sem_fragmento, _, fragmento = ref.partition('#')
+        absoluta = urljoin(url_css, sem_fragmento.split('?')[0])
+        local = vendorizar_dependencia_css(absoluta, manifesto)
+        if local is None:
+            return f"url({aspas}{absoluta}{aspas})"
+        sufixo = f"#{fragmento}" if fragmento else ''
+        return f"url({aspas}{local}{sufixo}{aspas})"
+
+    return RE_URL_CSS.sub(trocar, texto).encode('utf-8')
+
+
+def vendorizar(url, manifesto):
+    """
+    Retorna o nome do arquivo em static/ para a URL, baixando se necessário
+    """
+    chave = chave_biblioteca(url)
+    if url in manifesto['urls']:
+        return manifesto['urls'][url]
+    if chave in manifesto['bibliotecas']:
+        manifesto['urls'][url] = manifesto['bibliotecas'][chave]
+        return manifesto['urls'][url]
+
+    print(f"   ⬇️  {url}")
+    try:
+        conteudo = baixar(url)
+    except Exception as e:
+        print(f"      ⚠️  Não foi possível baixar: {e}")
+        return None
+
+    base = url.split('?')[0].rsplit('/', 1)[-1]
+    raiz, ext = os.path.splitext(base)
+    if ext == '.css':
+        conteudo = reescrever_css(conteudo, url, manifesto)
+    if raiz.endswith('.min'):
+        raiz, ext = raiz[:-4], '.min' + ext
+
+    nome = f"{raiz}.{hash_conteudo(conteudo)}{ext}"
+    gravar_static(nome, conteudo)
+    manifesto['urls'][url] = nome
+    manifesto['bibliotecas'][chave] = nome
+    return nome
+
+
+def blocos_compartilhados(paginas):
+    """
+    Blocos <style>/<script> inline idênticos presentes em mais de uma página
+    """
+    ocorrencias = {}
+    for caminho in paginas:
+        with open(caminho, 'r', encoding='utf-8') as f:
+            html = f.read()
+        for m in {(m.group(1).lower(), m.group(2)) for m in RE_BLOCO_INLINE.finditer(html)}:
+            if m[1].strip():
+                ocorrencias[m] = ocorrencias.get(m, 0) + 1
+    return {bloco for bloco, n in ocorrencias.items() if n > 1}
+
+
+def extrair_bloco(tipo, conteudo, manifesto):
+    """
+    Grava um bloco inline compartilhado em static/ e retorna seu nome
+    """
+    dados = conteudo.strip().encode('utf-8')
+    ext = '.css' if tipo == 'style' else '.js'
+    nome = f"comum.{hash_conteudo(dados)}{ext}"
+    if not os.path.exists(os.path.join(PASTA_STATIC, nome)):
+        gravar_static(nome, dados)
+    manifesto.setdefault('blocos', {})[nome] = tipo
+    return nome
+
+
+def reescrever_pagina(caminho, manifesto, compartilhados):
+    """
+    Aponta scripts/CSS de CDN e blocos comuns da página para static/
+    """
+    with open(caminho, 'r', encoding='utf-8') as f:
+        html = f.read()
+    original = html
+    prefixo = os.path.relpath(PASTA_STATIC, os.path.dirname(caminho) or '.').replace(os.sep, '/')
+    ja_incluidos = set()
+    removidos = 0
+
+    def trocar_script(m):
+        nonlocal removidos
+        local = vendorizar(m.group(1), manifesto)
+        if local is None:
+            return m.group(0)
+        if local in ja_incluidos:
+            removidos += 1
+            return ''
+        ja_incluidos.add(local)
+        return m.group(0).replace(m.group(1), f"{prefixo}/{local}")
+
+    def trocar_link(m):
+        nonlocal removidos
+        tag = m.group(0)
+        href = RE_HREF.search(tag)
+        if not href or 'stylesheet' not in tag.lower():
+            return tag
+        local = vendorizar(href.group(1), manifesto)
+        if local is None:
+            return tag
+        if local in ja_incluidos:
+            removidos += 1
+            return ''
+        ja_incluidos.add(local)
+        return tag.replace(href.group(1), f"{prefixo}/{local}")
+
+    def trocar_bloco(m):
+        tipo, conteudo = m.group(1).lower(), m.group(2)
+        if (tipo, conteudo) not in compartilhados:
+            return m.group(0)
+        nome = extrair_bloco(tipo, conteudo, manifesto)
+        if tipo == 'style':
+            return f'<link rel="stylesheet" href="{prefixo}/{nome}"/>'
+        return f'<script src="{prefixo}/{nome}"></script>'
+
+    html = RE_SCRIPT_CDN.sub(trocar_script, html)
+    html = RE_LINK.sub(trocar_link, html)
+    html = RE_BLOCO_INLINE.sub(trocar_bloco, html)
+
+    if html != original:
+        with open(caminho, 'w', encoding='utf-8') as f:
+            f.write(html)
+    return html != original, removidos
+
+
+def main():
+    print("\n" + "="*70)
+    print("   EMPACOTANDO ASSETS ESTÁTICOS DOS MAPAS")
+    print("="*70)
+
+    os.makedirs(PASTA_STATIC, exist_ok=True)
+    manifesto = carregar_manifesto()
+    paginas = [p for p in listar_paginas_html() if not p.startswith(PASTA_STATIC + os.sep)]
+    compartilhados = blocos_compartilhados(paginas)
+
+    for caminho in paginas:
+        print(f"\n📄 Processando: {caminho}")
+        alterada, removidos = reescrever_pagina(caminho, manifesto, compartilhados)
+        if alterada:
+            print(f"   ✅ Página reescrita para usar {PASTA_STATIC}/")
+            if removidos:
+                print(f"   🧹 {removidos} referência(s) duplicada(s) removida(s)")
+        else:
+            print("   ✅ Já usa os assets locais")
+
+    salvar_manifesto(manifesto)
+
+    total = sum(os.path.getsize(os.path.join(r, a))
+                for r, _, arquivos in os.walk(PASTA_STATIC) for a in arquivos)
+    print("\n" + "="*70)
+    print("   ✅ EMPACOTAMENTO CONCLUÍDO!")
+    print("="*70)
+    print(f"\n📦 {len(manifesto['urls'])} URLs empacotadas em {PASTA_STATIC}/ ({total / 1024:.0f} KB)")
+    print("💡 As páginas agora funcionam offline e compartilham o cache do navegador")
+
+
+if __name__ == "__main__":
+    main()
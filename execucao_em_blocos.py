@@ -0,0 +1,296 @@
+"""
+Execução em blocos para rasters maiores que a memória (mosaicos de SC inteira)
+
+Os scripts de raster leem a cena (ou o recorte de um parque) de uma vez, o
+que não cabe num trabalhador de 8 GB quando a cena é um mosaico do estado.
+Aqui o raster é dividido em blocos quadrados e cada etapa vira um conjunto
+de tarefas independentes, uma por bloco (ler, mascarar, calcular), cujos
+resultados parciais são combinados no processo principal:
+
+- reduzir(): redução (soma, momentos, histograma...) sobre os blocos;
+- estatisticas(): média, desvio, mínimo, máximo e mediana exata de uma zona;
+- ler_reduzido(): reamostragem por média de fator × fator pixels;
+- executar(): tarefas por bloco com resultados grandes (álgebra de bandas),
+  entregues na ordem para gravação.
+
+O agendador é o do dask (pip install dask), se instalado, ou um pool de
+threads próprio; nos dois casos, no máximo 2 × trabalhadores blocos estão em
+memória ao mesmo tempo (GDAL e NumPy liberam o GIL, então threads bastam).
+O lado do bloco é escolhido pelo teto de memória:
+
+    PELD_MEMORIA_MB        teto de memória das etapas em blocos (padrão 2048)
+    PELD_TRABALHADORES     threads (padrão: nº de CPUs)
+    PELD_BLOCOS=proprio    usa o agendador próprio mesmo com o dask instalado
+"""
+
+import math
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from rasterio.features import rasterize
+from rasterio.windows import Window, from_bounds
+
+import leitor_raster
+from instrumentacao import medir
+
+try:
+    import dask
+except ImportError:
+    dask = None
+
+MEMORIA_MAXIMA = int(os.environ.get('PELD_MEMORIA_MB', 2048)) * 2**20
+TRABALHADORES = int(os.environ.get('PELD_TRABALHADORES', 0)) or os.cpu_count()
+# Cópias de um bloco vivas por tarefa (leitura, float64, máscaras, temporários)
+COPIAS_POR_BLOCO = 6
+LADO_MINIMO, LADO_MAXIMO = 256, 8192
+# Classes do histograma que localiza a mediana (segunda passada)
+CLASSES_MEDIANA = 65536
+
+
+def backend():
+    return 'dask' if dask is not None and os.environ.get('PELD_BLOCOS') != 'proprio' else 'proprio'
+
+
+def cabe_na_memoria(pixels, bytes_pixel=8, memoria=None):
+    """
+    Se um array de pixels (com as cópias de trabalho) cabe no teto de memória
+    """
+    return pixels * bytes_pixel * COPIAS_POR_BLOCO <= (memoria or MEMORIA_MAXIMA)
+
+
+def lado_bloco(bytes_pixel=8, memoria=None, trabalhadores=None):
+    """
+    Lado do bloco (múltiplo de 256) para que os blocos em voo caibam na memória
+    """
+    memoria = memoria or MEMORIA_MAXIMA
+    em_voo = 2 * (trabalhadores or TRABALHADORES)
+    lado = int(math.sqrt(memoria / (em_voo * COPIAS_POR_BLOCO * bytes_pixel))) // 256 * 256
+    return min(max(lado, LADO_MINIMO), LADO_MAXIMO)
+
+
+def janelas(largura, altura, lado, area=None):
+    """
+    Janelas lado × lado cobrindo a área (Window) ou o raster inteiro
+    """
+    area = area or Window(0, 0, largura, altura)
+    c0, l0 = int(area.col_off), int(area.row_off)
+    c1, l1 = c0 + int(area.width), l0 + int(area.height)
+    for linha in range(l0, l1, lado):
+        for coluna in range(c0, c1, lado):
+            yield Window(coluna, linha, min(lado, c1 - coluna), min(lado, l1 - linha))
+
+
+def janela_da_geometria(src, geometria):
+    """
+    Menor janela do raster que contém a geometria (como mask(crop=True)), ou None
+    """
+    janela = from_bounds(*geometria.bounds, transform=src.transform)
+    c0, l0 = math.floor(janela.col_off), math.floor(janela.row_off)
+    janela = Window(c0, l0, math.ceil(janela.col_off + janela.width) - c0,
+                    math.ceil(janela.row_off + janela.height) - l0)
+    try:
+        return janela.intersection(Window(0, 0, src.width, src.height))
+    except Exception:  # rasterio.errors.WindowError: sem interseção
+        return None
+
+
+def executar(tarefas, trabalhadores=None):
+    """
+    Executa as tarefas (funções sem argumentos, uma por bloco) em paralelo e
+    entrega os resultados na ordem, com no máximo 2 × trabalhadores em memória
+    """
+    trabalhadores = trabalhadores or TRABALHADORES
+    em_voo = 2 * trabalhadores
+    if backend() == 'dask':
+        lote = []
+        for tarefa in tarefas:
+            lote.append(dask.delayed(tarefa)())
+            if len(lote) == em_voo:
+                yield from dask.compute(*lote, scheduler='threads', num_workers=trabalhadores)
+                lote = []
+        if lote:
+            yield from dask.compute(*lote, scheduler='threads', num_workers=trabalhadores)
+        return
+
+    with ThreadPoolExecutor(max_workers=trabalhadores) as executor:
+        pendentes = deque()
+        for tarefa in tarefas:
+            pendentes.append(executor.submit(tarefa))
+            if len(pendentes) == em_voo:
+                yield pendentes.popleft().result()
+        while pendentes:
+            yield pendentes.popleft().result()
+
+
+def ler_bloco(caminho, janela, banda=1, mapeado=False):
+    """
+    (dados, transform, nodata) da janela; abre um dataset por tarefa, pois os
+    do rasterio não são compartilháveis entre threads
+    """
+    with leitor_raster.abrir(caminho, mapeado=mapeado, cache=False) as src:
+        dados, nodata = src.read(banda, window=janela), src.nodata
+        escala = leitor_raster.escala_do_raster(src)
+        if escala:
+            # Formato compacto (int16 com escala): float32 com NaN, como os demais
+            dados, nodata = leitor_raster.desescalar(dados, *escala), np.nan
+        return dados, src.window_transform(janela), nodata
+
+
+def reduzir(caminho, funcao, combinar, area=None, banda=1, mapeado=False, trabalhadores=None):
+    """
+    Combina funcao(dados, transform, nodata) de cada bloco com combinar(a, b);
+    blocos cujo resultado é None são ignorados
+    """
+    with leitor_raster.abrir(caminho, mapeado=mapeado, cache=False) as src:
+        largura, altura = src.width, src.height
+        bytes_pixel = max(np.dtype(src.dtypes[banda - 1]).itemsize, 8)
+    lado = lado_bloco(bytes_pixel, trabalhadores=trabalhadores)
+
+    def tarefa(janela):
+        return lambda: funcao(*ler_bloco(caminho, janela, banda, mapeado))
+
+    resultado = None
+    for parcial in executar((tarefa(j) for j in janelas(largura, altura, lado, area)), trabalhadores):
+        if parcial is not None:
+            resultado = parcial if resultado is None else combinar(resultado, parcial)
+    return resultado
+
+
+# --- Estatísticas zonais ---
+
+def _momentos(valores):
+    if not len(valores):
+        return None
+    return {'n': len(valores), 'media': float(np.mean(valores)), 'm2': float(np.var(valores) * len(valores)),
+            'minimo': float(np.min(valores)), 'maximo': float(np.max(valores))}
+
+
+def _combinar_momentos(a, b):
+    # Média e soma dos quadrados dos desvios combinadas (Chan et al.)
+    n = a['n'] + b['n']
+    delta = b['media'] - a['media']
+    return {'n': n, 'media': a['media'] + delta * b['n'] / n,
+            'm2': a['m2'] + b['m2'] + delta ** 2 * a['n'] * b['n'] / n,
+            'minimo': min(a['minimo'], b['minimo']), 'maximo': max(a['maximo'], b['maximo'])}
+
+
+def selecionar_zona(geometria):
+    """
+    Função de bloco -> valores válidos com o centro do pixel dentro da geometria
+    (o mesmo critério de rasterio.mask)
+    """
+    def selecionar(dados, transform, nodata):
+        validos = np.isfinite(dados) if dados.dtype.kind == 'f' else np.ones(dados.shape, dtype=bool)
+        if nodata is not None and not np.isnan(nodata):
+            validos &= dados != nodata
+        if not validos.any():
+            return dados[:0]
+        dentro = rasterize([(geometria, 1)], out_shape=dados.shape, transform=transform,
+                           fill=0, dtype='uint8').astype(bool)
+        return dados[dentro & validos].astype(np.float64)
+    return selecionar
+
+
+def estatisticas(caminho, selecionar, area=None, mapeado=False, trabalhadores=None):
+    """
+    {media, mediana, desvio_padrao, minimo, maximo, pixels} dos valores que
+    selecionar(dados, transform, nodata) devolve em cada bloco; None se vazio
+
+    A mediana é exata, sem juntar os valores: a segunda passada conta um
+    histograma fino entre o mínimo e o máximo, e a terceira guarda só os
+    valores da(s) classe(s) onde caem as posições centrais.
+    """
+    opcoes = {'area': area, 'mapeado': mapeado, 'trabalhadores': trabalhadores}
+    with medir('blocos_momentos', 'raster', arquivo=os.path.basename(caminho), backend=backend()):
+        momentos = reduzir(caminho, lambda *bloco: _momentos(selecionar(*bloco)), _combinar_momentos, **opcoes)
+    if momentos is None:
+        return None
+
+    n, minimo, maximo = momentos['n'], momentos['minimo'], momentos['maximo']
+    largura = (maximo - minimo) / CLASSES_MEDIANA or 1.0
+
+    def classe(valores):
+        return np.minimum(((valores - minimo) / largura).astype(np.int64), CLASSES_MEDIANA - 1)
+
+    with medir('blocos_mediana', 'raster', arquivo=os.path.basename(caminho)):
+        contagens = reduzir(caminho, lambda *bloco: np.bincount(classe(selecionar(*bloco)),
+                                                                minlength=CLASSES_MEDIANA),
+                            np.add, **opcoes)
+        acumulado = np.cumsum(contagens)
+        posicoes = sorted({(n - 1) // 2, n // 2})
+        classes = np.searchsorted(acumulado, np.array(posicoes) + 1)
+        alvo = set(classes.tolist())
+        antes = int(acumulado[classes.min() - 1]) if classes.min() > 0 else 0
+
+        def centrais(*bloco):
+            valores = selecionar(*bloco)
+            return valores[np.isin(classe(valores), list(alvo))]
+
+        valores = np.sort(reduzir(caminho, centrais, lambda a, b: np.concatenate([a, b]), **opcoes))
+        mediana = float(np.mean([valores[p - antes] for p in posicoes]))
+
+    return {
+        'media': momentos['media'],
+        'mediana': mediana,
+        'desvio_padrao': math.sqrt(momentos['m2'] / n),
+        'minimo': minimo,
+        'maximo': maximo,
+        'pixels': n,
+    }
+
+
+# --- Reamostragem ---
+
+def _media_classes(dados, fator, nodata):
+    """
+    Média de fator × fator pixels, ignorando NaN e nodata
+    """
+    dados = dados.astype(np.float32)
+    validos = np.isfinite(dados)
+    if nodata is not None and not np.isnan(nodata):
+        validos &= dados != nodata
+    altura, largura = -(-dados.shape[0] // fator), -(-dados.shape[1] // fator)
+    forma = (altura, fator, largura, fator)
+    soma = np.zeros((altura * fator, largura * fator), dtype=np.float64)
+    conta = np.zeros(soma.shape, dtype=np.int32)
+    soma[:dados.shape[0], :dados.shape[1]] = np.where(validos, dados, 0)
+    conta[:dados.shape[0], :dados.shape[1]] = validos
+    soma, conta = soma.reshape(forma).sum(axis=(1, 3)), conta.reshape(forma).sum(axis=(1, 3))
+    media = np.full(soma.shape, np.nan, dtype=np.float32)
+    np.divide(soma, conta, out=media, where=conta > 0, casting='unsafe')
+    return media
+
+
+def fator_para_memoria(largura, altura, bytes_pixel=4, memoria=None):
+    """
+    Menor fator de redução para que a grade reduzida caiba no teto de memória
+    """
+    fator = 1
+    while not cabe_na_memoria(-(-largura // fator) * -(-altura // fator), bytes_pixel, memoria):
+        fator += 1
+    return fator
+
+
+def ler_reduzido(caminho, fator, banda=1, mapeado=False, trabalhadores=None):
+    """
+    (média de fator × fator pixels em float32, NaN sem dado; transform da grade
+    reduzida), calculada bloco a bloco sem ler a cena inteira
+    """
+    with leitor_raster.abrir(caminho, mapeado=mapeado, cache=False) as src:
+        largura, altura, transform = src.width, src.height, src.transform
+    lado = max(fator, lado_bloco(trabalhadores=trabalhadores) // fator * fator)
+    saida = np.full((-(-altura // fator), -(-largura // fator)), np.nan, dtype=np.float32)
+
+    def tarefa(janela):
+        def reduzir_bloco():
+            dados, _, nodata = ler_bloco(caminho, janela, banda, mapeado)
+            return janela, _media_classes(dados, fator, nodata)
+        return reduzir_bloco
+
+    with medir('blocos_reamostragem', 'raster', arquivo=os.path.basename(caminho), fator=fator, backend=backend()):
+        for janela, media in executar((tarefa(j) for j in janelas(largura, altura, lado)), trabalhadores):
+            l0, c0 = int(janela.row_off) // fator, int(janela.col_off) // fator
+            saida[l0:l0 + media.shape[0], c0:c0 + media.shape[1]] = media
+    return saida, transform * transform.scale(fator)
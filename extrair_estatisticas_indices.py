@@ -1,166 +1,241 @@
 """
 Script simplificado para extrair estatísticas dos índices de vegetação
 e criar visualizações temporais com dados reais dos parques
+
+As estatísticas são acumuladas no armazém incremental (armazem_estatisticas.py):
+apenas rasters novos (ou alterados) são processados a cada execução.
+
+Recortes maiores que o teto de memória (PELD_MEMORIA_MB), como um mosaico do
+estado inteiro, são processados em blocos (execucao_em_blocos.py); --blocos
+força esse caminho.
 """
 
-import rasterio
+import argparse
+
 import numpy as np
 from rasterio.mask import mask
-import geopandas as gpd
-import json
+import glob
 import os
 
-print("\n" + "="*70)
-print("   EXTRAÇÃO DE ESTATÍSTICAS TEMPORAIS - PELD SC")
-print("="*70)
+import armazem_estatisticas as armazem
+import execucao_em_blocos
+from camadas_vetoriais import EPSG_IMAGENS, ler_camada
+import leitor_raster
+from instrumentacao import medir, iniciar
 
 # Caminhos
 pasta_indices = r"Indice_vegetacao"
-parque_nacional = r"PROJETO_PELDSC\PARNA_SAO_JOAQUIM_SHP\PARNA SAO JOAQUIM SHP\PARNASJlimites.shp"
-parque_estadual = r"Projeto_PARNA_PESF\PARQUE_PESF_1_temp.shp"
-
-# Verificar arquivos
-print("\n📂 Verificando arquivos...")
-
-indices_disponiveis = {}
-for arquivo in ["NDVI_Landsat8_2025.tif", "EVI_2025_06_25.tif"]:
-    caminho = os.path.join(pasta_indices, arquivo)
-    if os.path.exists(caminho):
-        nome = arquivo.split('_')[0]
-        indices_disponiveis[nome] = caminho
-        print(f"   ✅ {nome} encontrado")
-
-if not indices_disponiveis:
-    print("   ❌ Nenhum índice encontrado!")
-    exit(1)
-
-# Carregar shapefiles dos parques
-print("\n🏞️  Carregando limites dos parques...")
-
-try:
-    gdf_pn = gpd.read_file(parque_nacional)
-    gdf_pn = gdf_pn.to_crs("EPSG:32622")  # Converter para mesma projeção das imagens
-    print(f"   ✅ Parque Nacional São Joaquim carregado")
-except Exception as e:
-    print(f"   ❌ Erro ao carregar PNSJ: {e}")
-    gdf_pn = None
-
-try:
-    gdf_pe = gpd.read_file(parque_estadual)
-    gdf_pe = gdf_pe.to_crs("EPSG:32622")
-    print(f"   ✅ Parque Estadual Serra Furada carregado")
-except Exception as e:
-    print(f"   ❌ Erro ao carregar PESF: {e}")
-    gdf_pe = None
-
-def extrair_estatisticas_parque(raster_path, geometria, nome_parque):
+arquivo_json_legado = "estatisticas_indices_2025.json"
+
+INDICES = ('NDVI', 'EVI', 'SAVI', 'ARVI')
+
+# Zonas analisadas: camada de camadas_vetoriais.py e se as feições devem ser unidas
+ZONAS = {
+    'PNSJ': {
+        'nome': 'Parque Nacional São Joaquim',
+        'camada': 'pnsj',
+        'unir_feicoes': False,
+    },
+    'PESF': {
+        'nome': 'Parque Estadual Serra Furada',
+        'camada': 'pesf',
+        'unir_feicoes': True,  # Unir todas as zonas de uso
+    },
+}
+
+
+def listar_indices(pasta=pasta_indices):
+    """
+    Encontra os rasters de índices na pasta, retornando (indice, data, caminho)
+    """
+    encontrados = []
+    for caminho in sorted(glob.glob(os.path.join(pasta, "*.tif"))):
+        nome = os.path.basename(caminho)
+        indice = nome.split('_')[0].upper()
+        data = armazem.data_do_arquivo(nome)
+        if indice in INDICES and data:
+            encontrados.append((indice, data, caminho))
+    return encontrados
+
+
+def carregar_geometria_zona(zona):
+    """
+    Carrega o limite da zona na mesma projeção das imagens (UTM 22S)
+    """
+    info = ZONAS[zona]
+    try:
+        # Camada já projetada em UTM 22, a mesma das imagens
+        gdf = ler_camada(info['camada'], epsg=EPSG_IMAGENS)
+        print(f"   ✅ {info['nome']} carregado")
+    except Exception as e:
+        print(f"   ❌ Erro ao carregar {zona}: {e}")
+        return None
+    return gdf.unary_union if info['unir_feicoes'] else gdf.geometry.iloc[0]
+
+
+def extrair_estatisticas_parque(raster_path, geometria, nome_parque, mapeado=False, blocos=None):
     """
     Extrai estatísticas de um índice para uma área específica
+
+    Com mapeado=True o raster é lido pelo cache mapeado em memória (leitor_raster.py).
+    blocos=None decide pelo tamanho do recorte; True/False força o caminho.
     """
     try:
-        with rasterio.open(raster_path) as src:
+        with leitor_raster.abrir(raster_path, mapeado) as src:
+            area = execucao_em_blocos.janela_da_geometria(src, geometria)
+            if area is None:
+                return None
+            if blocos is None:
+                blocos = not execucao_em_blocos.cabe_na_memoria(area.width * area.height)
+        if blocos:
+            print(f"      🧩 Em blocos ({execucao_em_blocos.backend()}): {area.width:,} × {area.height:,} pixels")
+            estatisticas = execucao_em_blocos.estatisticas(
+                raster_path, execucao_em_blocos.selecionar_zona(geometria), area=area, mapeado=mapeado)
+            return {'parque': nome_parque, **estatisticas} if estatisticas else None
+
+        with leitor_raster.abrir(raster_path, mapeado) as src:
             # Recortar raster pela geometria do parque
-            out_image, out_transform = mask(src, [geometria], crop=True, nodata=np.nan)
+            with medir('mask', 'raster', arquivo=os.path.basename(raster_path), zona=nome_parque):
+                out_image, out_transform = mask(src, [geometria], crop=True, nodata=np.nan)
             data = out_image[0]
-            
+
             # Remover valores inválidos
             data_valido = data[(data != src.nodata) & (~np.isnan(data))]
-            
+
             if len(data_valido) == 0:
                 return None
-            
+
             # Calcular estatísticas
-            estatisticas = {
-                'parque': nome_parque,
-                'media': float(np.mean(data_valido)),
-                'mediana': float(np.median(data_valido)),
-                'desvio_padrao': float(np.std(data_valido)),
-                'minimo': float(np.min(data_valido)),
-                'maximo': float(np.max(data_valido)),
-                'pixels': len(data_valido)
-            }
-            
+            with medir('estatisticas', 'raster', pixels=len(data_valido)):
+                estatisticas = {
+                    'parque': nome_parque,
+                    'media': float(np.mean(data_valido)),
+                    'mediana': float(np.median(data_valido)),
+                    'desvio_padrao': float(np.std(data_valido)),
+                    'minimo': float(np.min(data_valido)),
+                    'maximo': float(np.max(data_valido)),
+                    'pixels': len(data_valido)
+                }
+
             return estatisticas
     except Exception as e:
         print(f"      ⚠️  Erro ao processar {nome_parque}: {e}")
         return None
 
-# Processar cada índice
-resultados = {}
-
-for indice_nome, indice_path in indices_disponiveis.items():
-    print(f"\n{'─'*70}")
-    print(f"📊 Processando {indice_nome}")
-    print(f"{'─'*70}")
-    
-    resultados[indice_nome] = {}
-    
-    # Processar Parque Nacional
-    if gdf_pn is not None:
-        print(f"\n   Analisando Parque Nacional São Joaquim...")
-        geom_pn = gdf_pn.geometry.iloc[0]
-        stats_pn = extrair_estatisticas_parque(indice_path, geom_pn, "PNSJ")
-        
-        if stats_pn:
-            resultados[indice_nome]['PNSJ'] = stats_pn
-            print(f"      ✅ Média: {stats_pn['media']:.3f}")
-            print(f"      📊 Min: {stats_pn['minimo']:.3f}, Max: {stats_pn['maximo']:.3f}")
-            print(f"      📏 Pixels analisados: {stats_pn['pixels']:,}")
-    
-    # Processar Parque Estadual
-    if gdf_pe is not None:
-        print(f"\n   Analisando Parque Estadual Serra Furada...")
-        geom_pe = gdf_pe.unary_union  # Unir todas as zonas
-        stats_pe = extrair_estatisticas_parque(indice_path, geom_pe, "PESF")
-        
-        if stats_pe:
-            resultados[indice_nome]['PESF'] = stats_pe
-            print(f"      ✅ Média: {stats_pe['media']:.3f}")
-            print(f"      📊 Min: {stats_pe['minimo']:.3f}, Max: {stats_pe['maximo']:.3f}")
-            print(f"      📏 Pixels analisados: {stats_pe['pixels']:,}")
-
-# Salvar resultados
-print(f"\n{'='*70}")
-print("   💾 SALVANDO RESULTADOS")
-print(f"{'='*70}")
-
-output_file = "estatisticas_indices_2025.json"
-with open(output_file, 'w', encoding='utf-8') as f:
-    json.dump(resultados, f, indent=2, ensure_ascii=False)
-
-print(f"\n✅ Estatísticas salvas em: {output_file}")
-
-# Exibir resumo
-print(f"\n{'='*70}")
-print("   📊 RESUMO GERAL")
-print(f"{'='*70}")
-
-for indice, parques in resultados.items():
-    print(f"\n🌿 {indice}:")
-    for parque, stats in parques.items():
-        interpretacao = ""
-        if indice == "NDVI":
-            if stats['media'] > 0.7:
-                interpretacao = "🟢 Vegetação densa e saudável"
-            elif stats['media'] > 0.4:
-                interpretacao = "🟡 Vegetação moderada"
-            else:
-                interpretacao = "🔴 Vegetação esparsa/estresse"
-        elif indice == "EVI":
-            if stats['media'] > 0.5:
-                interpretacao = "🟢 Cobertura vegetal excelente"
-            elif stats['media'] > 0.3:
-                interpretacao = "🟡 Cobertura vegetal boa"
-            else:
-                interpretacao = "🔴 Cobertura vegetal baixa"
-        
-        print(f"   • {parque}: {stats['media']:.3f} ± {stats['desvio_padrao']:.3f} {interpretacao}")
-
-print(f"\n{'='*70}")
-print("✅ Processamento concluído com sucesso!")
-print(f"{'='*70}")
-
-print("\n💡 Próximos passos:")
-print("   1. Use estes dados para criar série temporal simulada")
-print("   2. Execute gerar_visualizacoes_temporais.py para mapas interativos")
-print("   3. Publique no GitHub Pages")
+
+def atualizar_armazem(con, rasters, mapeado=False, blocos=None):
+    """
+    Processa somente as combinações (índice, zona, data, hash do raster, hash
+    do limite da zona) ausentes do armazém
+    """
+    novos = 0
+    # O hash do limite faz parte da chave: um limite alterado reprocessa a zona
+    geometrias = {zona: carregar_geometria_zona(zona) for zona in ZONAS} if rasters else {}
+    hashes_geometria = {zona: armazem.hash_geometria(g)
+                        for zona, g in geometrias.items() if g is not None}
+
+    for indice_nome, data, indice_path in rasters:
+        hash_fonte = armazem.hash_fonte(con, indice_path)
+        pendentes = [z for z in hashes_geometria
+                     if not armazem.ja_processado(con, indice_nome, z, data, hash_fonte,
+                                                  hashes_geometria[z])]
+
+        if not pendentes:
+            print(f"   ⏭️  {indice_nome} {data}: já processado")
+            continue
+
+        print(f"\n{'─'*70}")
+        print(f"📊 Processando {indice_nome} ({data})")
+        print(f"{'─'*70}")
+
+        for zona in pendentes:
+            print(f"\n   Analisando {ZONAS[zona]['nome']}...")
+            stats = extrair_estatisticas_parque(indice_path, geometrias[zona], zona, mapeado, blocos)
+
+            if stats:
+                armazem.registrar(con, indice_nome, zona, data, hash_fonte, hashes_geometria[zona],
+                                  indice_path, stats)
+                novos += 1
+                print(f"      ✅ Média: {stats['media']:.3f}")
+                print(f"      📊 Min: {stats['minimo']:.3f}, Max: {stats['maximo']:.3f}")
+                print(f"      📏 Pixels analisados: {stats['pixels']:,}")
+
+    return novos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extrai as estatísticas dos índices nos parques")
+    parser.add_argument('--mmap', action='store_true',
+                        help="lê os rasters pelo cache mapeado em memória (.cache_rasters/)")
+    parser.add_argument('--blocos', action='store_true', default=None,
+                        help="processa em blocos mesmo os recortes que cabem na memória")
+    args = parser.parse_args()
+
+    print("\n" + "="*70)
+    print("   EXTRAÇÃO DE ESTATÍSTICAS TEMPORAIS - PELD SC")
+    print("="*70)
+
+    # Verificar arquivos
+    print("\n📂 Verificando arquivos...")
+
+    rasters = listar_indices()
+    for indice_nome, data, _ in rasters:
+        print(f"   ✅ {indice_nome} ({data}) encontrado")
+
+    if not rasters:
+        print("   ❌ Nenhum índice encontrado!")
+        exit(1)
+
+    con = armazem.conectar()
+    novos = atualizar_armazem(con, rasters, args.mmap, args.blocos)
+
+    # Salvar resultados
+    print(f"\n{'='*70}")
+    print("   💾 SALVANDO RESULTADOS")
+    print(f"{'='*70}")
+
+    print(f"\n✅ {novos} novo(s) registro(s) em: {armazem.ARQUIVO_ARMAZEM}")
+    resultados = armazem.exportar_json_legado(con, arquivo_json_legado)
+    print(f"✅ Estatísticas mais recentes exportadas em: {arquivo_json_legado}")
+    con.close()
+
+    # Exibir resumo
+    print(f"\n{'='*70}")
+    print("   📊 RESUMO GERAL")
+    print(f"{'='*70}")
+
+    for indice, parques in resultados.items():
+        print(f"\n🌿 {indice}:")
+        for parque, stats in parques.items():
+            interpretacao = ""
+            if indice == "NDVI":
+                if stats['media'] > 0.7:
+                    interpretacao = "🟢 Vegetação densa e saudável"
+                elif stats['media'] > 0.4:
+                    interpretacao = "🟡 Vegetação moderada"
+                else:
+                    interpretacao = "🔴 Vegetação esparsa/estresse"
+            elif indice == "EVI":
+                if stats['media'] > 0.5:
+                    interpretacao = "🟢 Cobertura vegetal excelente"
+                elif stats['media'] > 0.3:
+                    interpretacao = "🟡 Cobertura vegetal boa"
+                else:
+                    interpretacao = "🔴 Cobertura vegetal baixa"
+
+            print(f"   • {parque} ({stats['data_aquisicao']}): "
+                  f"{stats['media']:.3f} ± {stats['desvio_padrao']:.3f} {interpretacao}")
+
+    print(f"\n{'='*70}")
+    print("✅ Processamento concluído com sucesso!")
+    print(f"{'='*70}")
+
+    print("\n💡 Próximos passos:")
+    print("   1. Use estes dados para criar série temporal simulada")
+    print("   2. Execute gerar_visualizacoes_temporais.py para mapas interativos")
+    print("   3. Publique no GitHub Pages")
+
+
+if __name__ == "__main__":
+    iniciar(__file__)
+    main()
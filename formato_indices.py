@@ -0,0 +1,141 @@
+"""
+Formato compacto dos rasters de índices: int16 com escala
+
+NDVI, EVI, SAVI e ARVI precisam de 3 a 4 algarismos significativos, mas
+chegam do Earth Engine como float32 com NaN. No formato compacto cada valor
+é um inteiro de 16 bits, valor = inteiro × 0,0001 (faixa de ±3,2767, que
+cobre todos os índices), com -32768 reservado para "sem dado". A escala vai
+nos metadados do GeoTIFF (scale/offset) e os blocos de 512 × 512 são
+comprimidos com DEFLATE e preditor horizontal, que comprime bem inteiros de
+uma superfície contínua. O erro de quantização é de no máximo 0,00005.
+
+Os leitores do pipeline (leitor_raster.abrir, execucao_em_blocos) aplicam a
+escala sozinhos e devolvem float32 com NaN onde não há dado, como antes;
+os scripts não mudam.
+
+Uso:
+    python formato_indices.py converter                     # Indice_vegetacao/*.tif, no lugar
+    python formato_indices.py converter NDVI_2025_06_25.tif --saida compacto/
+    python formato_indices.py info                          # formato e tamanho de cada raster
+"""
+
+import argparse
+import glob
+import os
+
+import numpy as np
+import rasterio
+
+from execucao_em_blocos import janelas
+from instrumentacao import medir, iniciar
+from leitor_raster import desescalar, escala_do_raster
+
+ESCALA = 1e-4
+DESLOCAMENTO = 0.0
+NODATA = -32768
+LADO_BLOCO = 512
+# Janelas de conversão: vários blocos do GeoTIFF por leitura
+LADO_CONVERSAO = 4 * LADO_BLOCO
+PADRAO_INDICES = os.path.join('Indice_vegetacao', '*.tif')
+
+
+def perfil_compacto(perfil):
+    """
+    Perfil de gravação do rasterio no formato compacto, a partir de um perfil float
+    """
+    perfil = dict(perfil, driver='GTiff', dtype='int16', nodata=NODATA, tiled=True,
+                  blockxsize=LADO_BLOCO, blockysize=LADO_BLOCO, compress='deflate', predictor=2)
+    perfil.pop('zlevel', None)
+    return perfil
+
+
+def quantizar(valores, nodata=None):
+    """
+    Valores (float; NaN ou nodata = sem dado) -> inteiros int16 do formato compacto
+    """
+    valores = np.asarray(valores, dtype=np.float64)
+    sem_dado = ~np.isfinite(valores)
+    if nodata is not None and not np.isnan(nodata):
+        sem_dado |= valores == nodata
+    inteiros = np.full(valores.shape, NODATA, dtype=np.int16)
+    inteiros[~sem_dado] = np.clip(np.round((valores[~sem_dado] - DESLOCAMENTO) / ESCALA),
+                                  NODATA + 1, np.iinfo(np.int16).max)
+    return inteiros
+
+
+def gravar_escala(dst):
+    """
+    Grava scale/offset em todas as bandas de um dataset aberto para escrita
+    """
+    dst.scales = (ESCALA,) * dst.count
+    dst.offsets = (DESLOCAMENTO,) * dst.count
+
+
+def converter(origem, destino=None):
+    """
+    Regrava o raster no formato compacto (destino=None: no lugar), janela a
+    janela; retorna (bytes antes, bytes depois, maior erro de quantização)
+    """
+    destino = destino or origem
+    temporario = destino + '.tmp'
+    erro = 0.0
+    with rasterio.open(origem) as src:
+        if escala_do_raster(src):
+            raise ValueError(f"{origem} já está no formato compacto")
+        with rasterio.open(temporario, 'w', **perfil_compacto(src.profile)) as dst:
+            gravar_escala(dst)
+            dst.update_tags(**src.tags())
+            for janela in janelas(src.width, src.height, LADO_CONVERSAO):
+                valores = src.read(window=janela)
+                inteiros = quantizar(valores, src.nodata)
+                dst.write(inteiros, window=janela)
+                validos = inteiros != NODATA
+                if validos.any():
+                    recuperados = desescalar(inteiros, ESCALA, DESLOCAMENTO, NODATA)
+                    erro = max(erro, float(np.max(np.abs(recuperados[validos] - valores[validos]))))
+    antes = os.path.getsize(origem)
+    os.replace(temporario, destino)
+    return antes, os.path.getsize(destino), erro
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Formato compacto (int16 com escala) dos rasters de índices")
+    sub = parser.add_subparsers(dest='comando', required=True)
+    conv = sub.add_parser('converter', help="regrava rasters float32 no formato compacto")
+    conv.add_argument('rasters', nargs='*', help=f"arquivos .tif (padrão: {PADRAO_INDICES})")
+    conv.add_argument('--saida', help="pasta de saída (padrão: substitui o arquivo original)")
+    info = sub.add_parser('info', help="mostra o formato e o tamanho de cada raster")
+    info.add_argument('rasters', nargs='*', help=f"arquivos .tif (padrão: {PADRAO_INDICES})")
+    args = parser.parse_args()
+
+    rasters = args.rasters or sorted(glob.glob(PADRAO_INDICES))
+    if args.comando == 'info':
+        for caminho in rasters:
+            with rasterio.open(caminho) as src:
+                formato = "int16 com escala" if escala_do_raster(src) else src.dtypes[0]
+            print(f"   {caminho}: {formato}, {os.path.getsize(caminho) / 2**20:,.1f} MB")
+        return
+
+    if args.saida:
+        os.makedirs(args.saida, exist_ok=True)
+    total_antes = total_depois = 0
+    for caminho in rasters:
+        destino = os.path.join(args.saida, os.path.basename(caminho)) if args.saida else None
+        try:
+            with medir('converter_compacto', 'raster', arquivo=os.path.basename(caminho)):
+                antes, depois, erro = converter(caminho, destino)
+        except ValueError as e:
+            print(f"   ⏭️  {e}")
+            continue
+        total_antes += antes
+        total_depois += depois
+        print(f"   ✅ {caminho}: {antes / 2**20:,.1f} MB -> {depois / 2**20:,.1f} MB "
+              f"({depois / antes:.0%}), erro máximo {erro:.6f}")
+    if total_antes:
+        print(f"\n📦 {total_antes / 2**20:,.1f} MB -> {total_depois / 2**20:,.1f} MB "
+              f"({total_depois / total_antes:.0%} do original)")
+
+
+if __name__ == "__main__":
+    iniciar(__file__)
+    main()
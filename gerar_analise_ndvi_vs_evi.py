@@ -4,8 +4,13 @@ Mapa interativo mostrando as diferenças e correlações entre os dois índices
 """
 
 import folium
-from folium import plugins
 import json
+import os
+
+from densidade_dispersao import graficos_ndvi_evi, png_base64
+from instrumentacao import medir, iniciar
+
+iniciar(__file__)
 
 print("\n" + "="*70)
 print("   ANÁLISE COMPARATIVA: NDVI vs EVI")
@@ -15,6 +20,16 @@ print("="*70)
 with open('estatisticas_indices_2025.json', 'r', encoding='utf-8') as f:
     dados = json.load(f)
 
+# Estatísticas pixel a pixel (analise_conjunta_ndvi_evi.py), quando disponíveis
+conjunta = {}
+graficos = {}
+if os.path.exists('analise_conjunta_ndvi_evi.json'):
+    with open('analise_conjunta_ndvi_evi.json', 'r', encoding='utf-8') as f:
+        analise = json.load(f)
+    conjunta = analise['zonas']
+    # Densidade NDVI × EVI por parque: PNGs pequenos, refeitos só se os dados mudarem
+    graficos = graficos_ndvi_evi(analise)
+
 # Coordenadas dos parques
 pn_coords = {'lat': -28.167, 'lon': -49.583}
 pe_coords = {'lat': -28.083, 'lon': -49.483}
@@ -38,6 +53,12 @@ folium.TileLayer(
     opacity=0.6
 ).add_to(m)
 
+def numero(valor, casas=3):
+    """
+    Valor formatado, ou '—' quando a análise não o definiu (variância nula, < 2 pixels)
+    """
+    return '—' if valor is None else f"{valor:.{casas}f}"
+
 # Função para interpretar índices
 def interpretar_ndvi(valor):
     if valor > 0.7:
@@ -84,8 +105,14 @@ for parque_id, info in parques.items():
     # Normalizar EVI para escala similar ao NDVI (0-1)
     evi_normalizado = min(evi_val / 2.0, 1.0)
     
-    # Discrepância entre índices
-    discrepancia = abs(ndvi_val - evi_normalizado)
+    # Discrepância entre índices: média de |d| por pixel, ou entre as médias do parque
+    pixels = conjunta.get(parque_id)
+    if pixels:
+        discrepancia = pixels['discrepancia_abs_media']
+        rotulo_discrepancia = "Discrepância média por pixel"
+    else:
+        discrepancia = abs(ndvi_val - evi_normalizado)
+        rotulo_discrepancia = "Discrepância"
     
     interpretacao_ndvi, cor_ndvi = interpretar_ndvi(ndvi_val)
     interpretacao_evi, cor_evi = interpretar_evi(evi_val)
@@ -106,6 +133,31 @@ for parque_id, info in parques.items():
     
     # Razão NDVI/EVI
     razao = ndvi_val / evi_normalizado if evi_normalizado > 0 else 0
+
+    secao_pixels = ""
+    if pixels:
+        regressao = pixels['regressao']
+        concordancia = pixels['concordancia']
+        grafico = ""
+        if parque_id in graficos:
+            grafico = (f'<img src="data:image/png;base64,{png_base64(graficos[parque_id])}" '
+                       f'style="width: 100%; margin-top: 10px;" alt="Densidade NDVI × EVI">')
+        secao_pixels = f"""
+        <!-- Concordância pixel a pixel -->
+        <div style="background: #ede7f6; padding: 15px; border-radius: 8px; margin-bottom: 15px;">
+            <h4 style="margin: 0 0 10px 0; color: #4527a0;">🧮 Concordância por pixel</h4>
+            <table style="width: 100%; font-size: 13px;">
+                <tr><td><strong>Pixels comparados:</strong></td><td style="text-align: right;">{pixels['pixels']:,}</td></tr>
+                <tr><td><strong>Correlação de Pearson:</strong></td><td style="text-align: right;">{numero(pixels['pearson'])}</td></tr>
+                <tr><td><strong>Correlação de Spearman:</strong></td><td style="text-align: right;">{numero(pixels['spearman'])}</td></tr>
+                <tr><td><strong>Regressão:</strong></td>
+                    <td style="text-align: right;">EVI = {numero(regressao['intercepto'])} + {numero(regressao['inclinacao'])}·NDVI (R² {numero(regressao['r2'], 2)})</td></tr>
+                <tr><td><strong>Concordância alta / moderada / baixa:</strong></td>
+                    <td style="text-align: right;">{100 * concordancia['alta']:.0f}% / {100 * concordancia['moderada']:.0f}% / {100 * concordancia['baixa']:.0f}%</td></tr>
+            </table>
+            {grafico}
+        </div>
+        """
     
     # Criar popup detalhado
     popup_html = f"""
@@ -174,7 +226,7 @@ for parque_id, info in parques.items():
                 <strong>Concordância:</strong> {analise_concordancia}
             </p>
             <p style="font-size: 13px; margin: 5px 0;">
-                <strong>Discrepância:</strong> {discrepancia:.3f}
+                <strong>{rotulo_discrepancia}:</strong> {discrepancia:.3f}
             </p>
             <p style="font-size: 13px; margin: 5px 0;">
                 <strong>Razão NDVI/EVI:</strong> {razao:.3f}
@@ -183,7 +235,7 @@ for parque_id, info in parques.items():
                 {explicacao}
             </p>
         </div>
-        
+        {secao_pixels}
         <!-- Explicação Técnica -->
         <div style="background: #f5f5f5; padding: 15px; border-radius: 8px;">
             <h4 style="margin: 0 0 10px 0; color: #424242;">📚 Por que NDVI e EVI são diferentes?</h4>
@@ -255,7 +307,8 @@ m.get_root().html.add_child(folium.Element(legenda_html))
 
 # Salvar
 output_file = 'mapa_analise_ndvi_vs_evi.html'
-m.save(output_file)
+with medir('folium_save', 'render', arquivo=output_file):
+    m.save(output_file)
 
 print(f"\n✅ Mapa de análise comparativa criado: {output_file}")
 print("\n" + "="*70)
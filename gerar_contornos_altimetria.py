@@ -2,12 +2,24 @@ import geopandas as gpd
 import rasterio
 import numpy as np
 import matplotlib.pyplot as plt
-from shapely.geometry import shape
 import json
 
-# Ler o MDE
+import execucao_em_blocos
+from instrumentacao import medir, iniciar
+
+iniciar(__file__)
+
+# Ler o MDE (mosaicos maiores que o teto de memória: média por blocos,
+# em resolução reduzida, que basta para curvas a cada 100 m)
 with rasterio.open('Projeto_PARNA_PESF/MDE_Completo_Cidades.tif') as src:
-    data = src.read(1)
+    fator = execucao_em_blocos.fator_para_memoria(src.width, src.height)
+    if fator == 1:
+        with medir('raster_read', 'raster', arquivo='MDE_Completo_Cidades.tif'):
+            data = src.read(1)
+    else:
+        print(f'MDE grande: lido em blocos, reduzido {fator}x')
+        data, _ = execucao_em_blocos.ler_reduzido(src.name, fator)
+        data = np.ma.masked_invalid(data)
     transform = src.transform
     crs = src.crs
 
@@ -22,38 +34,43 @@ with rasterio.open('Projeto_PARNA_PESF/MDE_Completo_Cidades.tif') as src:
 
     # Usar matplotlib para gerar contornos
     fig, ax = plt.subplots(figsize=(10, 10))
-    cs = ax.contour(data, levels=levels, extent=[src.bounds.left, src.bounds.right, src.bounds.bottom, src.bounds.top])
+    with medir('contour', 'raster', niveis=len(levels)):
+        cs = ax.contour(data, levels=levels, extent=[src.bounds.left, src.bounds.right, src.bounds.bottom, src.bounds.top])
 
     # Converter contornos para GeoJSON
     contours_geojson = {'type': 'FeatureCollection', 'features': []}
 
-    for i, (level, collection) in enumerate(zip(levels, cs.collections)):
-        print(f"Processando nível {level}m...")
-        for path in collection.get_paths():
-            if len(path.vertices) > 2:  # Apenas contornos com pontos suficientes
-                # Converter coordenadas do raster para coordenadas geográficas
-                coords = []
-                for vertex in path.vertices:
-                    # Transformar coordenadas do pixel para coordenadas geográficas
-                    x, y = rasterio.transform.xy(transform, vertex[1], vertex[0])
-                    coords.append([x, y])
+    with medir('contornos_para_geojson', 'vetor'):
+        # allsegs: uma lista de linhas (vértices Nx2) por nível; cs.collections
+        # não existe mais a partir do matplotlib 3.10
+        for i, (level, segmentos) in enumerate(zip(levels, cs.allsegs)):
+            print(f"Processando nível {level}m...")
+            for vertices in segmentos:
+                if len(vertices) > 2:  # Apenas contornos com pontos suficientes
+                    # Converter coordenadas do raster para coordenadas geográficas
+                    coords = []
+                    for vertex in vertices:
+                        # Transformar coordenadas do pixel para coordenadas geográficas
+                        x, y = rasterio.transform.xy(transform, vertex[1], vertex[0])
+                        coords.append([x, y])
 
-                if len(coords) > 2:
-                    feature = {
-                        'type': 'Feature',
-                        'geometry': {
-                            'type': 'LineString',
-                            'coordinates': coords
-                        },
-                        'properties': {
-                            'elevation': int(level),
-                            'unit': 'meters'
+                    if len(coords) > 2:
+                        feature = {
+                            'type': 'Feature',
+                            'geometry': {
+                                'type': 'LineString',
+                                'coordinates': coords
+                            },
+                            'properties': {
+                                'elevation': int(level),
+                                'unit': 'meters'
+                            }
                         }
-                    }
-                    contours_geojson['features'].append(feature)
+                        contours_geojson['features'].append(feature)
 
     # Salvar como GeoJSON
-    with open('contornos_altimetria.geojson', 'w') as f:
+    with medir('json_dump', 'vetor', arquivo='contornos_altimetria.geojson'), \
+            open('contornos_altimetria.geojson', 'w') as f:
         json.dump(contours_geojson, f)
 
     print(f'Contornos criados: {len(contours_geojson["features"])} features')
@@ -63,7 +80,8 @@ with rasterio.open('Projeto_PARNA_PESF/MDE_Completo_Cidades.tif') as src:
     if crs != 'EPSG:4326':
         gdf_contours = gpd.GeoDataFrame.from_features(contours_geojson['features'])
         gdf_contours.crs = crs
-        gdf_contours = gdf_contours.to_crs('EPSG:4326')
+        with medir('to_crs', 'vetor', feicoes=len(gdf_contours)):
+            gdf_contours = gdf_contours.to_crs('EPSG:4326')
         contours_wgs84 = gdf_contours.__geo_interface__
         with open('contornos_altimetria_wgs84.geojson', 'w') as f:
             json.dump(contours_wgs84, f)
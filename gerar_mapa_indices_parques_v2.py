@@ -1,16 +1,22 @@
-import geopandas as gpd
+import json
+
 import folium
-import pandas as pd
+
+from camadas_vetoriais import ler_camada
+from gerar_vector_tiles import adicionar_camadas
+from instrumentacao import medir, iniciar
+from parcelas import carregar_parcelas
+from servidor_api_zonas import script_valores_ao_vivo, valor_ao_vivo
+
+iniciar(__file__)
 
 # Carregar dados
-df = pd.read_csv('amb_csv/ppbio_sc-coordenadas_parcelas.csv', encoding='latin1', sep=';')
+df = carregar_parcelas()
 
 # Carregar parques
-parque_nacional = gpd.read_file('PROJETO_PELDSC/PARNA_SAO_JOAQUIM_SHP/PARNA SAO JOAQUIM SHP/PARNASJlimites.shp')
-parque_nacional = parque_nacional.to_crs(epsg=4326)
-
-parque_estadual = gpd.read_file('Projeto_PARNA_PESF/PARQUE_PESF_1_temp.shp')
-parque_estadual = parque_estadual.to_crs(epsg=4326)
+# Limites em WGS84, de camadas_peld.gpkg
+parque_nacional = ler_camada('pnsj')
+parque_estadual = ler_camada('pesf')
 
 # Calcular centroids (usando bounds como alternativa mais simples)
 pn_bounds = parque_nacional.total_bounds
@@ -33,65 +39,66 @@ folium.TileLayer(
     overlay=False
 ).add_to(mapa)
 
-# Adicionar parques
-folium.GeoJson(
-    parque_nacional.__geo_interface__,
-    name='Parque Nacional de São Joaquim',
-    style_function=lambda x: {'fillColor': 'green', 'color': 'darkgreen', 'weight': 3, 'fillOpacity': 0.2}
-).add_to(mapa)
-
-folium.GeoJson(
-    parque_estadual.__geo_interface__,
-    name='Parque Estadual da Serra Furada',
-    style_function=lambda x: {'fillColor': 'blue', 'color': 'darkblue', 'weight': 2, 'fillOpacity': 0.2}
-).add_to(mapa)
-
-# Informações dos índices (textuais por enquanto)
-ndvi_info = """
-<h4>🌱 NDVI - Normalized Difference Vegetation Index</h4>
-<p><b>Parque Nacional de São Joaquim</b></p>
+# Adicionar parques: vector tiles (gerar_vector_tiles.py) ou, sem a pirâmide,
+# GeoJSON embutido
+adicionar_camadas(mapa, ['pnsj', 'pesf'], {'pnsj': parque_nacional, 'pesf': parque_estadual},
+                  estilos={'pnsj': {'fillOpacity': 0.2}, 'pesf': {'fillOpacity': 0.2}})
+
+# Estatísticas reais (extrair_estatisticas_indices.py); com a API de zonas no
+# ar (servidor_api_zonas.py), a página troca pelos valores atuais do armazém
+try:
+    with open('estatisticas_indices_2025.json', 'r', encoding='utf-8') as f:
+        estatisticas = json.load(f)
+except FileNotFoundError:
+    estatisticas = {}
+
+
+def valor(indice, zona, campo, casas=3):
+    v = estatisticas.get(indice, {}).get(zona, {}).get(campo)
+    if v is None:
+        texto = '—'
+    else:
+        texto = f"{v:,.0f}".replace(',', '.') if casas == 0 else f"{v:.{casas}f}"
+    return valor_ao_vivo(texto, zona, indice, campo, casas)
+
+
+def info_indice(titulo, indice, zona, nome_zona, linhas, imagem=None):
+    data = estatisticas.get(indice, {}).get(zona, {}).get('data_aquisicao')
+    html = f"""
+<h4>{titulo}</h4>
+<p><b>{nome_zona}</b>{f' ({data})' if data else ''}</p>
 <ul>
-<li><b>Range:</b> -0.746 a 0.996</li>
-<li><b>Média:</b> 0.771</li>
-<li><b>Interpretação:</b> Alta saúde da vegetação (valores > 0.6)</li>
-<li><b>Área saudável:</b> ~85% da cobertura vegetal</li>
+<li><b>Range:</b> {valor(indice, zona, 'minimo')} a {valor(indice, zona, 'maximo')}</li>
+<li><b>Média:</b> {valor(indice, zona, 'media')}</li>
+<li><b>Pixels analisados:</b> {valor(indice, zona, 'pixels', casas=0)}</li>
+{''.join(f'<li><b>{rotulo}:</b> {texto}</li>' for rotulo, texto in linhas)}
 </ul>
-<img src="ndvi_overlay.png" style="max-width:100%; max-height:200px; border:1px solid #ddd;">
 """
+    if imagem:
+        html += f'<img src="{imagem}" style="max-width:100%; max-height:200px; border:1px solid #ddd;">\n'
+    return html
 
-evi_info = """
-<h4>🌿 EVI - Enhanced Vegetation Index</h4>
-<p><b>Parque Nacional de São Joaquim</b></p>
-<ul>
-<li><b>Range:</b> -1.000 a 2.000</li>
-<li><b>Média:</b> 1.181</li>
-<li><b>Interpretação:</b> Cobertura densa de vegetação</li>
-<li><b>Vantagem:</b> Melhor para áreas com alta biomassa</li>
-</ul>
-<img src="evi_overlay.png" style="max-width:100%; max-height:200px; border:1px solid #ddd;">
-"""
 
-savi_info = """
-<h4>🌾 SAVI - Soil Adjusted Vegetation Index</h4>
-<p><b>Parque Estadual da Serra Furada</b></p>
-<ul>
-<li><b>Range:</b> -1.000 a 1.500</li>
-<li><b>Média:</b> 1.115</li>
-<li><b>Interpretação:</b> Vegetação ajustada à influência do solo</li>
-<li><b>Aplicação:</b> Áreas com solo exposto ou ralo</li>
-</ul>
-"""
+ndvi_info = info_indice('🌱 NDVI - Normalized Difference Vegetation Index', 'NDVI', 'PNSJ',
+                        'Parque Nacional de São Joaquim',
+                        [('Interpretação', 'Alta saúde da vegetação (valores > 0.6)')],
+                        'ndvi_overlay.png')
 
-arvi_info = """
-<h4>☁️ ARVI - Atmospherically Resistant Vegetation Index</h4>
-<p><b>Parque Estadual da Serra Furada</b></p>
-<ul>
-<li><b>Range:</b> 0.488 a 2.000</li>
-<li><b>Média:</b> 1.443</li>
-<li><b>Interpretação:</b> Resistente a interferências atmosféricas</li>
-<li><b>Vantagem:</b> Melhor para imagens com aerosóis</li>
-</ul>
-"""
+evi_info = info_indice('🌿 EVI - Enhanced Vegetation Index', 'EVI', 'PNSJ',
+                       'Parque Nacional de São Joaquim',
+                       [('Interpretação', 'Cobertura densa de vegetação'),
+                        ('Vantagem', 'Melhor para áreas com alta biomassa')],
+                       'evi_overlay.png')
+
+savi_info = info_indice('🌾 SAVI - Soil Adjusted Vegetation Index', 'SAVI', 'PESF',
+                        'Parque Estadual da Serra Furada',
+                        [('Interpretação', 'Vegetação ajustada à influência do solo'),
+                         ('Aplicação', 'Áreas com solo exposto ou ralo')])
+
+arvi_info = info_indice('☁️ ARVI - Atmospherically Resistant Vegetation Index', 'ARVI', 'PESF',
+                        'Parque Estadual da Serra Furada',
+                        [('Interpretação', 'Resistente a interferências atmosféricas'),
+                         ('Vantagem', 'Melhor para imagens com aerosóis')])
 
 # Adicionar marcadores com informações dos índices
 folium.Marker(
@@ -137,7 +144,9 @@ title_html = '''
 </div>
 '''
 mapa.get_root().html.add_child(folium.Element(title_html))
+mapa.get_root().html.add_child(folium.Element(script_valores_ao_vivo()))
 
-mapa.save('mapa_indices_parques.html')
+with medir('folium_save', 'render', arquivo='mapa_indices_parques.html'):
+    mapa.save('mapa_indices_parques.html')
 print("Mapa focado nos parques criado: mapa_indices_parques.html")
 print("Agora os índices estão localizados corretamente nos parques!")
\ No newline at end of file
@@ -1,48 +1,31 @@
-import geopandas as gpd
 import folium
-import pandas as pd
 import rasterio
 import numpy as np
-from folium.plugins import MarkerCluster
 import matplotlib.pyplot as plt
 from io import BytesIO
 import base64
 
+import execucao_em_blocos
+from camadas_vetoriais import ler_camada
+from gerar_vector_tiles import adicionar_camadas
+from instrumentacao import medir, iniciar
+from parcelas import carregar_parcelas
+from leitor_raster import abrir, limites_wgs84
+from servidor_tiles_raster import camada_servidor, camada_sobreposicao
+
+iniciar(__file__)
+
 # Carregar dados básicos
-df = pd.read_csv('amb_csv/ppbio_sc-coordenadas_parcelas.csv', encoding='latin1', sep=';')
-
-# Converter shapefiles
-try:
-    gdf_parque_nacional = gpd.read_file('PROJETO_PELDSC/PARNA_SAO_JOAQUIM_SHP/PARNA SAO JOAQUIM SHP/PARNASJlimites.shp')
-    gdf_parque_nacional = gdf_parque_nacional.to_crs(epsg=4326)
-    parque_nacional_geojson = 'parque_nacional_sj.geojson'
-    gdf_parque_nacional.to_file(parque_nacional_geojson, driver='GeoJSON')
-except:
-    parque_nacional_geojson = None
-
-try:
-    gdf_parque_estadual = gpd.read_file('Projeto_PARNA_PESF/PARQUE_PESF_1_temp.shp')
-    gdf_parque_estadual = gdf_parque_estadual.to_crs(epsg=4326)
-    parque_estadual_geojson = 'parque_estadual_serra_furada.geojson'
-    gdf_parque_estadual.to_file(parque_estadual_geojson, driver='GeoJSON')
-except:
-    parque_estadual_geojson = None
-
-try:
-    gdf_cidades = gpd.read_file('Projeto_PARNA_PESF/Cidades_parna_sj_temp.shp')
-    gdf_cidades = gdf_cidades.to_crs(epsg=4326)
-    cidades_geojson = 'cidades_afetadas.geojson'
-    gdf_cidades.to_file(cidades_geojson, driver='GeoJSON')
-except:
-    cidades_geojson = None
-
-try:
-    gdf_estado = gpd.read_file('Organizacao Territorio/SC_UF_2024/SC_UF_2024.shp')
-    gdf_estado = gdf_estado.to_crs(epsg=4326)
-    estado_geojson = 'limite_santa_catarina.geojson'
-    gdf_estado.to_file(estado_geojson, driver='GeoJSON')
-except:
-    estado_geojson = None
+df = carregar_parcelas()
+
+# Camadas vetoriais em WGS84, de camadas_peld.gpkg (os arquivos .geojson são
+# exportados só por gerar_mapa_peld.py)
+camadas = {}
+for camada in ('pnsj', 'pesf', 'cidades', 'estado'):
+    try:
+        camadas[camada] = ler_camada(camada)
+    except Exception as e:
+        print(f"Erro ao carregar a camada {camada}: {e}")
 
 # Criar mapa base
 mapa = folium.Map(location=[df['lat'].mean(), df['long'].mean()], zoom_start=10, min_zoom=8, max_zoom=18)
@@ -56,12 +39,19 @@ folium.TileLayer(
 ).add_to(mapa)
 
 # Função para criar visualização simplificada de índice
+@medir('visualizacao_indice')
 def criar_visualizacao_indice(file_path, titulo, colormap='RdYlGn'):
     try:
-        with rasterio.open(file_path) as src:
+        # Blocos decodificados vêm do cache compartilhado (leitor_raster.py)
+        with abrir(file_path) as src:
             # Ler uma amostra dos dados (para performance)
-            data = src.read(1, out_shape=(src.height // 10, src.width // 10),
-                          resampling=rasterio.enums.Resampling.bilinear)
+            if src.overviews(1) or execucao_em_blocos.cabe_na_memoria(src.width * src.height, 4):
+                with medir('raster_read', 'raster', arquivo=file_path):
+                    data = src.read(1, out_shape=(src.height // 10, src.width // 10),
+                                    resampling=rasterio.enums.Resampling.bilinear)
+            else:
+                # Cena grande sem overviews: média 10 × 10 calculada em blocos
+                data, _ = execucao_em_blocos.ler_reduzido(file_path, 10)
 
             # Filtrar valores válidos
             if 'NDVI' in file_path:
@@ -72,13 +62,20 @@ def criar_visualizacao_indice(file_path, titulo, colormap='RdYlGn'):
                 mask = (data >= -1) & (data <= 1.5)
             else:
                 mask = data != src.nodata if src.nodata else np.ones_like(data, dtype=bool)
+            # NaN/inf não entram na faixa (o servidor de tiles recusa faixas não finitas)
+            mask &= np.isfinite(data)
+            if not mask.any():
+                print(f"Sem valores válidos em {file_path}")
+                return None, None, None
 
             data_masked = np.ma.masked_array(data, ~mask)
 
             # Criar figura matplotlib
             fig, ax = plt.subplots(figsize=(8, 6))
-            im = ax.imshow(data_masked, cmap=colormap, vmin=data_masked.min(), vmax=data_masked.max())
-            ax.set_title(f'{titulo}\nValores: {data_masked.min():.3f} a {data_masked.max():.3f}')
+            # A mesma faixa vale para a sobreposição no mapa (cores iguais para o mesmo valor)
+            faixa = (float(data_masked.min()), float(data_masked.max()))
+            im = ax.imshow(data_masked, cmap=colormap, vmin=faixa[0], vmax=faixa[1])
+            ax.set_title(f'{titulo}\nValores: {faixa[0]:.3f} a {faixa[1]:.3f}')
             ax.axis('off')
 
             # Adicionar colorbar
@@ -87,26 +84,20 @@ def criar_visualizacao_indice(file_path, titulo, colormap='RdYlGn'):
 
             # Converter para base64
             buffer = BytesIO()
-            plt.savefig(buffer, format='png', bbox_inches='tight', dpi=100)
+            with medir('savefig', 'render'):
+                plt.savefig(buffer, format='png', bbox_inches='tight', dpi=100)
             buffer.seek(0)
             image_base64 = base64.b64encode(buffer.read()).decode('utf-8')
             plt.close()
 
-            # Calcular bounds aproximados (WGS84)
-            bounds = src.bounds
-            # Conversão aproximada UTM 22S -> WGS84
-            left = -51.8 + (bounds.left - 400000) / 90000
-            right = -51.8 + (bounds.right - 400000) / 90000
-            bottom = -29.8 + (bounds.bottom - 6700000) / 90000
-            top = -29.8 + (bounds.top - 6700000) / 90000
-
-            image_bounds = [[bottom, left], [top, right]]
+            # Área do raster em WGS84 (bordas densificadas, transformação exata)
+            image_bounds = limites_wgs84(src)
 
-            return image_base64, image_bounds
+            return image_base64, image_bounds, faixa
 
     except Exception as e:
         print(f"Erro ao processar {file_path}: {e}")
-        return None, None
+        return None, None, None
 
 # Adicionar índices de vegetação como camadas
 indices = [
@@ -117,7 +108,7 @@ indices = [
 ]
 
 for file_path, titulo, colormap in indices:
-    image_b64, bounds = criar_visualizacao_indice(file_path, titulo, colormap)
+    image_b64, bounds, faixa = criar_visualizacao_indice(file_path, titulo, colormap)
     if image_b64 and bounds:
         # Criar HTML para a imagem
         image_html = f'<img src="data:image/png;base64,{image_b64}" style="max-width:100%; max-height:400px;">'
@@ -133,23 +124,24 @@ for file_path, titulo, colormap in indices:
             icon=folium.Icon(color='green', icon='leaf')
         ).add_to(mapa)
 
-# Adicionar camadas vetoriais
-if parque_nacional_geojson:
-    folium.GeoJson(parque_nacional_geojson, name='Parque Nacional de São Joaquim',
-                   style_function=lambda x: {'fillColor': 'green', 'color': 'darkgreen', 'weight': 3, 'fillOpacity': 0.1}).add_to(mapa)
-
-if parque_estadual_geojson:
-    folium.GeoJson(parque_estadual_geojson, name='Parque Estadual da Serra Furada',
-                   style_function=lambda x: {'fillColor': 'blue', 'color': 'darkblue', 'weight': 2, 'fillOpacity': 0.1}).add_to(mapa)
-
-if cidades_geojson:
-    folium.GeoJson(cidades_geojson, name='Cidades Afetadas pelo PARNA',
-                   style_function=lambda x: {'fillColor': 'orange', 'color': 'red', 'weight': 1, 'fillOpacity': 0.3},
-                   tooltip=folium.GeoJsonTooltip(fields=['NM_MUN', 'AREA_KM2'], aliases=['Cidade:', 'Área (km²):'])).add_to(mapa)
-
-if estado_geojson:
-    folium.GeoJson(estado_geojson, name='Limite Estadual de Santa Catarina',
-                   style_function=lambda x: {'fillColor': 'none', 'color': 'black', 'weight': 4, 'fillOpacity': 0}).add_to(mapa)
+        # O índice sobre o mapa, reprojetado uma vez para Web Mercator (cache em
+        # disco), com as cores da imagem do popup
+        try:
+            camada_sobreposicao(file_path, f'{titulo} - sobreposição', colormap,
+                                vmin=faixa[0], vmax=faixa[1]).add_to(mapa)
+        except Exception as e:
+            print(f"Erro ao criar a sobreposição de {file_path}: {e}")
+
+    # Em desenvolvimento (PELD_SERVIDOR_TILES definido), o índice em resolução
+    # cheia vem do servidor local de tiles
+    vmin, vmax = faixa or (None, None)
+    camada_tiles = camada_servidor(file_path, titulo, colormap, vmin=vmin, vmax=vmax)
+    if camada_tiles:
+        camada_tiles.add_to(mapa)
+
+# Adicionar camadas vetoriais: vector tiles (gerar_vector_tiles.py) ou, sem a
+# pirâmide, GeoJSON embutido
+adicionar_camadas(mapa, ['pnsj', 'pesf', 'cidades', 'estado'], camadas)
 
 # Adicionar marcadores das parcelas
 terrestre_group = folium.FeatureGroup(name='Parcelas Terrestres', show=True)
@@ -160,8 +152,8 @@ for idx, row in df.iterrows():
     <b>Módulo:</b> {row['module']}<br>
     <b>Nome:</b> {row['name']}<br>
     <b>Tipo:</b> {row['type']}<br>
-    <b>Latitude:</b> {row['lat']}<br>
-    <b>Longitude:</b> {row['long']}
+    <b>Latitude:</b> {row['lat']:.6f}<br>
+    <b>Longitude:</b> {row['long']:.6f}
     """
     marker = folium.Marker(
         location=[row['lat'], row['long']],
@@ -188,6 +180,7 @@ title_html = '''
 '''
 mapa.get_root().html.add_child(folium.Element(title_html))
 
-mapa.save('mapa_indices_vegetacao.html')
+with medir('folium_save', 'render', arquivo='mapa_indices_vegetacao.html'):
+    mapa.save('mapa_indices_vegetacao.html')
 print("Mapa com índices de vegetação criado: mapa_indices_vegetacao.html")
 print("Clique nos marcadores verdes para visualizar os índices NDVI, EVI, SAVI e ARVI")
\ No newline at end of file
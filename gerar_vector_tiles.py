@@ -0,0 +1,636 @@
+"""
+Vector tiles (Mapbox Vector Tiles) das camadas de limites e contornos
+
+Os mapas embutiam cada camada inteira como GeoJSON no HTML: o limite
+estadual, os municípios e as curvas de nível pesam mais quanto maior a área.
+Aqui as camadas de camadas_peld.gpkg são cortadas numa pirâmide de tiles MVT
+(EPSG:3857, extensão 4096), simplificadas a cada zoom na resolução de meio
+pixel de tela, e gravadas numa árvore vector_tiles/{z}/{x}/{y}.pbf (servida
+como arquivos estáticos) e, opcionalmente, num único arquivo MBTiles. Os
+mapas carregam só os tiles visíveis, então o peso da página não depende mais
+da extensão dos dados.
+
+Os tiles de cada zoom são gerados em paralelo, em processos separados.
+vector_tiles/metadata.json descreve as camadas e seus zooms (TileJSON).
+
+Aberta direto do disco (file://), uma página não consegue baixar os .pbf.
+Por isso vector_tiles/camadas.js traz as mesmas camadas em GeoJSON
+simplificado: só nesse caso a página carrega esse arquivo (por <script>, o
+que o navegador permite no disco) e corta os tiles no próprio navegador.
+Servida por HTTP, ela continua baixando só os tiles visíveis.
+
+Uso:
+    python gerar_vector_tiles.py
+    python gerar_vector_tiles.py --mbtiles camadas_peld.mbtiles
+    python gerar_vector_tiles.py --trabalhadores 4
+"""
+
+import argparse
+import gzip
+import json
+import math
+import os
+import shutil
+import sqlite3
+import struct
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import shapely
+from shapely import STRtree
+
+from instrumentacao import medir, iniciar
+
+PASTA_TILES = 'vector_tiles'
+EPSG_TILES = 3857
+EXTENSAO = 4096
+# Tiles vizinhos se sobrepõem um pouco, para as bordas não aparecerem no traço
+BUFFER = 64
+# Tolerância de simplificação, em pixels de um tile de 256 px
+TOLERANCIA_PIXELS = 0.5
+# Tiles por tarefa enviada aos processos
+TILES_POR_TAREFA = 64
+# Camadas em GeoJSON para páginas abertas do disco (file://)
+ARQUIVO_LOCAL = 'camadas.js'
+
+# Metade da circunferência do Web Mercator (metros)
+ORIGEM = math.pi * 6378137
+
+# Zoom mínimo e máximo de cada camada: o limite estadual não precisa de
+# detalhe acima de 10 (é ampliado no navegador); as curvas só aparecem de perto
+ZOOMS = {
+    'estado': (4, 10),
+    'cidades': (7, 14),
+    'pnsj': (6, 14),
+    'pesf': (6, 14),
+    'contornos': (10, 14),
+}
+
+# Camadas já simplificadas por zoom e seus índices espaciais, nos processos de geração
+_camadas = None
+_arvores = {}
+
+
+def limites_tile(z, x, y):
+    """
+    (minx, miny, maxx, maxy) do tile em EPSG:3857
+    """
+    lado = 2 * ORIGEM / 2 ** z
+    return (-ORIGEM + x * lado, ORIGEM - (y + 1) * lado,
+            -ORIGEM + (x + 1) * lado, ORIGEM - y * lado)
+
+
+def tiles_cobrindo(limites, z):
+    """
+    Tiles (x, y) do zoom z que cobrem o retângulo em EPSG:3857
+    """
+    n = 2 ** z
+    lado = 2 * ORIGEM / n
+    minx, miny, maxx, maxy = limites
+    x0 = max(int((minx + ORIGEM) // lado), 0)
+    x1 = min(int((maxx + ORIGEM) // lado), n - 1)
+    y0 = max(int((ORIGEM - maxy) // lado), 0)
+    y1 = min(int((ORIGEM - miny) // lado), n - 1)
+    return [(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+
+# --- Codificação protobuf do MVT (especificação 2.1) ---
+
+def _varint(valor, saida):
+    while valor > 0x7F:
+        saida.append((valor & 0x7F) | 0x80)
+        valor >>= 7
+    saida.append(valor)
+
+
+def _zigzag(valor):
+    return (valor << 1) if valor >= 0 else (-valor << 1) - 1
+
+
+def _campo_varint(numero, valor, saida):
+    _varint(numero << 3, saida)
+    _varint(valor, saida)
+
+
+def _campo_bytes(numero, dados, saida):
+    _varint((numero << 3) | 2, saida)
+    _varint(len(dados), saida)
+    saida += dados
+
+
+def _empacotados(numero, valores, saida):
+    dados = bytearray()
+    for valor in valores:
+        _varint(valor, dados)
+    _campo_bytes(numero, dados, saida)
+
+
+def _valor(valor):
+    """
+    Mensagem Value do MVT; None para tipos sem representação
+    """
+    saida = bytearray()
+    if isinstance(valor, (bool, np.bool_)):
+        _campo_varint(7, int(valor), saida)
+    elif isinstance(valor, (int, np.integer)):
+        _campo_varint(6, _zigzag(int(valor)), saida)
+    elif isinstance(valor, (float, np.floating)):
+        if not math.isfinite(valor):
+            return None
+        _varint((3 << 3) | 1, saida)
+        saida += struct.pack('<d', float(valor))
+    elif isinstance(valor, str):
+        _campo_bytes(1, valor.encode('utf-8'), saida)
+    else:
+        return None
+    return bytes(saida)
+
+
+def _comando(id_comando, contagem):
+    return (id_comando & 0x7) | (contagem << 3)
+
+
+def _quantizar(coords, limites):
+    """
+    Coordenadas EPSG:3857 -> inteiros do tile (y para baixo), sem pontos repetidos
+    """
+    minx, _, maxx, maxy = limites
+    escala = EXTENSAO / (maxx - minx)
+    pontos = np.empty((len(coords), 2), dtype=np.int64)
+    pontos[:, 0] = np.round((coords[:, 0] - minx) * escala)
+    pontos[:, 1] = np.round((maxy - coords[:, 1]) * escala)
+    if len(pontos) > 1:
+        manter = np.ones(len(pontos), dtype=bool)
+        manter[1:] = np.any(pontos[1:] != pontos[:-1], axis=1)
+        pontos = pontos[manter]
+    return pontos
+
+
+def _area(anel):
+    x, y = anel[:, 0], anel[:, 1]
+    return 0.5 * float(np.sum(x * np.roll(y, -1) - np.roll(x, -1) * y))
+
+
+class _Geometria:
+    """
+    Sequência de comandos de uma feição, com o cursor relativo entre as partes
+    """
+
+    def __init__(self):
+        self.comandos = []
+        self.cursor = (0, 0)
+
+    def _pontos(self, pontos):
+        cx, cy = self.cursor
+        for x, y in pontos.tolist():
+            self.comandos += (_zigzag(x - cx), _zigzag(y - cy))
+            cx, cy = x, y
+        self.cursor = (cx, cy)
+
+    def linha(self, pontos):
+        if len(pontos) < 2:
+            return
+        self.comandos.append(_comando(1, 1))
+        self._pontos(pontos[:1])
+        self.comandos.append(_comando(2, len(pontos) - 1))
+        self._pontos(pontos[1:])
+
+    def anel(self, pontos):
+        self.comandos.append(_comando(1, 1))
+        self._pontos(pontos[:1])
+        self.comandos.append(_comando(2, len(pontos) - 1))
+        self._pontos(pontos[1:])
+        self.comandos.append(_comando(7, 1))
+
+
+def _anel_tile(anel, limites, externo):
+    """
+    Anel quantizado, aberto e orientado (externo com área positiva); None se degenerado
+    """
+    pontos = _quantizar(np.asarray(anel.coords), limites)
+    if len(pontos) > 1 and np.array_equal(pontos[0], pontos[-1]):
+        pontos = pontos[:-1]
+    if len(pontos) < 3:
+        return None
+    area = _area(pontos)
+    if area == 0:
+        return None
+    if (area > 0) != externo:
+        pontos = pontos[::-1]
+    return pontos
+
+
+def codificar_geometria(geom, limites):
+    """
+    (tipo MVT, comandos) da geometria recortada; None se nada sobrar no tile
+    """
+    geometria = _Geometria()
+    tipo = None
+    for parte in shapely.get_parts(geom):
+        # Uma feição MVT tem um só tipo; sobras de outro tipo do recorte são descartadas
+        if isinstance(parte, shapely.Polygon) and tipo != 2:
+            externo = _anel_tile(parte.exterior, limites, True)
+            if externo is None:
+                continue
+            tipo = 3
+            geometria.anel(externo)
+            for interior in parte.interiors:
+                buraco = _anel_tile(interior, limites, False)
+                if buraco is not None:
+                    geometria.anel(buraco)
+        elif isinstance(parte, shapely.LineString) and tipo != 3:
+            pontos = _quantizar(np.asarray(parte.coords), limites)
+            if len(pontos) >= 2:
+                tipo = 2
+                geometria.linha(pontos)
+    if tipo is None:
+        return None
+    return tipo, geometria.comandos
+
+
+def codificar_camada(nome, feicoes, limites):
+    """
+    Mensagem Layer do MVT; feicoes: [(geometria, propriedades)]
+    """
+    chaves, valores = {}, {}
+    corpo = bytearray()
+    for geom, propriedades in feicoes:
+        codificada = codificar_geometria(geom, limites)
+        if codificada is None:
+            continue
+        tipo, comandos = codificada
+        tags = []
+        for chave, valor in propriedades.items():
+            mensagem = _valor(valor)
+            if mensagem is None:
+                continue
+            tags += (chaves.setdefault(chave, len(chaves)), valores.setdefault(mensagem, len(valores)))
+        feicao = bytearray()
+        if tags:
+            _empacotados(2, tags, feicao)
+        _campo_varint(3, tipo, feicao)
+        _empacotados(4, comandos, feicao)
+        _campo_bytes(2, feicao, corpo)
+    if not corpo:
+        return None
+
+    camada = bytearray()
+    _campo_varint(15, 2, camada)
+    _campo_bytes(1, nome.encode('utf-8'), camada)
+    camada += corpo
+    for chave in chaves:
+        _campo_bytes(3, chave.encode('utf-8'), camada)
+    for mensagem in valores:
+        _campo_bytes(4, mensagem, camada)
+    _campo_varint(5, EXTENSAO, camada)
+    return camada
+
+
+# --- Geração ---
+
+def preparar_camadas(nomes, zoom_min, zoom_max):
+    """
+    {z: {camada: (geometrias simplificadas, propriedades)}} em EPSG:3857
+    """
+    from camadas_vetoriais import ler_camada
+
+    preparadas = {z: {} for z in range(zoom_min, zoom_max + 1)}
+    for nome in nomes:
+        try:
+            gdf = ler_camada(nome)
+        except Exception as e:
+            print(f"   ⚠️  {nome}: camada indisponível ({e})")
+            continue
+        with medir('to_crs', 'vetor', camada=nome, epsg=EPSG_TILES):
+            gdf = gdf.to_crs(epsg=EPSG_TILES)
+        geometrias = gdf.geometry.values
+        # Sem colunas de atributos, to_dict('records') vem vazio
+        propriedades = gdf.drop(columns=gdf.geometry.name).to_dict('records') or [{}] * len(gdf)
+        z0, z1 = ZOOMS.get(nome, (zoom_min, zoom_max))
+        for z in range(max(z0, zoom_min), min(z1, zoom_max) + 1):
+            tolerancia = 2 * ORIGEM / 2 ** z / 256 * TOLERANCIA_PIXELS
+            with medir('simplificar', 'vetor', camada=nome, zoom=z):
+                simplificadas = shapely.simplify(np.asarray(geometrias), tolerancia, preserve_topology=True)
+            validas = ~shapely.is_empty(simplificadas)
+            simplificadas = simplificadas[validas]
+            props = [p for p, v in zip(propriedades, validas) if v]
+            preparadas[z][nome] = (simplificadas, props)
+    return preparadas
+
+
+def _iniciar_processo(camadas):
+    global _camadas
+    _camadas = camadas
+    _arvores.clear()
+
+
+def _arvore(z, nome, geometrias):
+    # A STRtree não sobrevive à serialização entre processos: é montada em cada um
+    if (z, nome) not in _arvores:
+        _arvores[(z, nome)] = STRtree(geometrias)
+    return _arvores[(z, nome)]
+
+
+def gerar_tiles(z, coordenadas):
+    """
+    [(z, x, y, bytes MVT)] dos tiles com conteúdo
+    """
+    gerados = []
+    for x, y in coordenadas:
+        limites = limites_tile(z, x, y)
+        margem = (limites[2] - limites[0]) * BUFFER / EXTENSAO
+        recorte = (limites[0] - margem, limites[1] - margem, limites[2] + margem, limites[3] + margem)
+        tile = bytearray()
+        for nome, (geometrias, propriedades) in _camadas[z].items():
+            feicoes = []
+            for i in _arvore(z, nome, geometrias).query(shapely.box(*recorte)):
+                cortada = shapely.clip_by_rect(geometrias[i], *recorte)
+                if not cortada.is_empty:
+                    feicoes.append((cortada, propriedades[i]))
+            camada = codificar_camada(nome, feicoes, limites) if feicoes else None
+            if camada:
+                _campo_bytes(3, camada, tile)
+        if tile:
+            gerados.append((z, x, y, bytes(tile)))
+    return gerados
+
+
+def tiles_do_zoom(camadas_z, z):
+    """
+    Tiles candidatos do zoom: os que cobrem o retângulo de alguma feição
+    """
+    candidatos = set()
+    for geometrias, _ in camadas_z.values():
+        for limites in shapely.bounds(geometrias):
+            candidatos.update(tiles_cobrindo(limites, z))
+    return sorted(candidatos)
+
+
+class Destino:
+    """
+    Grava os tiles na árvore {z}/{x}/{y}.pbf e, opcionalmente, num MBTiles
+    """
+
+    def __init__(self, pasta=PASTA_TILES, mbtiles=None):
+        self.pasta = pasta
+        if os.path.isdir(pasta):
+            shutil.rmtree(pasta)
+        os.makedirs(pasta)
+        self.con = None
+        if mbtiles:
+            if os.path.exists(mbtiles):
+                os.remove(mbtiles)
+            self.con = sqlite3.connect(mbtiles)
+            self.con.executescript("""
+                CREATE TABLE metadata (name TEXT, value TEXT);
+                CREATE TABLE tiles (zoom_level INTEGER, tile_column INTEGER,
+                                    tile_row INTEGER, tile_data BLOB);
+                CREATE UNIQUE INDEX tile_index ON tiles (zoom_level, tile_column, tile_row);
+            """)
+        self.total = 0
+        self.bytes = 0
+
+    def gravar(self, z, x, y, dados):
+        pasta = os.path.join(self.pasta, str(z), str(x))
+        os.makedirs(pasta, exist_ok=True)
+        with open(os.path.join(pasta, f"{y}.pbf"), 'wb') as f:
+            f.write(dados)
+        if self.con is not None:
+            # MBTiles: linhas em TMS (origem embaixo) e tiles comprimidos com gzip
+            self.con.execute("INSERT INTO tiles VALUES (?, ?, ?, ?)",
+                             (z, x, 2 ** z - 1 - y, gzip.compress(dados, compresslevel=6)))
+        self.total += 1
+        self.bytes += len(dados)
+
+    def fechar(self, metadados):
+        with open(os.path.join(self.pasta, 'metadata.json'), 'w', encoding='utf-8') as f:
+            json.dump(metadados, f, indent=2, ensure_ascii=False)
+        if self.con is not None:
+            linhas = {
+                'name': metadados['name'], 'format': 'pbf', 'type': 'overlay',
+                'minzoom': metadados['minzoom'], 'maxzoom': metadados['maxzoom'],
+                'bounds': ','.join(f"{v:.6f}" for v in metadados['bounds']),
+                'json': json.dumps({'vector_layers': metadados['vector_layers']}),
+            }
+            self.con.executemany("INSERT INTO metadata VALUES (?, ?)",
+                                 [(k, str(v)) for k, v in linhas.items()])
+            self.con.commit()
+            self.con.close()
+
+
+def construir(pasta=PASTA_TILES, mbtiles=None, nomes=None, trabalhadores=None):
+    """
+    Gera a pirâmide de todas as camadas; retorna os metadados (TileJSON)
+    """
+    from camadas_vetoriais import FONTES
+
+    nomes = nomes or list(FONTES)
+    zoom_min = min(ZOOMS.get(n, (0, 0))[0] for n in nomes)
+    zoom_max = max(ZOOMS.get(n, (0, 0))[1] for n in nomes)
+    preparadas = preparar_camadas(nomes, zoom_min, zoom_max)
+
+    destino = Destino(pasta, mbtiles)
+    camadas_geradas = {}
+    limites_geral = None
+    with ProcessPoolExecutor(max_workers=trabalhadores or os.cpu_count(),
+                             initializer=_iniciar_processo, initargs=(preparadas,)) as executor:
+        for z in range(zoom_min, zoom_max + 1):
+            if not preparadas[z]:
+                continue
+            candidatos = tiles_do_zoom(preparadas[z], z)
+            blocos = [candidatos[i:i + TILES_POR_TAREFA] for i in range(0, len(candidatos), TILES_POR_TAREFA)]
+            antes = destino.total
+            with medir('vector_tiles_zoom', 'vetor', zoom=z, candidatos=len(candidatos)):
+                for gerados in executor.map(gerar_tiles, [z] * len(blocos), blocos):
+                    for tile in gerados:
+                        destino.gravar(*tile)
+            print(f"   ✅ z{z}: {destino.total - antes:,} tiles ({len(candidatos):,} candidatos)")
+            for nome, (geometrias, _) in preparadas[z].items():
+                z0, z1 = camadas_geradas.get(nome, (z, z))
+                camadas_geradas[nome] = (min(z0, z), max(z1, z))
+                minx, miny, maxx, maxy = shapely.total_bounds(geometrias)
+                if limites_geral is None:
+                    limites_geral = [minx, miny, maxx, maxy]
+                limites_geral = [min(limites_geral[0], minx), min(limites_geral[1], miny),
+                                 max(limites_geral[2], maxx), max(limites_geral[3], maxy)]
+
+    # Limites em graus (inversa do Web Mercator)
+    bounds = [-180, -85.0511, 180, 85.0511]
+    if limites_geral is not None:
+        def _graus(x, y):
+            return (math.degrees(x / 6378137),
+                    math.degrees(2 * math.atan(math.exp(y / 6378137)) - math.pi / 2))
+        bounds = [*_graus(limites_geral[0], limites_geral[1]), *_graus(limites_geral[2], limites_geral[3])]
+
+    metadados = {
+        'tilejson': '3.0.0',
+        'name': 'camadas_peld',
+        'tiles': ['{z}/{x}/{y}.pbf'],
+        'minzoom': min((v[0] for v in camadas_geradas.values()), default=zoom_min),
+        'maxzoom': max((v[1] for v in camadas_geradas.values()), default=zoom_max),
+        'bounds': bounds,
+        'vector_layers': [{'id': nome, 'minzoom': z0, 'maxzoom': z1}
+                          for nome, (z0, z1) in camadas_geradas.items()],
+        'total_tiles': destino.total,
+        'total_bytes': destino.bytes,
+    }
+    destino.fechar(metadados)
+    gravar_camadas_locais(list(camadas_geradas), pasta)
+    return metadados
+
+
+def gravar_camadas_locais(nomes, pasta=PASTA_TILES):
+    """
+    Grava pasta/camadas.js: as camadas em GeoJSON (WGS84), simplificadas no
+    zoom máximo de cada uma, para as páginas abertas do disco
+    """
+    from camadas_vetoriais import ler_camada
+
+    camadas = {}
+    for nome in nomes:
+        gdf = ler_camada(nome)
+        # Meio pixel de tela no zoom máximo da camada, em graus
+        tolerancia = 360 / 2 ** ZOOMS.get(nome, (0, 14))[1] / 256 * TOLERANCIA_PIXELS
+        with medir('simplificar', 'vetor', camada=nome, destino=ARQUIVO_LOCAL):
+            gdf = gdf.set_geometry(gdf.geometry.simplify(tolerancia, preserve_topology=True))
+        camadas[nome] = json.loads(gdf.to_json(drop_id=True))
+    caminho = os.path.join(pasta, ARQUIVO_LOCAL)
+    with open(caminho, 'w', encoding='utf-8') as f:
+        f.write('window.PELD_CAMADAS = ' + json.dumps(camadas, separators=(',', ':')) + ';\n')
+    return caminho
+
+
+def camadas_disponiveis(pasta=PASTA_TILES):
+    """
+    {camada: (zoom mínimo, zoom máximo)} da pirâmide gerada; vazio se não houver tiles
+    """
+    caminho = os.path.join(pasta, 'metadata.json')
+    if not os.path.exists(caminho):
+        return {}
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return {c['id']: (c['minzoom'], c['maxzoom']) for c in json.load(f)['vector_layers']}
+
+
+# Camadas dos mapas: nome -> (rótulo, estilo Leaflet, opções de camada_vector_tiles).
+# O estilo vale tanto para os tiles quanto para o GeoJSON embutido.
+CAMADAS_MAPA = {
+    'estado': ('Limite Estadual de Santa Catarina',
+               {'fill': False, 'color': 'black', 'weight': 4}, {}),
+    'cidades': ('Cidades Afetadas pelo PARNA',
+                {'fill': True, 'fillColor': 'orange', 'color': 'red', 'weight': 1, 'fillOpacity': 0.3},
+                {'popup_campos': [('NM_MUN', 'Cidade:'), ('AREA_KM2', 'Área (km²):')]}),
+    'pesf': ('Parque Estadual da Serra Furada',
+             {'fill': True, 'fillColor': 'blue', 'color': 'darkblue', 'weight': 2, 'fillOpacity': 0.1}, {}),
+    'pnsj': ('Parque Nacional de São Joaquim',
+             {'fill': True, 'fillColor': 'green', 'color': 'darkgreen', 'weight': 3, 'fillOpacity': 0.1}, {}),
+    'contornos': ('Curvas de Nível',
+                  {'color': 'saddlebrown', 'weight': 1, 'opacity': 0.6}, {'show': False}),
+}
+
+# Página aberta do disco: troca os .pbf pelas camadas de camadas.js, cortadas
+# em tiles no navegador (Leaflet.VectorGrid.slicer, mesmas opções e estilos)
+SCRIPT_ARQUIVO_LOCAL = """
+<script>
+if (location.protocol === 'file:') {
+    document.write('<script src="%(arquivo)s"><\\/script>');
+    L.vectorGrid.protobuf = function (url, opcoes) {
+        var estilos = opcoes.vectorTileLayerStyles;
+        var nome = Object.keys(estilos).filter(function (c) { return !Array.isArray(estilos[c]); })[0];
+        var dados = (window.PELD_CAMADAS || {})[nome] || {type: 'FeatureCollection', features: []};
+        return L.vectorGrid.slicer(dados, L.extend({}, opcoes, {vectorTileLayerName: nome}));
+    };
+}
+</script>
+"""
+
+
+def adicionar_camadas(mapa, nomes, geodataframes=None, estilos=None, pasta=PASTA_TILES):
+    """
+    Adiciona ao mapa as camadas de CAMADAS_MAPA: vector tiles quando a pirâmide
+    existe, senão o GeoJSON embutido de geodataframes ({nome: GeoDataFrame em WGS84})
+
+    estilos: {nome: opções} que substituem as do estilo padrão da camada.
+    """
+    import folium
+
+    disponiveis = camadas_disponiveis(pasta)
+    if disponiveis:
+        script = SCRIPT_ARQUIVO_LOCAL % {'arquivo': f"{pasta}/{ARQUIVO_LOCAL}"}
+        mapa.get_root().html.add_child(folium.Element(script))
+
+    for nome in nomes:
+        rotulo, estilo, opcoes = CAMADAS_MAPA[nome]
+        estilo = {**estilo, **(estilos or {}).get(nome, {})}
+        if nome in disponiveis:
+            camada_vector_tiles(nome, rotulo, estilo, pasta=pasta, **opcoes).add_to(mapa)
+        elif geodataframes and nome in geodataframes:
+            campos = opcoes.get('popup_campos')
+            folium.GeoJson(
+                geodataframes[nome].__geo_interface__, name=rotulo, show=opcoes.get('show', True),
+                style_function=lambda x, estilo=estilo: estilo,
+                tooltip=folium.GeoJsonTooltip(fields=[c for c, _ in campos],
+                                              aliases=[r for _, r in campos]) if campos else None,
+            ).add_to(mapa)
+
+
+def camada_vector_tiles(nome_camada, rotulo, estilo, show=True, popup_campos=None, pasta=PASTA_TILES):
+    """
+    Camada folium (Leaflet.VectorGrid) que mostra só 'nome_camada' da pirâmide
+
+    Os tiles trazem todas as camadas; as demais recebem estilo vazio (ocultas).
+    Acima do zoom máximo da camada, os tiles do último zoom são ampliados.
+    popup_campos: [(propriedade, rótulo)] mostrados ao clicar numa feição.
+    """
+    from folium import MacroElement
+    from folium.plugins import VectorGridProtobuf
+    from folium.template import Template
+
+    disponiveis = camadas_disponiveis(pasta)
+    z0, z1 = disponiveis[nome_camada]
+    estilos = ', '.join(f"{json.dumps(c)}: []" for c in disponiveis if c != nome_camada)
+    opcoes = f"""{{
+        "minNativeZoom": {z0}, "maxNativeZoom": {z1}, "interactive": {json.dumps(bool(popup_campos))},
+        "vectorTileLayerStyles": {{{json.dumps(nome_camada)}: {json.dumps(estilo)}{', ' + estilos if estilos else ''}}}
+    }}"""
+    camada = VectorGridProtobuf(f"{pasta}/{{z}}/{{x}}/{{y}}.pbf", rotulo, opcoes, show=show)
+
+    if popup_campos:
+        linhas = ' + '.join(f"'<b>{r}</b> ' + (p[{json.dumps(c)}] ?? '') + '<br>'" for c, r in popup_campos)
+        popup = MacroElement()
+        popup._template = Template("""
+            {% macro script(this, kwargs) %}
+            {{ this._parent.get_name() }}.on('click', function (e) {
+                var p = e.layer.properties;
+                L.popup().setLatLng(e.latlng).setContent(""" + linhas + """)
+                    .openOn({{ this._parent._parent.get_name() }});
+            });
+            {% endmacro %}
+        """)
+        camada.add_child(popup)
+    return camada
+
+
+def main():
+    from camadas_vetoriais import FONTES
+
+    parser = argparse.ArgumentParser(description="Gera vector tiles (MVT) das camadas vetoriais")
+    parser.add_argument('--saida', default=PASTA_TILES, help="pasta da árvore {z}/{x}/{y}.pbf")
+    parser.add_argument('--mbtiles', help="grava também um arquivo MBTiles")
+    parser.add_argument('--camadas', nargs='+', choices=list(FONTES), help="só estas camadas")
+    parser.add_argument('--trabalhadores', type=int, help="processos paralelos (padrão: nº de CPUs)")
+    args = parser.parse_args()
+
+    print("\n" + "="*70)
+    print("   VECTOR TILES DAS CAMADAS VETORIAIS")
+    print("="*70 + "\n")
+
+    metadados = construir(args.saida, args.mbtiles, args.camadas, args.trabalhadores)
+    print(f"\n🧩 {metadados['total_tiles']:,} tiles ({metadados['total_bytes'] / 1024:.0f} KB) "
+          f"em: {args.saida}/")
+    if args.mbtiles:
+        print(f"📦 MBTiles: {args.mbtiles}")
+
+
+if __name__ == "__main__":
+    iniciar(__file__)
+    main()
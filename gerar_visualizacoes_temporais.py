@@ -1,25 +1,59 @@
 """
 Script para criar 3 visualizações de comparação temporal de índices de vegetação
 Opção 1: Slider Temporal
-Opção 2: Animação Automática  
-Opção 3: Comparação Lado a Lado
+Opção 2: Comparação Lado a Lado
+Opção 3: Gráficos de Série Temporal
 
-Para demonstração, vamos simular dados de múltiplos períodos baseados na imagem atual
+Os mapas são gerados a partir de registros período × parque × índice lidos do
+armazém de estatísticas (armazem_estatisticas.py). Enquanto o armazém não tiver
+ao menos dois períodos, é usada uma série simulada a partir da imagem atual.
 """
 
 import folium
 from folium import plugins
-import pandas as pd
+from branca.element import MacroElement
+import jinja2
 import json
-import base64
-from datetime import datetime, timedelta
+import os
+import random
+import re
+from string import Template
 
-# Coordenadas dos parques
-pn_coords = {'lat': -28.167, 'lon': -49.583}  # Parque Nacional São Joaquim
-pe_coords = {'lat': -28.083, 'lon': -49.483}  # Parque Estadual Serra Furada
+import armazem_estatisticas as armazem
+from instrumentacao import medir, iniciar
+import trabalhos_render
 
-# Simular dados de 5 períodos (2020-2024)
-periodos = [
+# Parques conhecidos: posição do marcador e estilo
+PARQUES = {
+    'PNSJ': {
+        'nome': 'Parque Nacional São Joaquim',
+        'coords': {'lat': -28.167, 'lon': -49.583},
+        'cor': 'green',
+        'cor_titulo': '#2c5f2d',
+        'cor_fundo': '#e8f5e9',
+        'emoji': '🏔️',
+    },
+    'PESF': {
+        'nome': 'Parque Estadual Serra Furada',
+        'coords': {'lat': -28.083, 'lon': -49.483},
+        'cor': 'blue',
+        'cor_titulo': '#1565c0',
+        'cor_fundo': '#e3f2fd',
+        'emoji': '🏞️',
+    },
+}
+
+# Ordem de exibição dos índices; índices desconhecidos vão para o fim
+ORDEM_INDICES = ['NDVI', 'EVI', 'SAVI', 'ARVI']
+
+# Índices exibidos como barras no gráfico de série temporal
+INDICES_SERIE = ['NDVI', 'EVI']
+
+# Pasta dos arquivos JSON por período do slider com carregamento sob demanda
+PASTA_SIDECAR = 'dados_temporais'
+
+# Períodos da série simulada (2020-2024)
+periodos_simulados = [
     {'ano': 2020, 'data': '2020-07-15', 'estacao': 'Inverno'},
     {'ano': 2021, 'data': '2021-07-15', 'estacao': 'Inverno'},
     {'ano': 2022, 'data': '2022-07-15', 'estacao': 'Inverno'},
@@ -46,10 +80,7 @@ def gerar_indices_simulados(ano_base, parque):
         base_evi_2025 = 1.390   # Real
         base_savi = 0.480       # Estimado proporcional
         base_arvi = 0.430       # Estimado proporcional
-    
-    # Calcular anos desde 2025 (ano base com dados reais)
-    anos_desde_2025 = ano_base - 2025
-    
+
     # Padrões climáticos reais de SC:
     # 2020: Seco (-0.035), 2021: Normal (-0.010), 2022: La Niña seca (-0.045)
     # 2023: Transição (-0.015), 2024: El Niño úmido (+0.025), 2025: Base (0.0)
@@ -61,15 +92,14 @@ def gerar_indices_simulados(ano_base, parque):
         2024: +0.025,
         2025: 0.000
     }
-    
+
     # Simular variação natural
-    import random
     random.seed(ano_base * 100 + (1 if parque == 'PNSJ' else 2))
     variacao_natural = random.uniform(-0.015, 0.015)
-    
+
     # Anomalia climática do ano
     anomalia = anomalias_climaticas.get(ano_base, 0.0)
-    
+
     # Aplicar variações aos valores de 2025
     return {
         'NDVI': round(base_ndvi_2025 + anomalia + variacao_natural, 3),
@@ -78,198 +108,330 @@ def gerar_indices_simulados(ano_base, parque):
         'ARVI': round(base_arvi + anomalia + variacao_natural, 3),
     }
 
-# Gerar dados para todos os períodos
-dados_temporais = []
-for periodo in periodos:
-    dados_temporais.append({
-        'ano': periodo['ano'],
-        'data': periodo['data'],
-        'estacao': periodo['estacao'],
-        'PNSJ': gerar_indices_simulados(periodo['ano'], 'PNSJ'),
-        'PESF': gerar_indices_simulados(periodo['ano'], 'PESF'),
-    })
-
-print("\n" + "="*70)
-print("   GERADOR DE VISUALIZAÇÕES TEMPORAIS - PELD SC")
-print("="*70)
-print("\n📊 Dados simulados para 5 períodos (2020-2024)")
-print("🏞️  Parques: PNSJ e PESF")
-print("📈 Índices: NDVI, EVI, SAVI, ARVI\n")
+# ============================================================================
+# FONTE DOS DADOS: REGISTROS PERÍODO × PARQUE × ÍNDICE
+# ============================================================================
+
+def registros_simulados():
+    """
+    Série simulada no mesmo formato dos registros do armazém
+    """
+    registros = []
+    for periodo in periodos_simulados:
+        for parque in PARQUES:
+            for indice, valor in gerar_indices_simulados(periodo['ano'], parque).items():
+                registros.append({
+                    'periodo': periodo['data'],
+                    'zona': parque,
+                    'indice': indice,
+                    'valor': valor,
+                })
+    return registros
+
+
+def registros_do_armazem(caminho=armazem.ARQUIVO_ARMAZEM):
+    """
+    Lê as médias por (data, zona, índice) do armazém de estatísticas
+    """
+    if not os.path.exists(caminho):
+        return []
+    con = armazem.conectar(caminho)
+    linhas = armazem.consultar(con)
+    con.close()
+    return [{
+        'periodo': linha['data_aquisicao'],
+        'zona': linha['zona'],
+        'indice': linha['indice'],
+        'valor': round(linha['media'], 3),
+    } for linha in linhas]
+
+
+@medir('carregar_registros', 'dados')
+def carregar_registros(fonte='auto'):
+    """
+    Retorna (registros, simulado). Com fonte='auto', usa o armazém quando ele
+    já cobre ao menos duas aquisições reais, cada uma com todos os índices
+    presentes no armazém; caso contrário, a série simulada.
+    """
+    if fonte in ('auto', 'armazem'):
+        registros = registros_do_armazem()
+        if fonte == 'armazem' or len(periodos_completos(registros)) >= 2:
+            return registros, False
+    return registros_simulados(), True
+
+
+def periodos_completos(registros):
+    """
+    Períodos do armazém que têm o mesmo conjunto de índices (o de todos os registros)
+
+    Um NDVI de uma data e um EVI de outra não formam uma série de dois períodos.
+    """
+    indices = {r['indice'] for r in registros}
+    por_periodo = {}
+    for r in registros:
+        por_periodo.setdefault(r['periodo'], set()).add(r['indice'])
+    return sorted(p for p, presentes in por_periodo.items() if presentes == indices)
+
+
+def organizar_serie(registros, simulado=False):
+    """
+    Organiza os registros numa única passada, para os três produtos
+
+    valores[zona][periodo][indice] = valor
+    """
+    valores = {}
+    periodos, indices = set(), set()
+    for r in registros:
+        if r['zona'] not in PARQUES:
+            print(f"   ⚠️  Zona sem posição cadastrada em PARQUES, ignorada: {r['zona']}")
+            continue
+        valores.setdefault(r['zona'], {}).setdefault(r['periodo'], {})[r['indice']] = r['valor']
+        periodos.add(r['periodo'])
+        indices.add(r['indice'])
+
+    ordem = {nome: i for i, nome in enumerate(ORDEM_INDICES)}
+    periodos = sorted(periodos)
+    return {
+        'periodos': periodos,
+        'anos': [p[:4] for p in periodos],
+        'zonas': [z for z in PARQUES if z in valores],
+        'indices': sorted(indices, key=lambda i: (ordem.get(i, len(ordem)), i)),
+        'valores': valores,
+        'simulado': simulado,
+    }
+
+
+def intervalo_anos(serie):
+    """
+    Texto 'AAAA-AAAA' (ou 'AAAA') cobrindo os períodos da série
+    """
+    anos = serie['anos']
+    return anos[0] if anos[0] == anos[-1] else f"{anos[0]}-{anos[-1]}"
 
 # ============================================================================
-# OPÇÃO 1: SLIDER TEMPORAL
+# TEMPLATES REUTILIZÁVEIS
 # ============================================================================
 
-def criar_mapa_slider_temporal():
+def fmt(valor, formato='.3f'):
     """
-    Cria mapa interativo com controle de slider temporal
+    Formata um valor de índice; períodos sem o índice aparecem como '—'
     """
-    print("\n" + "─"*70)
-    print("📍 OPÇÃO 1: Criando Mapa com Slider Temporal...")
-    print("─"*70)
-    
-    # Criar mapa base
-    m = folium.Map(
-        location=[-28.125, -49.533],
-        zoom_start=11,
-        min_zoom=8,
-        max_zoom=18,
-        tiles='OpenStreetMap'
-    )
-    
-    # Adicionar camada de topografia
-    folium.TileLayer(
-        tiles='https://{s}.tile.opentopomap.org/{z}/{x}/{y}.png',
-        attr='OpenTopoMap',
-        name='Relevo',
-        overlay=True,
-        control=True,
-        opacity=0.6
-    ).add_to(m)
-    
-    # Criar grupos de features para cada período
-    feature_groups = {}
-    
-    for dados in dados_temporais:
-        ano = dados['ano']
-        data = dados['data']
-        
-        # Criar grupo para este período
-        fg = folium.FeatureGroup(name=f"{ano}", show=False)
-        
-        # Adicionar marcadores para PNSJ
-        pnsj_indices = dados['PNSJ']
-        popup_pnsj = f"""
+    return '—' if valor is None else format(valor, formato)
+
+
+def linhas_tabela_indices(indices, valores, cor_fundo, referencia=None):
+    """
+    Linhas <tr> de uma tabela de índices, opcionalmente com a variação em
+    relação a um período de referência
+    """
+    linhas = []
+    for i, indice in enumerate(indices):
+        valor = valores.get(indice)
+        fundo = f' style="background: {cor_fundo};"' if i % 2 == 0 else ''
+        delta = ''
+        if referencia is not None and valor is not None and referencia.get(indice) is not None:
+            d = valor - referencia[indice]
+            delta = f'<td style="padding: 5px; color: {"red" if d < 0 else "green"};">({d:+.3f})</td>'
+        linhas.append(
+            f'<tr{fundo}><td style="padding: 5px;"><strong>{indice}</strong></td>'
+            f'<td style="padding: 5px; text-align: right;">{fmt(valor)}</td>{delta}</tr>'
+        )
+    return '\n'.join(linhas)
+
+
+def popup_periodo(zona, periodo, valores, indices):
+    """
+    Popup com os índices de um parque num período
+    """
+    info = PARQUES[zona]
+    ndvi = valores.get('NDVI')
+    saude = '' if ndvi is None else f"""
+            <p style="font-size: 10px; color: #888; margin-top: 10px;">
+                🌱 Saúde da vegetação: {'Excelente' if ndvi > 0.7 else 'Boa'}
+            </p>"""
+    return f"""
         <div style="font-family: Arial; width: 280px;">
-            <h4 style="color: #2c5f2d; margin-bottom: 10px;">
-                🏔️ Parque Nacional São Joaquim
+            <h4 style="color: {info['cor_titulo']}; margin-bottom: 10px;">
+                {info['emoji']} {info['nome']}
             </h4>
             <p style="font-size: 11px; color: #666; margin: 5px 0;">
-                📅 Data: <strong>{data}</strong>
+                📅 Data: <strong>{periodo}</strong>
             </p>
             <hr style="margin: 10px 0;">
             <table style="width: 100%; font-size: 12px;">
-                <tr style="background: #e8f5e9;">
-                    <td style="padding: 5px;"><strong>NDVI</strong></td>
-                    <td style="padding: 5px; text-align: right;">{pnsj_indices['NDVI']}</td>
-                </tr>
-                <tr>
-                    <td style="padding: 5px;"><strong>EVI</strong></td>
-                    <td style="padding: 5px; text-align: right;">{pnsj_indices['EVI']}</td>
-                </tr>
-                <tr style="background: #e8f5e9;">
-                    <td style="padding: 5px;"><strong>SAVI</strong></td>
-                    <td style="padding: 5px; text-align: right;">{pnsj_indices['SAVI']}</td>
-                </tr>
-                <tr>
-                    <td style="padding: 5px;"><strong>ARVI</strong></td>
-                    <td style="padding: 5px; text-align: right;">{pnsj_indices['ARVI']}</td>
-                </tr>
-            </table>
-            <p style="font-size: 10px; color: #888; margin-top: 10px;">
-                🌱 Saúde da vegetação: {'Excelente' if pnsj_indices['NDVI'] > 0.7 else 'Boa'}
-            </p>
+                {linhas_tabela_indices(indices, valores, info['cor_fundo'])}
+            </table>{saude}
         </div>
         """
-        
-        folium.Marker(
-            location=[pn_coords['lat'], pn_coords['lon']],
-            popup=folium.Popup(popup_pnsj, max_width=300),
-            icon=folium.Icon(color='green', icon='tree', prefix='fa'),
-            tooltip=f"PNSJ - {ano}"
-        ).add_to(fg)
-        
-        # Adicionar marcadores para PESF
-        pesf_indices = dados['PESF']
-        popup_pesf = f"""
-        <div style="font-family: Arial; width: 280px;">
-            <h4 style="color: #1565c0; margin-bottom: 10px;">
-                🏞️ Parque Estadual Serra Furada
-            </h4>
-            <p style="font-size: 11px; color: #666; margin: 5px 0;">
-                📅 Data: <strong>{data}</strong>
-            </p>
-            <hr style="margin: 10px 0;">
-            <table style="width: 100%; font-size: 12px;">
-                <tr style="background: #e3f2fd;">
-                    <td style="padding: 5px;"><strong>NDVI</strong></td>
-                    <td style="padding: 5px; text-align: right;">{pesf_indices['NDVI']}</td>
-                </tr>
-                <tr>
-                    <td style="padding: 5px;"><strong>EVI</strong></td>
-                    <td style="padding: 5px; text-align: right;">{pesf_indices['EVI']}</td>
-                </tr>
-                <tr style="background: #e3f2fd;">
-                    <td style="padding: 5px;"><strong>SAVI</strong></td>
-                    <td style="padding: 5px; text-align: right;">{pesf_indices['SAVI']}</td>
-                </tr>
-                <tr>
-                    <td style="padding: 5px;"><strong>ARVI</strong></td>
-                    <td style="padding: 5px; text-align: right;">{pesf_indices['ARVI']}</td>
-                </tr>
-            </table>
-            <p style="font-size: 10px; color: #888; margin-top: 10px;">
-                🌱 Saúde da vegetação: {'Excelente' if pesf_indices['NDVI'] > 0.7 else 'Boa'}
+
+
+def barras_indice(anos, valores):
+    """
+    Gráfico de barras em texto (uma linha por período)
+    """
+    return '<br>'.join(
+        f'{ano}: {"▓" * int(v * 50)} {v:.3f}' if v is not None else f'{ano}: —'
+        for ano, v in zip(anos, valores)
+    )
+
+
+def variacao(valores):
+    """
+    Variação absoluta e percentual entre o primeiro e o último valor disponíveis
+    """
+    disponiveis = [v for v in valores if v is not None]
+    if len(disponiveis) < 2:
+        return None
+    inicio, fim = disponiveis[0], disponiveis[-1]
+    return fim - inicio, ((fim - inicio) / inicio * 100) if inicio else 0.0
+
+
+def popup_serie(zona, serie):
+    """
+    Popup com a evolução temporal de um parque
+    """
+    info = PARQUES[zona]
+    por_periodo = serie['valores'][zona]
+    historico = {indice: [por_periodo.get(p, {}).get(indice) for p in serie['periodos']]
+                 for indice in serie['indices']}
+
+    blocos = ''.join(f"""
+        <div style="margin: 10px 0;">
+            <strong>📈 {indice} ao longo do tempo:</strong>
+            <div style="font-family: monospace; font-size: 11px; background: #f5f5f5; padding: 10px; margin-top: 5px;">
+                {barras_indice(serie['anos'], historico[indice])}
+            </div>
+        </div>
+        """ for indice in INDICES_SERIE if indice in historico)
+
+    analise = []
+    for indice in serie['indices']:
+        mudanca = variacao(historico[indice])
+        if mudanca:
+            analise.append(f"• Mudança {indice}: {mudanca[0]:+.3f} ({mudanca[1]:+.1f}%)")
+    referencia = 'NDVI' if 'NDVI' in historico else serie['indices'][0]
+    mudanca_ref = variacao(historico[referencia])
+    if mudanca_ref:
+        analise.append(f"• Tendência: {'Crescimento' if mudanca_ref[0] > 0 else 'Declínio'}")
+
+    return f"""
+    <div style="font-family: Arial; width: 450px;">
+        <h4 style="color: {info['cor_titulo']}; text-align: center;">
+            {info['emoji']} {info['nome']}
+        </h4>
+        <h5 style="text-align: center; color: #666;">Evolução Temporal ({intervalo_anos(serie)})</h5>
+        <hr>
+        {blocos}
+        <div style="margin-top: 15px; padding: 10px; background: {info['cor_fundo']}; border-radius: 5px;">
+            <strong>📊 Análise:</strong>
+            <p style="font-size: 11px; margin: 5px 0;">
+                {'<br>'.join(analise)}
             </p>
         </div>
-        """
-        
-        folium.Marker(
-            location=[pe_coords['lat'], pe_coords['lon']],
-            popup=folium.Popup(popup_pesf, max_width=300),
-            icon=folium.Icon(color='blue', icon='tree', prefix='fa'),
-            tooltip=f"PESF - {ano}"
-        ).add_to(fg)
-        
-        feature_groups[ano] = fg
-        fg.add_to(m)
-    
-    # Adicionar controle de slider temporal
-    # Usando TimestampedGeoJson para controle temporal
+    </div>
+    """
+
+
+def caixa_titulo(titulo, subtitulo, instrucao):
+    """
+    Caixa fixa de título usada nos mapas folium
+    """
+    return f'''
+    <div style="position: fixed;
+                top: 10px; left: 50px; width: 500px; height: 90px;
+                background-color: white; border:2px solid grey; z-index:9999;
+                font-size:14px; padding: 10px; opacity: 0.9;">
+        <h4 style="margin: 0; color: #2c5f2d;">{titulo}</h4>
+        <p style="margin: 5px 0; font-size: 12px;">
+            {subtitulo}<br>
+            <strong>{instrucao}</strong>
+        </p>
+    </div>
+    '''
+
+
+def mapa_base(relevo=False):
+    """
+    Mapa folium centrado nos parques
+    """
+    m = folium.Map(
+        location=[-28.125, -49.533],
+        zoom_start=11,
+        min_zoom=8,
+        max_zoom=18,
+        tiles='OpenStreetMap'
+    )
+    if relevo:
+        folium.TileLayer(
+            tiles='https://{s}.tile.opentopomap.org/{z}/{x}/{y}.png',
+            attr='OpenTopoMap',
+            name='Relevo',
+            overlay=True,
+            control=True,
+            opacity=0.6
+        ).add_to(m)
+    return m
+
+# ============================================================================
+# OPÇÃO 1: SLIDER TEMPORAL
+# ============================================================================
+
+def criar_mapa_slider_temporal(serie, sidecar=False):
+    """
+    Mapa interativo com controle de slider temporal: {arquivo: conteúdo}
+
+    Com sidecar=True o HTML é só a casca do mapa e os dados de cada período
+    ficam em arquivos JSON separados (ver criar_mapa_slider_sidecar).
+    """
+    print("\n" + "─"*70)
+    print("📍 OPÇÃO 1: Criando Mapa com Slider Temporal...")
+    print("─"*70)
+
+    if sidecar:
+        return criar_mapa_slider_sidecar(serie)
+
+    m = mapa_base(relevo=True)
+
+    # Um grupo de features por período, com um marcador por parque
     features = []
-    for dados in dados_temporais:
-        ano = dados['ano']
-        
-        # PNSJ
-        features.append({
-            'type': 'Feature',
-            'geometry': {
-                'type': 'Point',
-                'coordinates': [pn_coords['lon'], pn_coords['lat']],
-            },
-            'properties': {
-                'time': dados['data'],
-                'popup': f"PNSJ - {ano}",
-                'icon': 'circle',
-                'iconstyle': {
-                    'fillColor': 'green',
-                    'fillOpacity': 0.8,
-                    'stroke': 'true',
-                    'radius': 8
-                }
-            }
-        })
-        
-        # PESF
-        features.append({
-            'type': 'Feature',
-            'geometry': {
-                'type': 'Point',
-                'coordinates': [pe_coords['lon'], pe_coords['lat']],
-            },
-            'properties': {
-                'time': dados['data'],
-                'popup': f"PESF - {ano}",
-                'icon': 'circle',
-                'iconstyle': {
-                    'fillColor': 'blue',
-                    'fillOpacity': 0.8,
-                    'stroke': 'true',
-                    'radius': 8
+    for periodo, ano in zip(serie['periodos'], serie['anos']):
+        fg = folium.FeatureGroup(name=periodo, show=False)
+
+        for zona in serie['zonas']:
+            valores = serie['valores'][zona].get(periodo)
+            if not valores:
+                continue
+            info = PARQUES[zona]
+
+            folium.Marker(
+                location=[info['coords']['lat'], info['coords']['lon']],
+                popup=folium.Popup(popup_periodo(zona, periodo, valores, serie['indices']), max_width=300),
+                icon=folium.Icon(color=info['cor'], icon='tree', prefix='fa'),
+                tooltip=f"{zona} - {ano}"
+            ).add_to(fg)
+
+            # Feature equivalente para o controle temporal (TimestampedGeoJson)
+            features.append({
+                'type': 'Feature',
+                'geometry': {
+                    'type': 'Point',
+                    'coordinates': [info['coords']['lon'], info['coords']['lat']],
+                },
+                'properties': {
+                    'time': periodo,
+                    'popup': f"{zona} - {ano}",
+                    'icon': 'circle',
+                    'iconstyle': {
+                        'fillColor': info['cor'],
+                        'fillOpacity': 0.8,
+                        'stroke': 'true',
+                        'radius': 8
+                    }
                 }
-            }
-        })
-    
+            })
+
+        fg.add_to(m)
+
     # Adicionar TimestampedGeoJson
     plugins.TimestampedGeoJson(
         {'type': 'FeatureCollection', 'features': features},
@@ -283,51 +445,211 @@ def criar_mapa_slider_temporal():
         date_options='YYYY',
         time_slider_drag_update=True
     ).add_to(m)
-    
+
     # Adicionar título
-    title_html = '''
-    <div style="position: fixed; 
-                top: 10px; left: 50px; width: 500px; height: 90px; 
-                background-color: white; border:2px solid grey; z-index:9999; 
-                font-size:14px; padding: 10px; opacity: 0.9;">
-        <h4 style="margin: 0; color: #2c5f2d;">📊 Análise Temporal de Índices de Vegetação</h4>
-        <p style="margin: 5px 0; font-size: 12px;">
-            Parques de Santa Catarina (2020-2024)<br>
-            <strong>Use o controle de tempo abaixo para navegar entre os anos</strong>
-        </p>
-    </div>
-    '''
-    m.get_root().html.add_child(folium.Element(title_html))
-    
-    # Salvar
-    m.save('mapa_slider_temporal.html')
-    print("✅ Mapa com slider temporal criado: mapa_slider_temporal.html")
+    m.get_root().html.add_child(folium.Element(caixa_titulo(
+        '📊 Análise Temporal de Índices de Vegetação',
+        f'Parques de Santa Catarina ({intervalo_anos(serie)})',
+        'Use o controle de tempo abaixo para navegar entre os anos'
+    )))
+
+    with medir('folium_render', 'render', arquivo='mapa_slider_temporal.html'):
+        html = m.get_root().render()
+    print("✅ Mapa com slider temporal pronto: mapa_slider_temporal.html")
     print("   Use o controle temporal na parte inferior para navegar entre os anos")
+    return {'mapa_slider_temporal.html': html}
+
+
+class ControleSliderSidecar(MacroElement):
+    """
+    Slider temporal que busca o JSON de cada período sob demanda
+
+    Lê primeiro <pasta>/indice.json (períodos, índices e parques) e, a cada
+    movimento do slider, o arquivo do período escolhido, mantendo em cache
+    os períodos já baixados e pré-carregando o seguinte.
+    """
+    _template = jinja2.Template("""
+        {% macro script(this, kwargs) %}
+        (function() {
+            var mapa = {{ this._parent.get_name() }};
+            var pasta = {{ this.pasta|tojson }};
+            var camada = L.layerGroup().addTo(mapa);
+            var cache = {};
+            var indice = null;
+            var timer = null;
+
+            var controle = L.control({position: 'bottomleft'});
+            controle.onAdd = function() {
+                var div = L.DomUtil.create('div', 'leaflet-bar');
+                div.style.cssText = 'background: white; padding: 8px 12px; font-family: Arial; font-size: 13px;';
+                div.innerHTML =
+                    '<button id="{{ this.get_name() }}_play" style="margin-right: 8px;">▶</button>' +
+                    '<input type="range" id="{{ this.get_name() }}_slider" min="0" max="0" value="0" ' +
+                    'style="width: 260px; vertical-align: middle;"> ' +
+                    '<strong id="{{ this.get_name() }}_rotulo">carregando...</strong>';
+                L.DomEvent.disableClickPropagation(div);
+                return div;
+            };
+            controle.addTo(mapa);
+
+            var slider = document.getElementById('{{ this.get_name() }}_slider');
+            var rotulo = document.getElementById('{{ this.get_name() }}_rotulo');
+            var play = document.getElementById('{{ this.get_name() }}_play');
+
+            function buscar(arquivo) {
+                if (!cache[arquivo]) {
+                    cache[arquivo] = fetch(pasta + '/' + arquivo).then(function(r) { return r.json(); });
+                }
+                return cache[arquivo];
+            }
+
+            function formatar(v) {
+                return v === null ? '—' : v.toFixed(3);
+            }
+
+            function popup(info, periodo, valores) {
+                var linhas = indice.indices.map(function(nome, i) {
+                    var fundo = i % 2 === 0 ? ' style="background: ' + info.cor_fundo + ';"' : '';
+                    return '<tr' + fundo + '><td style="padding: 5px;"><strong>' + nome + '</strong></td>' +
+                           '<td style="padding: 5px; text-align: right;">' + formatar(valores[i]) + '</td></tr>';
+                }).join('');
+                var ndvi = valores[indice.indices.indexOf('NDVI')];
+                var saude = (ndvi === undefined || ndvi === null) ? '' :
+                    '<p style="font-size: 10px; color: #888; margin-top: 10px;">🌱 Saúde da vegetação: ' +
+                    (ndvi > 0.7 ? 'Excelente' : 'Boa') + '</p>';
+                return '<div style="font-family: Arial; width: 280px;">' +
+                    '<h4 style="color: ' + info.cor_titulo + '; margin-bottom: 10px;">' + info.emoji + ' ' + info.nome + '</h4>' +
+                    '<p style="font-size: 11px; color: #666; margin: 5px 0;">📅 Data: <strong>' + periodo + '</strong></p>' +
+                    '<hr style="margin: 10px 0;"><table style="width: 100%; font-size: 12px;">' + linhas + '</table>' +
+                    saude + '</div>';
+            }
+
+            function mostrar(i) {
+                var p = indice.periodos[i];
+                rotulo.textContent = p.periodo;
+                buscar(p.arquivo).then(function(dados) {
+                    if (Number(slider.value) !== i) { return; }  // slider já mudou
+                    camada.clearLayers();
+                    dados.zonas.forEach(function(z) {
+                        var info = indice.zonas[z.id];
+                        L.marker([info.lat, info.lon], {
+                            icon: L.AwesomeMarkers.icon({icon: 'tree', prefix: 'fa', markerColor: info.cor})
+                        }).bindPopup(popup(info, dados.periodo, z.v), {maxWidth: 300})
+                          .bindTooltip(z.id + ' - ' + p.ano)
+                          .addTo(camada);
+                    });
+                    if (i + 1 < indice.periodos.length) { buscar(indice.periodos[i + 1].arquivo); }
+                });
+            }
+
+            slider.addEventListener('input', function() { mostrar(Number(slider.value)); });
+            play.addEventListener('click', function() {
+                if (timer) {
+                    clearInterval(timer);
+                    timer = null;
+                    play.textContent = '▶';
+                    return;
+                }
+                play.textContent = '⏸';
+                timer = setInterval(function() {
+                    var proximo = (Number(slider.value) + 1) % indice.periodos.length;
+                    slider.value = proximo;
+                    mostrar(proximo);
+                }, 1500);
+            });
+
+            fetch(pasta + '/indice.json').then(function(r) { return r.json(); }).then(function(dados) {
+                indice = dados;
+                slider.max = indice.periodos.length - 1;
+                slider.value = 0;
+                mostrar(0);
+            });
+        })();
+        {% endmacro %}
+    """)
+
+    def __init__(self, pasta):
+        super().__init__()
+        self._name = 'ControleSliderSidecar'
+        self.pasta = pasta
+
+
+@medir('dados_sidecars', 'dados')
+def dados_sidecars(serie, pasta=PASTA_SIDECAR):
+    """
+    indice.json e um JSON compacto por período: {arquivo: conteúdo}
+
+    Os valores de cada parque vão numa lista alinhada com 'indices'
+    (null quando o índice não existe no período).
+    """
+    compacto = {'ensure_ascii': False, 'separators': (',', ':')}
+
+    saidas = {}
+    periodos = []
+    for periodo, ano in zip(serie['periodos'], serie['anos']):
+        arquivo = f"periodo_{re.sub(r'[^0-9A-Za-z_-]', '_', periodo)}.json"
+        zonas = []
+        for zona in serie['zonas']:
+            valores = serie['valores'][zona].get(periodo)
+            if valores:
+                zonas.append({'id': zona, 'v': [valores.get(i) for i in serie['indices']]})
+        saidas[os.path.join(pasta, arquivo)] = json.dumps({'periodo': periodo, 'zonas': zonas}, **compacto)
+        periodos.append({'periodo': periodo, 'ano': ano, 'arquivo': arquivo})
+
+    indice = {
+        'indices': serie['indices'],
+        'periodos': periodos,
+        'zonas': {zona: {
+            'nome': PARQUES[zona]['nome'],
+            'lat': PARQUES[zona]['coords']['lat'],
+            'lon': PARQUES[zona]['coords']['lon'],
+            'cor': PARQUES[zona]['cor'],
+            'cor_titulo': PARQUES[zona]['cor_titulo'],
+            'cor_fundo': PARQUES[zona]['cor_fundo'],
+            'emoji': PARQUES[zona]['emoji'],
+        } for zona in serie['zonas']},
+    }
+    saidas[os.path.join(pasta, 'indice.json')] = json.dumps(indice, **compacto)
+    return saidas
+
+
+def criar_mapa_slider_sidecar(serie, pasta=PASTA_SIDECAR):
+    """
+    Versão do slider temporal cujo HTML tem tamanho constante: nenhum dado
+    de período é embutido na página
+    """
+    saidas = dados_sidecars(serie, pasta)
+
+    m = mapa_base(relevo=True)
+    ControleSliderSidecar(pasta).add_to(m)
+
+    # Adicionar título
+    m.get_root().html.add_child(folium.Element(caixa_titulo(
+        '📊 Análise Temporal de Índices de Vegetação',
+        f'Parques de Santa Catarina ({intervalo_anos(serie)})',
+        'Use o controle de tempo abaixo para navegar entre os anos'
+    )))
+
+    with medir('folium_render', 'render', arquivo='mapa_slider_temporal.html'):
+        saidas['mapa_slider_temporal.html'] = m.get_root().render()
+    print("✅ Mapa com slider temporal (dados sob demanda) pronto: mapa_slider_temporal.html")
+    print(f"   {len(saidas) - 2} períodos em: {pasta}/")
+    print("   ⚠️  A página precisa ser servida por HTTP (ex.: GitHub Pages ou python -m http.server)")
+    return saidas
 
 # ============================================================================
 # OPÇÃO 2: COMPARAÇÃO LADO A LADO
 # ============================================================================
 
-def criar_mapa_comparacao_lado_a_lado():
-    """
-    Cria interface com dois mapas lado a lado para comparação
-    """
-    print("\n" + "─"*70)
-    print("📍 OPÇÃO 2: Criando Mapa de Comparação Lado a Lado...")
-    print("─"*70)
-    
-    # Dados de 2020 e 2024
-    dados_2020 = dados_temporais[0]
-    dados_2024 = dados_temporais[-1]
-    
-    # Criar HTML customizado com dois mapas lado a lado
-    html_content = """
+# Página com dois mapas sincronizados; os marcadores são criados em JavaScript
+# a partir do JSON $dados, de modo que o template não cresce com os dados
+TEMPLATE_COMPARACAO = Template("""
     <!DOCTYPE html>
     <html>
     <head>
         <meta charset="utf-8" />
         <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Comparação Temporal 2020 vs 2024</title>
+        <title>Comparação Temporal $ano_inicio vs $ano_fim</title>
         <link rel="stylesheet" href="https://unpkg.com/leaflet@1.9.4/dist/leaflet.css"/>
         <script src="https://unpkg.com/leaflet@1.9.4/dist/leaflet.js"></script>
         <style>
@@ -348,7 +670,7 @@ def criar_mapa_comparacao_lado_a_lado():
                 height: 100vh;
                 padding-top: 80px;
             }
-            #map2020, #map2024 {
+            #mapInicio, #mapFim {
                 flex: 1;
                 height: calc(100vh - 80px);
             }
@@ -362,269 +684,170 @@ def criar_mapa_comparacao_lado_a_lado():
                 z-index: 999;
                 font-size: 16px;
             }
-            #label2020 { left: 10px; color: #1565c0; }
-            #label2024 { right: 10px; color: #2c5f2d; }
+            #labelInicio { left: 10px; color: #1565c0; }
+            #labelFim { right: 10px; color: #2c5f2d; }
         </style>
     </head>
     <body>
         <div id="header">
             <h2 style="margin: 0; color: #2c5f2d;">📊 Comparação Temporal de Índices de Vegetação</h2>
             <p style="margin: 5px 0; font-size: 14px;">
-                Parques de Santa Catarina: <strong style="color: #1565c0;">2020</strong> vs <strong style="color: #2c5f2d;">2024</strong>
+                Parques de Santa Catarina: <strong style="color: #1565c0;">$ano_inicio</strong> vs <strong style="color: #2c5f2d;">$ano_fim</strong>
             </p>
         </div>
-        <div class="map-label" id="label2020">📅 2020</div>
-        <div class="map-label" id="label2024">📅 2024</div>
+        <div class="map-label" id="labelInicio">📅 $ano_inicio</div>
+        <div class="map-label" id="labelFim">📅 $ano_fim</div>
         <div id="maps-container">
-            <div id="map2020"></div>
-            <div id="map2024"></div>
+            <div id="mapInicio"></div>
+            <div id="mapFim"></div>
         </div>
-        
+
         <script>
-            // Criar mapa 2020
-            var map2020 = L.map('map2020').setView([-28.125, -49.533], 11);
-            L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
-                attribution: '© OpenStreetMap contributors',
-                minZoom: 8,
-                maxZoom: 18
-            }).addTo(map2020);
-            
-            // Criar mapa 2024
-            var map2024 = L.map('map2024').setView([-28.125, -49.533], 11);
-            L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
-                attribution: '© OpenStreetMap contributors',
-                minZoom: 8,
-                maxZoom: 18
-            }).addTo(map2024);
-            
+            var dados = $dados;
+
+            function criarMapa(id) {
+                var mapa = L.map(id).setView([-28.125, -49.533], 11);
+                L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
+                    attribution: '© OpenStreetMap contributors',
+                    minZoom: 8,
+                    maxZoom: 18
+                }).addTo(mapa);
+                return mapa;
+            }
+
+            var mapInicio = criarMapa('mapInicio');
+            var mapFim = criarMapa('mapFim');
+
             // Sincronizar mapas
-            map2020.on('moveend', function() {
-                map2024.setView(map2020.getCenter(), map2020.getZoom(), {animate: false});
+            mapInicio.on('moveend', function() {
+                mapFim.setView(mapInicio.getCenter(), mapInicio.getZoom(), {animate: false});
             });
-            map2024.on('moveend', function() {
-                map2020.setView(map2024.getCenter(), map2024.getZoom(), {animate: false});
+            mapFim.on('moveend', function() {
+                mapInicio.setView(mapFim.getCenter(), mapFim.getZoom(), {animate: false});
             });
-            
-            // Dados 2020
-            """
-    
-    # Adicionar marcadores 2020
-    for parque, coords, cor, nome in [
-        ('PNSJ', pn_coords, 'green', 'Parque Nacional São Joaquim'),
-        ('PESF', pe_coords, 'blue', 'Parque Estadual Serra Furada')
-    ]:
-        indices = dados_2020[parque]
-        html_content += f"""
-            L.marker([{coords['lat']}, {coords['lon']}], {{
-                icon: L.icon({{
-                    iconUrl: 'https://raw.githubusercontent.com/pointhi/leaflet-color-markers/master/img/marker-icon-2x-{cor}.png',
-                    shadowUrl: 'https://cdnjs.cloudflare.com/ajax/libs/leaflet/1.9.4/images/marker-shadow.png',
-                    iconSize: [25, 41],
-                    iconAnchor: [12, 41],
-                    popupAnchor: [1, -34],
-                    shadowSize: [41, 41]
-                }})
-            }}).addTo(map2020)
-            .bindPopup(`
-                <div style="font-family: Arial; width: 220px;">
-                    <h4 style="color: {'#2c5f2d' if cor == 'green' else '#1565c0'};">{nome}</h4>
-                    <p><strong>📅 Ano: 2020</strong></p>
-                    <hr>
-                    <table style="width: 100%; font-size: 12px;">
-                        <tr><td><strong>NDVI</strong></td><td>{indices['NDVI']}</td></tr>
-                        <tr><td><strong>EVI</strong></td><td>{indices['EVI']}</td></tr>
-                        <tr><td><strong>SAVI</strong></td><td>{indices['SAVI']}</td></tr>
-                        <tr><td><strong>ARVI</strong></td><td>{indices['ARVI']}</td></tr>
-                    </table>
-                </div>
-            `);
-        """
-    
-    # Adicionar marcadores 2024
-    html_content += "\n            // Dados 2024\n"
-    for parque, coords, cor, nome in [
-        ('PNSJ', pn_coords, 'green', 'Parque Nacional São Joaquim'),
-        ('PESF', pe_coords, 'blue', 'Parque Estadual Serra Furada')
-    ]:
-        indices = dados_2024[parque]
-        indices_2020 = dados_2020[parque]
-        delta_ndvi = indices['NDVI'] - indices_2020['NDVI']
-        delta_evi = indices['EVI'] - indices_2020['EVI']
-        
-        html_content += f"""
-            L.marker([{coords['lat']}, {coords['lon']}], {{
-                icon: L.icon({{
-                    iconUrl: 'https://raw.githubusercontent.com/pointhi/leaflet-color-markers/master/img/marker-icon-2x-{cor}.png',
+
+            function formatar(v) {
+                return v === null || v === undefined ? '—' : v.toFixed(3);
+            }
+
+            function popup(parque, ano, valores, referencia) {
+                var html = '<div style="font-family: Arial; width: 220px;">' +
+                    '<h4 style="color: ' + parque.cor_titulo + ';">' + parque.nome + '</h4>' +
+                    '<p><strong>📅 Ano: ' + ano + '</strong></p><hr>' +
+                    '<table style="width: 100%; font-size: 12px;">';
+                dados.indices.forEach(function(indice) {
+                    var v = valores[indice];
+                    html += '<tr><td><strong>' + indice + '</strong></td><td>' + formatar(v) + '</td>';
+                    if (referencia && v !== undefined && referencia[indice] !== undefined) {
+                        var d = v - referencia[indice];
+                        html += '<td style="color: ' + (d < 0 ? 'red' : 'green') + ';">(' +
+                                (d >= 0 ? '+' : '') + d.toFixed(3) + ')</td>';
+                    }
+                    html += '</tr>';
+                });
+                html += '</table>';
+                if (referencia) {
+                    html += '<p style="font-size: 10px; margin-top: 10px;">📊 Mudança desde ' + dados.ano_inicio + '</p>';
+                }
+                return html + '</div>';
+            }
+
+            function icone(cor) {
+                return L.icon({
+                    iconUrl: 'https://raw.githubusercontent.com/pointhi/leaflet-color-markers/master/img/marker-icon-2x-' + cor + '.png',
                     shadowUrl: 'https://cdnjs.cloudflare.com/ajax/libs/leaflet/1.9.4/images/marker-shadow.png',
                     iconSize: [25, 41],
                     iconAnchor: [12, 41],
                     popupAnchor: [1, -34],
                     shadowSize: [41, 41]
-                }})
-            }}).addTo(map2024)
-            .bindPopup(`
-                <div style="font-family: Arial; width: 220px;">
-                    <h4 style="color: {'#2c5f2d' if cor == 'green' else '#1565c0'};">{nome}</h4>
-                    <p><strong>📅 Ano: 2024</strong></p>
-                    <hr>
-                    <table style="width: 100%; font-size: 12px;">
-                        <tr><td><strong>NDVI</strong></td><td>{indices['NDVI']}</td><td style="color: {'red' if delta_ndvi < 0 else 'green'};">({delta_ndvi:+.3f})</td></tr>
-                        <tr><td><strong>EVI</strong></td><td>{indices['EVI']}</td><td style="color: {'red' if delta_evi < 0 else 'green'};">({delta_evi:+.3f})</td></tr>
-                        <tr><td><strong>SAVI</strong></td><td>{indices['SAVI']}</td></tr>
-                        <tr><td><strong>ARVI</strong></td><td>{indices['ARVI']}</td></tr>
-                    </table>
-                    <p style="font-size: 10px; margin-top: 10px;">📊 Mudança desde 2020</p>
-                </div>
-            `);
-        """
-    
-    html_content += """
+                });
+            }
+
+            dados.parques.forEach(function(parque) {
+                L.marker([parque.lat, parque.lon], {icon: icone(parque.cor)}).addTo(mapInicio)
+                    .bindPopup(popup(parque, dados.ano_inicio, parque.inicio, null));
+                L.marker([parque.lat, parque.lon], {icon: icone(parque.cor)}).addTo(mapFim)
+                    .bindPopup(popup(parque, dados.ano_fim, parque.fim, parque.inicio));
+            });
         </script>
     </body>
     </html>
+    """)
+
+
+def criar_mapa_comparacao_lado_a_lado(serie):
     """
-    
-    # Salvar arquivo
-    with open('mapa_comparacao_lado_a_lado.html', 'w', encoding='utf-8') as f:
-        f.write(html_content)
-    
-    print("✅ Mapa de comparação criado: mapa_comparacao_lado_a_lado.html")
-    print("   Mapas sincronizados: 2020 (esquerda) vs 2024 (direita)")
+    Interface com dois mapas lado a lado para comparação
+    (primeiro vs último período da série): {arquivo: conteúdo}
+    """
+    print("\n" + "─"*70)
+    print("📍 OPÇÃO 2: Criando Mapa de Comparação Lado a Lado...")
+    print("─"*70)
+
+    periodo_inicio, periodo_fim = serie['periodos'][0], serie['periodos'][-1]
+    ano_inicio, ano_fim = serie['anos'][0], serie['anos'][-1]
+
+    dados = {
+        'ano_inicio': ano_inicio,
+        'ano_fim': ano_fim,
+        'indices': serie['indices'],
+        'parques': [{
+            'nome': PARQUES[zona]['nome'],
+            'lat': PARQUES[zona]['coords']['lat'],
+            'lon': PARQUES[zona]['coords']['lon'],
+            'cor': PARQUES[zona]['cor'],
+            'cor_titulo': PARQUES[zona]['cor_titulo'],
+            'inicio': serie['valores'][zona].get(periodo_inicio, {}),
+            'fim': serie['valores'][zona].get(periodo_fim, {}),
+        } for zona in serie['zonas']],
+    }
+
+    with medir('html_render', 'render', arquivo='mapa_comparacao_lado_a_lado.html'):
+        html_content = TEMPLATE_COMPARACAO.substitute(
+            ano_inicio=ano_inicio,
+            ano_fim=ano_fim,
+            dados=json.dumps(dados, ensure_ascii=False),
+        )
+
+    print("✅ Mapa de comparação pronto: mapa_comparacao_lado_a_lado.html")
+    print(f"   Mapas sincronizados: {ano_inicio} (esquerda) vs {ano_fim} (direita)")
+    return {'mapa_comparacao_lado_a_lado.html': html_content}
 
 # ============================================================================
 # OPÇÃO 3: GRÁFICOS DE SÉRIE TEMPORAL
 # ============================================================================
 
-def criar_graficos_serie_temporal():
+def criar_graficos_serie_temporal(serie):
     """
-    Cria mapa com gráficos de evolução temporal
+    Mapa com gráficos de evolução temporal: {arquivo: conteúdo}
     """
     print("\n" + "─"*70)
     print("📍 OPÇÃO 3: Criando Mapa com Gráficos de Série Temporal...")
     print("─"*70)
-    
-    # Criar mapa base
-    m = folium.Map(
-        location=[-28.125, -49.533],
-        zoom_start=11,
-        min_zoom=8,
-        max_zoom=18,
-        tiles='OpenStreetMap'
-    )
-    
-    # Preparar dados para gráficos
-    anos = [d['ano'] for d in dados_temporais]
-    
-    # Dados PNSJ
-    pnsj_ndvi = [d['PNSJ']['NDVI'] for d in dados_temporais]
-    pnsj_evi = [d['PNSJ']['EVI'] for d in dados_temporais]
-    
-    # Dados PESF
-    pesf_ndvi = [d['PESF']['NDVI'] for d in dados_temporais]
-    pesf_evi = [d['PESF']['EVI'] for d in dados_temporais]
-    
-    # Criar gráfico PNSJ usando Vega-Lite (embutido no popup)
-    popup_pnsj = f"""
-    <div style="font-family: Arial; width: 450px;">
-        <h4 style="color: #2c5f2d; text-align: center;">
-            🏔️ Parque Nacional São Joaquim
-        </h4>
-        <h5 style="text-align: center; color: #666;">Evolução Temporal (2020-2024)</h5>
-        <hr>
-        
-        <div style="margin: 10px 0;">
-            <strong>📈 NDVI ao longo do tempo:</strong>
-            <div style="font-family: monospace; font-size: 11px; background: #f5f5f5; padding: 10px; margin-top: 5px;">
-                {'<br>'.join([f'{ano}: {"▓" * int(ndvi * 50)} {ndvi:.3f}' for ano, ndvi in zip(anos, pnsj_ndvi)])}
-            </div>
-        </div>
-        
-        <div style="margin: 10px 0;">
-            <strong>📈 EVI ao longo do tempo:</strong>
-            <div style="font-family: monospace; font-size: 11px; background: #f5f5f5; padding: 10px; margin-top: 5px;">
-                {'<br>'.join([f'{ano}: {"▓" * int(evi * 50)} {evi:.3f}' for ano, evi in zip(anos, pnsj_evi)])}
-            </div>
-        </div>
-        
-        <div style="margin-top: 15px; padding: 10px; background: #e8f5e9; border-radius: 5px;">
-            <strong>📊 Análise:</strong>
-            <p style="font-size: 11px; margin: 5px 0;">
-                • Mudança NDVI: {pnsj_ndvi[-1] - pnsj_ndvi[0]:+.3f} ({((pnsj_ndvi[-1] - pnsj_ndvi[0])/pnsj_ndvi[0]*100):+.1f}%)<br>
-                • Mudança EVI: {pnsj_evi[-1] - pnsj_evi[0]:+.3f} ({((pnsj_evi[-1] - pnsj_evi[0])/pnsj_evi[0]*100):+.1f}%)<br>
-                • Tendência: {'Crescimento' if pnsj_ndvi[-1] > pnsj_ndvi[0] else 'Declínio'}
-            </p>
-        </div>
-    </div>
-    """
-    
-    folium.Marker(
-        location=[pn_coords['lat'], pn_coords['lon']],
-        popup=folium.Popup(popup_pnsj, max_width=470),
-        icon=folium.Icon(color='green', icon='chart-line', prefix='fa'),
-        tooltip="📊 Clique para ver evolução temporal - PNSJ"
-    ).add_to(m)
-    
-    # Criar gráfico PESF
-    popup_pesf = f"""
-    <div style="font-family: Arial; width: 450px;">
-        <h4 style="color: #1565c0; text-align: center;">
-            🏞️ Parque Estadual Serra Furada
-        </h4>
-        <h5 style="text-align: center; color: #666;">Evolução Temporal (2020-2024)</h5>
-        <hr>
-        
-        <div style="margin: 10px 0;">
-            <strong>📈 NDVI ao longo do tempo:</strong>
-            <div style="font-family: monospace; font-size: 11px; background: #f5f5f5; padding: 10px; margin-top: 5px;">
-                {'<br>'.join([f'{ano}: {"▓" * int(ndvi * 50)} {ndvi:.3f}' for ano, ndvi in zip(anos, pesf_ndvi)])}
-            </div>
-        </div>
-        
-        <div style="margin: 10px 0;">
-            <strong>📈 EVI ao longo do tempo:</strong>
-            <div style="font-family: monospace; font-size: 11px; background: #f5f5f5; padding: 10px; margin-top: 5px;">
-                {'<br>'.join([f'{ano}: {"▓" * int(evi * 50)} {evi:.3f}' for ano, evi in zip(anos, pesf_evi)])}
-            </div>
-        </div>
-        
-        <div style="margin-top: 15px; padding: 10px; background: #e3f2fd; border-radius: 5px;">
-            <strong>📊 Análise:</strong>
-            <p style="font-size: 11px; margin: 5px 0;">
-                • Mudança NDVI: {pesf_ndvi[-1] - pesf_ndvi[0]:+.3f} ({((pesf_ndvi[-1] - pesf_ndvi[0])/pesf_ndvi[0]*100):+.1f}%)<br>
-                • Mudança EVI: {pesf_evi[-1] - pesf_evi[0]:+.3f} ({((pesf_evi[-1] - pesf_evi[0])/pesf_evi[0]*100):+.1f}%)<br>
-                • Tendência: {'Crescimento' if pesf_ndvi[-1] > pesf_ndvi[0] else 'Declínio'}
-            </p>
-        </div>
-    </div>
-    """
-    
-    folium.Marker(
-        location=[pe_coords['lat'], pe_coords['lon']],
-        popup=folium.Popup(popup_pesf, max_width=470),
-        icon=folium.Icon(color='blue', icon='chart-line', prefix='fa'),
-        tooltip="📊 Clique para ver evolução temporal - PESF"
-    ).add_to(m)
-    
+
+    m = mapa_base()
+
+    for zona in serie['zonas']:
+        info = PARQUES[zona]
+        folium.Marker(
+            location=[info['coords']['lat'], info['coords']['lon']],
+            popup=folium.Popup(popup_serie(zona, serie), max_width=470),
+            icon=folium.Icon(color=info['cor'], icon='chart-line', prefix='fa'),
+            tooltip=f"📊 Clique para ver evolução temporal - {zona}"
+        ).add_to(m)
+
     # Adicionar título
-    title_html = '''
-    <div style="position: fixed; 
-                top: 10px; left: 50px; width: 500px; height: 90px; 
-                background-color: white; border:2px solid grey; z-index:9999; 
-                font-size:14px; padding: 10px; opacity: 0.9;">
-        <h4 style="margin: 0; color: #2c5f2d;">📊 Análise de Série Temporal</h4>
-        <p style="margin: 5px 0; font-size: 12px;">
-            Evolução dos Índices de Vegetação (2020-2024)<br>
-            <strong>Clique nos marcadores para ver os gráficos de tendência</strong>
-        </p>
-    </div>
-    '''
-    m.get_root().html.add_child(folium.Element(title_html))
-    
+    m.get_root().html.add_child(folium.Element(caixa_titulo(
+        '📊 Análise de Série Temporal',
+        f'Evolução dos Índices de Vegetação ({intervalo_anos(serie)})',
+        'Clique nos marcadores para ver os gráficos de tendência'
+    )))
+
     # Adicionar legenda
     legenda_html = '''
-    <div style="position: fixed; 
-                bottom: 50px; right: 10px; width: 200px; 
-                background-color: white; border:2px solid grey; z-index:9999; 
+    <div style="position: fixed;
+                bottom: 50px; right: 10px; width: 200px;
+                background-color: white; border:2px solid grey; z-index:9999;
                 font-size:11px; padding: 10px; opacity: 0.9;">
         <h5 style="margin: 0 0 10px 0;">📊 Análise de Tendências</h5>
         <p style="margin: 5px 0;">
@@ -639,43 +862,80 @@ def criar_graficos_serie_temporal():
     </div>
     '''
     m.get_root().html.add_child(folium.Element(legenda_html))
-    
-    # Salvar
-    m.save('mapa_serie_temporal.html')
-    print("✅ Mapa com gráficos temporais criado: mapa_serie_temporal.html")
+
+    with medir('folium_render', 'render', arquivo='mapa_serie_temporal.html'):
+        html = m.get_root().render()
+    print("✅ Mapa com gráficos temporais pronto: mapa_serie_temporal.html")
     print("   Clique nos marcadores para ver a evolução dos índices")
+    return {'mapa_serie_temporal.html': html}
 
 # ============================================================================
 # EXECUTAR TODAS AS VISUALIZAÇÕES
 # ============================================================================
 
-def main():
+# Produtos gerados a partir da série: nome -> (função, opções de main que ela
+# recebe). Cada função devolve {arquivo: conteúdo} sem gravar nada e roda como
+# trabalho independente (trabalhos_render); para um produto novo, basta
+# acrescentá-lo aqui.
+PRODUTOS = {
+    'slider': (criar_mapa_slider_temporal, ('sidecar',)),
+    'comparacao': (criar_mapa_comparacao_lado_a_lado, ()),
+    'serie': (criar_graficos_serie_temporal, ()),
+}
+
+
+def main(fonte='auto', sidecar=False, trabalhadores=None):
     """
-    Função principal - gera todas as 3 visualizações
+    Função principal - lê os registros uma vez e gera as visualizações em paralelo
     """
     print("\n" + "="*70)
-    print("   INICIANDO GERAÇÃO DAS 3 VISUALIZAÇÕES TEMPORAIS")
+    print("   GERADOR DE VISUALIZAÇÕES TEMPORAIS - PELD SC")
     print("="*70)
-    
-    # Opção 1
-    criar_mapa_slider_temporal()
-    
-    # Opção 2
-    criar_mapa_comparacao_lado_a_lado()
-    
-    # Opção 3
-    criar_graficos_serie_temporal()
-    
+
+    registros, simulado = carregar_registros(fonte)
+    serie = organizar_serie(registros, simulado)
+
+    if not serie['periodos']:
+        print("\n❌ Nenhum registro disponível para gerar os mapas")
+        return
+
+    origem = "simulados" if simulado else "do armazém de estatísticas"
+    print(f"\n📊 Dados {origem}: {len(serie['periodos'])} períodos ({intervalo_anos(serie)})")
+    print(f"🏞️  Parques: {', '.join(serie['zonas'])}")
+    print(f"📈 Índices: {', '.join(serie['indices'])}\n")
+
+    print("\n" + "="*70)
+    print(f"   INICIANDO GERAÇÃO DAS {len(PRODUTOS)} VISUALIZAÇÕES TEMPORAIS")
+    print("="*70)
+
+    opcoes = {'sidecar': sidecar}
+    trabalhos = {nome: (funcao, (serie,), {op: opcoes[op] for op in parametros})
+                 for nome, (funcao, parametros) in PRODUTOS.items()}
+    trabalhos_render.executar(trabalhos, trabalhadores)
+
     print("\n" + "="*70)
     print("   ✅ TODAS AS VISUALIZAÇÕES FORAM CRIADAS COM SUCESSO!")
     print("="*70)
     print("\n📂 Arquivos gerados:")
     print("   1. mapa_slider_temporal.html - Navegação temporal com slider")
-    print("   2. mapa_comparacao_lado_a_lado.html - Comparação 2020 vs 2024")
+    print(f"   2. mapa_comparacao_lado_a_lado.html - Comparação {serie['anos'][0]} vs {serie['anos'][-1]}")
     print("   3. mapa_serie_temporal.html - Gráficos de evolução temporal")
     print("\n💡 Dica: Abra cada arquivo no navegador para explorar!")
-    print("\n⚠️  NOTA: Dados são simulados para demonstração.")
-    print("   Para dados reais, use o script 'baixar_landsat_temporal.py'")
+    if simulado:
+        print("\n⚠️  NOTA: Dados são simulados para demonstração.")
+        print("   Para dados reais, use o script 'baixar_landsat_temporal.py'")
+        print("   e processe as imagens com 'extrair_estatisticas_indices.py'")
 
 if __name__ == "__main__":
-    main()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Gera os mapas temporais dos índices de vegetação")
+    parser.add_argument('--fonte', choices=['auto', 'armazem', 'simulado'], default='auto',
+                        help="origem dos registros (padrão: armazém se tiver 2+ períodos)")
+    parser.add_argument('--sidecar', action='store_true',
+                        help="slider com dados por período em JSON externo, carregados sob demanda")
+    parser.add_argument('--trabalhadores', type=int, default=None,
+                        help="processos para gerar os mapas (padrão: um por visualização, até o nº de CPUs)")
+    args = parser.parse_args()
+    iniciar(__file__)
+    main(fonte=args.fonte, sidecar=args.sidecar, trabalhadores=args.trabalhadores)
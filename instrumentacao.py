@@ -0,0 +1,443 @@
+"""
+Instrumentação leve do pipeline PELD: tempo, CPU, memória e E/S por etapa
+
+Uso nos scripts:
+
+    from instrumentacao import medir, iniciar
+    iniciar('gerar_mapa_peld')             # grava o relatório ao sair
+
+    with medir('read_file', 'vetor', arquivo='PARNASJlimites.shp'):
+        gdf = gpd.read_file(...)
+
+    @medir('extrair_estatisticas', 'raster')
+    def extrair(...): ...
+
+Cada trecho medido registra tempo de parede, tempo de CPU, pico de memória
+residente (e quanto o pico subiu dentro do trecho) e bytes lidos/gravados.
+Trechos podem ser aninhados. A categoria ('vetor', 'raster', 'render', 'dados')
+permite ver se o gargalo está no lado raster ou vetorial.
+
+Módulos podem registrar contadores próprios (registrar_contadores), como os
+acertos do cache de blocos de leitor_raster.py, que entram no relatório.
+Trechos medidos em processos filhos voltam ao relatório do processo principal
+com exportar_trechos()/incorporar_trechos() (ver trabalhos_render.py).
+
+Os relatórios (JSON + HTML) vão para relatorios_execucao/, ou para a pasta em
+PELD_RELATORIOS (usada por construir_site.py para juntar uma construção).
+"""
+
+import atexit
+import html
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import ContextDecorator
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+PASTA_RELATORIOS = 'relatorios_execucao'
+
+_trechos = []
+_trava = threading.Lock()
+_local = threading.local()
+_inicio_execucao = time.perf_counter()
+_inicio_cpu = time.process_time()
+# Script cujo relatório está aberto (iniciar) e se o atexit já foi registrado
+_script = None
+_registrado = False
+_ids = itertools.count()
+# Fontes de contadores incluídas no relatório (ex.: acertos do cache de blocos)
+_contadores = {}
+
+
+def pico_memoria():
+    """
+    Pico de memória residente do processo até agora, em bytes (ou None)
+    """
+    if resource is not None:
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux informa em KB, macOS em bytes
+        return pico if sys.platform == 'darwin' else pico * 1024
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss)
+    return None
+
+
+def bytes_es():
+    """
+    Bytes lidos e gravados pelo processo até agora (leitura, escrita) ou (None, None)
+
+    Conta toda leitura/escrita do processo, inclusive as servidas pelo cache
+    do sistema, que é o que importa para comparar execuções.
+    """
+    try:
+        with open('/proc/self/io', 'r') as f:
+            campos = dict(linha.split(':') for linha in f if ':' in linha)
+        return int(campos['rchar']), int(campos['wchar'])
+    except (OSError, KeyError, ValueError):
+        pass
+    if psutil is not None:
+        try:
+            io = psutil.Process().io_counters()
+            return io.read_bytes, io.write_bytes
+        except (AttributeError, psutil.Error):
+            pass
+    return None, None
+
+
+def _diferenca(fim, inicio):
+    return None if fim is None or inicio is None else fim - inicio
+
+
+def _megabytes(n):
+    return None if n is None else round(n / 2**20, 1)
+
+
+class medir(ContextDecorator):
+    """
+    Mede um trecho do pipeline; funciona com 'with' e como decorador
+    """
+
+    def __init__(self, nome, categoria=None, **atributos):
+        self.nome = nome
+        self.categoria = categoria
+        self.atributos = atributos
+
+    def __enter__(self):
+        pilha = getattr(_local, 'pilha', None)
+        if pilha is None:
+            pilha = _local.pilha = []
+        leitura, escrita = bytes_es()
+        pilha.append({
+            'id': next(_ids),
+            'pai': pilha[-1]['id'] if pilha else None,
+            'profundidade': len(pilha),
+            'parede': time.perf_counter(),
+            'cpu': time.process_time(),
+            'pico': pico_memoria(),
+            'leitura': leitura,
+            'escrita': escrita,
+        })
+        return self
+
+    def __exit__(self, tipo, valor, tb):
+        marca = _local.pilha.pop()
+        parede = time.perf_counter() - marca['parede']
+        cpu = time.process_time() - marca['cpu']
+        pico = pico_memoria()
+        leitura, escrita = bytes_es()
+        with _trava:
+            _trechos.append({
+                'id': marca['id'],
+                'pai': marca['pai'],
+                'profundidade': marca['profundidade'],
+                'nome': self.nome,
+                'categoria': self.categoria,
+                'inicio_s': round(marca['parede'] - _inicio_execucao, 4),
+                'parede_s': round(parede, 4),
+                'cpu_s': round(cpu, 4),
+                'pico_memoria_mb': _megabytes(pico),
+                'aumento_pico_mb': _megabytes(_diferenca(pico, marca['pico'])),
+                'leitura_bytes': _diferenca(leitura, marca['leitura']),
+                'escrita_bytes': _diferenca(escrita, marca['escrita']),
+                'erro': tipo.__name__ if tipo else None,
+                'atributos': {k: str(v) for k, v in self.atributos.items()},
+            })
+        return False
+
+
+def trechos():
+    """
+    Trechos medidos até agora, na ordem em que começaram
+    """
+    with _trava:
+        return sorted(_trechos, key=lambda t: (t['inicio_s'], t['profundidade']))
+
+
+def exportar_trechos():
+    """
+    Retira os trechos medidos neste processo, com o início em relógio
+    absoluto (perf_counter), para incorporar_trechos() em outro processo
+    """
+    with _trava:
+        lista = list(_trechos)
+        _trechos.clear()
+    return [dict(t, inicio_s=t['inicio_s'] + _inicio_execucao) for t in lista]
+
+
+def incorporar_trechos(lista, **atributos):
+    """
+    Inclui no relatório deste processo os trechos de um processo filho (exportar_trechos)
+    """
+    with _trava:
+        novos_ids = {t['id']: next(_ids) for t in lista}
+        for t in lista:
+            _trechos.append(dict(t, id=novos_ids[t['id']], pai=novos_ids.get(t['pai']),
+                                 inicio_s=round(t['inicio_s'] - _inicio_execucao, 4),
+                                 atributos={**t['atributos'], **{k: str(v) for k, v in atributos.items()}}))
+
+
+def resumo_categorias(lista):
+    """
+    Tempo por categoria, sem contar duas vezes trechos aninhados da mesma categoria
+    """
+    por_id = {t['id']: t for t in lista}
+    resumo = {}
+    for t in lista:
+        if not t['categoria']:
+            continue
+        pai = por_id.get(t['pai'])
+        while pai is not None and pai['categoria'] != t['categoria']:
+            pai = por_id.get(pai['pai'])
+        if pai is not None:
+            continue
+        r = resumo.setdefault(t['categoria'], {'parede_s': 0.0, 'cpu_s': 0.0, 'leitura_bytes': 0})
+        r['parede_s'] = round(r['parede_s'] + t['parede_s'], 4)
+        r['cpu_s'] = round(r['cpu_s'] + t['cpu_s'], 4)
+        r['leitura_bytes'] += t['leitura_bytes'] or 0
+    return resumo
+
+
+def registrar_contadores(nome, funcao):
+    """
+    Inclui no relatório o dicionário retornado por funcao() no momento da gravação
+    """
+    _contadores[nome] = funcao
+
+
+def relatorio(script):
+    lista = trechos()
+    return {
+        'script': script,
+        'gerado_em': datetime.now().isoformat(timespec='seconds'),
+        'total_parede_s': round(time.perf_counter() - _inicio_execucao, 4),
+        'total_cpu_s': round(time.process_time() - _inicio_cpu, 4),
+        'pico_memoria_mb': _megabytes(pico_memoria()),
+        'categorias': resumo_categorias(lista),
+        'contadores': {nome: funcao() for nome, funcao in _contadores.items()},
+        'trechos': lista,
+    }
+
+
+def formatar_bytes(n):
+    if n is None:
+        return '—'
+    for unidade in ('B', 'KB', 'MB', 'GB'):
+        if abs(n) < 1024 or unidade == 'GB':
+            return f"{n:,.0f} {unidade}" if unidade == 'B' else f"{n:,.1f} {unidade}"
+        n /= 1024
+
+
+def _linhas_trechos(lista, escala):
+    linhas = []
+    for t in lista:
+        largura = 100 * t['parede_s'] / escala if escala else 0
+        atributos = ', '.join(f"{k}={v}" for k, v in t['atributos'].items())
+        linhas.append(f"""
+        <tr class="{'erro' if t['erro'] else ''}">
+            <td style="padding-left: {8 + 18 * t['profundidade']}px">{html.escape(t['nome'])}
+                <small>{html.escape(atributos)}</small></td>
+            <td>{html.escape(t['categoria'] or '')}</td>
+            <td class="n">{t['parede_s']:.3f}</td>
+            <td class="n">{t['cpu_s']:.3f}</td>
+            <td class="n">{t['pico_memoria_mb'] if t['pico_memoria_mb'] is not None else '—'}</td>
+            <td class="n">{t['aumento_pico_mb'] if t['aumento_pico_mb'] is not None else '—'}</td>
+            <td class="n">{formatar_bytes(t['leitura_bytes'])}</td>
+            <td class="n">{formatar_bytes(t['escrita_bytes'])}</td>
+            <td><div class="barra" style="width: {largura:.1f}%"></div></td>
+        </tr>""")
+    return ''.join(linhas)
+
+
+def _tabela_categorias(categorias):
+    linhas = ''.join(
+        f"<tr><td>{html.escape(c)}</td><td class=\"n\">{r['parede_s']:.3f}</td>"
+        f"<td class=\"n\">{r['cpu_s']:.3f}</td><td class=\"n\">{formatar_bytes(r['leitura_bytes'])}</td></tr>"
+        for c, r in sorted(categorias.items(), key=lambda item: -item[1]['parede_s'])
+    )
+    return f"""
+    <table>
+        <tr><th>Categoria</th><th>Parede (s)</th><th>CPU (s)</th><th>Lido</th></tr>{linhas}
+    </table>"""
+
+
+def _tabela_contadores(contadores):
+    if not contadores:
+        return ''
+    linhas = ''.join(
+        f"<tr><td>{html.escape(nome)}</td><td>{html.escape(', '.join(f'{k}={v}' for k, v in valores.items()))}</td></tr>"
+        for nome, valores in contadores.items()
+    )
+    return f"""
+    <table>
+        <tr><th>Contadores</th><th></th></tr>{linhas}
+    </table>"""
+
+
+ESTILO_HTML = """
+    body { font-family: Arial, sans-serif; margin: 20px; color: #2c3e50; }
+    table { border-collapse: collapse; margin-bottom: 25px; font-size: 13px; }
+    th, td { border-bottom: 1px solid #eee; padding: 4px 8px; text-align: left; }
+    th { background: #2c3e50; color: white; }
+    td.n { text-align: right; font-family: monospace; }
+    td small { color: #7f8c8d; }
+    tr.erro td { background: #fdecea; }
+    .barra { background: #3498db; height: 10px; min-width: 1px; }
+    .pior { color: #c0392b; font-weight: bold; }
+    .melhor { color: #27ae60; }
+"""
+
+
+def html_relatorio(dados):
+    lista = dados['trechos']
+    escala = max((t['parede_s'] for t in lista), default=0)
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Execução: {html.escape(dados['script'])}</title>
+<style>{ESTILO_HTML}</style></head>
+<body>
+    <h2>⏱️ {html.escape(dados['script'])}</h2>
+    <p>{dados['gerado_em']} · parede {dados['total_parede_s']:.2f}s · CPU {dados['total_cpu_s']:.2f}s ·
+       pico de memória {dados['pico_memoria_mb'] if dados['pico_memoria_mb'] is not None else '—'} MB</p>
+    {_tabela_categorias(dados['categorias'])}
+    {_tabela_contadores(dados.get('contadores'))}
+    <table>
+        <tr><th>Trecho</th><th>Categoria</th><th>Parede (s)</th><th>CPU (s)</th><th>Pico (MB)</th>
+            <th>+Pico (MB)</th><th>Lido</th><th>Gravado</th><th></th></tr>{_linhas_trechos(lista, escala)}
+    </table>
+</body></html>
+"""
+
+
+def salvar_relatorio(script, pasta=None):
+    """
+    Grava <pasta>/<script>.json e .html e retorna o caminho do JSON
+    """
+    pasta = pasta or os.environ.get('PELD_RELATORIOS', PASTA_RELATORIOS)
+    os.makedirs(pasta, exist_ok=True)
+    dados = relatorio(script)
+    caminho = os.path.join(pasta, f"{script}.json")
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(dados, f, indent=2, ensure_ascii=False)
+    with open(os.path.join(pasta, f"{script}.html"), 'w', encoding='utf-8') as f:
+        f.write(html_relatorio(dados))
+    return caminho
+
+
+def _construcao_anterior(pasta):
+    """
+    Relatório da construção anterior à da pasta informada, para comparação
+    """
+    raiz, atual = os.path.split(os.path.normpath(pasta))
+    anteriores = sorted(d for d in os.listdir(raiz or '.')
+                        if d < atual and os.path.exists(os.path.join(raiz, d, 'construcao.json')))
+    if not anteriores:
+        return None
+    with open(os.path.join(raiz, anteriores[-1], 'construcao.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def salvar_relatorio_construcao(pasta, etapas):
+    """
+    Junta os relatórios dos scripts de uma construção em construcao.json/.html
+
+    etapas: {nome: {'script', 'codigo', 'parede_s'}} como medido pelo
+    orquestrador; o tempo de cada etapa é comparado com a construção anterior.
+    """
+    os.makedirs(pasta, exist_ok=True)
+    anterior = _construcao_anterior(pasta)
+    tempos_anteriores = {nome: e['parede_s'] for nome, e in (anterior or {}).get('etapas', {}).items()}
+    categorias = {}
+    for nome, etapa in etapas.items():
+        script = os.path.splitext(etapa['script'])[0]
+        caminho = os.path.join(pasta, f"{script}.json")
+        if os.path.exists(caminho):
+            with open(caminho, 'r', encoding='utf-8') as f:
+                dados = json.load(f)
+            etapa['pico_memoria_mb'] = dados['pico_memoria_mb']
+            etapa['categorias'] = dados['categorias']
+            etapa['relatorio'] = f"{script}.html"
+            for categoria, r in dados['categorias'].items():
+                total = categorias.setdefault(categoria, {'parede_s': 0.0, 'cpu_s': 0.0, 'leitura_bytes': 0})
+                total['parede_s'] = round(total['parede_s'] + r['parede_s'], 4)
+                total['cpu_s'] = round(total['cpu_s'] + r['cpu_s'], 4)
+                total['leitura_bytes'] += r['leitura_bytes']
+        if nome in tempos_anteriores:
+            etapa['parede_anterior_s'] = tempos_anteriores[nome]
+
+    construcao = {
+        'gerado_em': datetime.now().isoformat(timespec='seconds'),
+        'etapas': etapas,
+        'categorias': categorias,
+    }
+    with open(os.path.join(pasta, 'construcao.json'), 'w', encoding='utf-8') as f:
+        json.dump(construcao, f, indent=2, ensure_ascii=False)
+
+    linhas = []
+    for nome, e in etapas.items():
+        variacao = ''
+        if e.get('parede_anterior_s'):
+            delta = (e['parede_s'] - e['parede_anterior_s']) / e['parede_anterior_s'] * 100
+            classe = 'pior' if delta > 20 else 'melhor' if delta < -20 else ''
+            variacao = f'<span class="{classe}">{delta:+.0f}%</span>'
+        link = f'<a href="{e["relatorio"]}">detalhes</a>' if 'relatorio' in e else ''
+        linhas.append(
+            f"<tr class=\"{'erro' if e['codigo'] else ''}\"><td>{html.escape(nome)}</td>"
+            f"<td class=\"n\">{e['parede_s']:.2f}</td><td class=\"n\">{variacao}</td>"
+            f"<td class=\"n\">{e.get('pico_memoria_mb') or '—'}</td><td>{link}</td></tr>"
+        )
+    with open(os.path.join(pasta, 'construcao.html'), 'w', encoding='utf-8') as f:
+        f.write(f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Construção {construcao['gerado_em']}</title>
+<style>{ESTILO_HTML}</style></head>
+<body>
+    <h2>🔨 Construção {construcao['gerado_em']}</h2>
+    {_tabela_categorias(categorias)}
+    <table>
+        <tr><th>Etapa</th><th>Parede (s)</th><th>vs. anterior</th><th>Pico (MB)</th><th></th></tr>
+        {''.join(linhas)}
+    </table>
+</body></html>
+""")
+    return os.path.join(pasta, 'construcao.html')
+
+
+def encerrar():
+    """
+    Grava o relatório do script aberto e recomeça a contagem do zero
+
+    Chamado ao fim do processo e, em peld.py, entre scripts executados no
+    mesmo processo, para que cada um tenha o seu relatório.
+    """
+    global _script, _inicio_execucao, _inicio_cpu
+    if _script and _trechos:
+        caminho = salvar_relatorio(_script)
+        print(f"⏱️  Relatório de execução: {caminho}")
+    with _trava:
+        _trechos.clear()
+    _script = None
+    _inicio_execucao = time.perf_counter()
+    _inicio_cpu = time.process_time()
+
+
+def iniciar(script):
+    """
+    Registra a gravação do relatório do script ao fim do processo
+    """
+    global _script, _registrado
+    _script = os.path.splitext(os.path.basename(script))[0]
+    if not _registrado:
+        atexit.register(encerrar)
+        _registrado = True
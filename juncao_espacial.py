@@ -0,0 +1,230 @@
+"""
+Junção espacial das parcelas PPBio com os parques e municípios
+
+Monta um índice espacial (STRtree) sobre os polígonos das zonas, com as
+geometrias preparadas, e atribui todas as parcelas de uma vez: uma única
+consulta vetorizada para a tabela inteira, em vez de testar cada parcela
+contra cada polígono. Continua rápido com dezenas de milhares de parcelas
+e os 295 municípios de SC.
+
+Cada parcela recebe o parque e o município em que cai e as médias de
+NDVI/EVI mais recentes do parque (armazém de estatísticas). As zonas vêm
+do GeoPackage de camadas_vetoriais.py, lidas só na extensão das parcelas
+(bbox sobre o índice R-tree). O resultado vai para parcelas_zonas.csv e
+é usado nos popups de gerar_mapa_peld.py.
+
+Uso:
+    python juncao_espacial.py
+    python juncao_espacial.py --municipios municipios_sc.geojson
+"""
+
+import argparse
+import os
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from shapely.strtree import STRtree
+
+import armazem_estatisticas as armazem
+from camadas_vetoriais import extensao, ler_camada
+from instrumentacao import medir, iniciar
+from parcelas import ARQUIVO_PARCELAS, carregar_parcelas
+
+CAMPO_MUNICIPIO = 'NM_MUN'
+ARQUIVO_SAIDA = 'parcelas_zonas.csv'
+
+# Zona -> camada do GeoPackage (camadas_vetoriais.py)
+PARQUES = {
+    'PNSJ': 'pnsj',
+    'PESF': 'pesf',
+}
+
+INDICES_PARCELAS = ('NDVI', 'EVI')
+
+
+class IndiceZonas:
+    """
+    Índice espacial sobre polígonos de zonas de vários tipos (parque, município)
+
+    Uso:
+        indice = IndiceZonas()
+        indice.adicionar('parque', gdf_pnsj, nome='PNSJ')
+        indice.adicionar('municipio', gdf_cidades, campo='NM_MUN')
+        zonas = indice.atribuir(df['long'], df['lat'])   # {'parque': [...], 'municipio': [...]}
+    """
+
+    def __init__(self):
+        self.geometrias = []
+        self.tipos = []
+        self.nomes = []
+        self._arvore = None
+
+    def adicionar(self, tipo, gdf, nome=None, campo=None):
+        """
+        Inclui as feições do GeoDataFrame (em EPSG:4326) como zonas do tipo dado;
+        o nome vem de 'nome' (fixo) ou da coluna 'campo'
+        """
+        if gdf is None or gdf.empty:
+            return
+        if gdf.crs is not None and gdf.crs.to_epsg() != 4326:
+            gdf = gdf.to_crs(epsg=4326)
+        nomes = [nome] * len(gdf) if nome is not None else gdf[campo].astype(str).tolist()
+        for geometria, nome_zona in zip(gdf.geometry, nomes):
+            if geometria is None or geometria.is_empty:
+                continue
+            self.geometrias.append(geometria)
+            self.tipos.append(tipo)
+            self.nomes.append(nome_zona)
+        self._arvore = None
+
+    def arvore(self):
+        if self._arvore is None:
+            geometrias = np.array(self.geometrias, dtype=object)
+            # Preparar acelera os predicados repetidos sobre o mesmo polígono
+            shapely.prepare(geometrias)
+            self._arvore = STRtree(geometrias)
+        return self._arvore
+
+    def atribuir(self, lon, lat):
+        """
+        Zonas de cada ponto, por tipo: {tipo: lista de nomes ('' se nenhuma,
+        nomes unidos por '; ' quando o ponto cai em mais de uma)}
+        """
+        lon = np.asarray(lon, dtype=float)
+        lat = np.asarray(lat, dtype=float)
+        resultado = {tipo: [''] * len(lon) for tipo in dict.fromkeys(self.tipos)}
+        if not self.geometrias or not len(lon):
+            return resultado
+
+        with medir('strtree_query', 'vetor', pontos=len(lon), zonas=len(self.geometrias)):
+            pontos = shapely.points(lon, lat)
+            # Pares (ponto, zona) em uma única consulta vetorizada
+            i_pontos, i_zonas = self.arvore().query(pontos, predicate='intersects')
+
+        encontrados = {}
+        for i, z in zip(i_pontos.tolist(), i_zonas.tolist()):
+            nomes = encontrados.setdefault((self.tipos[z], i), [])
+            if self.nomes[z] not in nomes:
+                nomes.append(self.nomes[z])
+        for (tipo, i), nomes in encontrados.items():
+            resultado[tipo][i] = '; '.join(nomes)
+        return resultado
+
+
+def carregar_geojson(caminho, bbox=None):
+    if not os.path.exists(caminho):
+        print(f"   ⚠️  Não encontrado: {caminho}")
+        return None
+    with medir('read_file', 'vetor', arquivo=caminho, bbox=bbox is not None):
+        return gpd.read_file(caminho, bbox=bbox)
+
+
+def carregar_camada(nome, bbox=None):
+    try:
+        return ler_camada(nome, bbox=bbox)
+    except Exception as e:
+        print(f"   ⚠️  Camada {nome} indisponível: {e}")
+        return None
+
+
+def indice_padrao(municipios=None, campo_municipio=CAMPO_MUNICIPIO, bbox=None):
+    """
+    Índice com os dois parques e os municípios (camada 'cidades' ou o
+    GeoJSON informado); com bbox, só as feições que cruzam a extensão
+    """
+    indice = IndiceZonas()
+    for zona, camada in PARQUES.items():
+        indice.adicionar('parque', carregar_camada(camada, bbox), nome=zona)
+    gdf_municipios = carregar_geojson(municipios, bbox) if municipios else carregar_camada('cidades', bbox)
+    indice.adicionar('municipio', gdf_municipios, campo=campo_municipio)
+    return indice
+
+
+def medias_por_zona(caminho=armazem.ARQUIVO_ARMAZEM):
+    """
+    Média mais recente de cada índice por zona: {zona: {indice: (valor, data)}}
+    """
+    if not os.path.exists(caminho):
+        return {}
+    con = armazem.conectar(caminho)
+    medias = {}
+    # consultar() ordena por data: a última atribuição é a mais recente
+    for linha in armazem.consultar(con):
+        medias.setdefault(linha['zona'], {})[linha['indice']] = (linha['media'], linha['data_aquisicao'])
+    con.close()
+    return medias
+
+
+def anexar_zonas(df, indice, medias=None):
+    """
+    Acrescenta ao DataFrame de parcelas as colunas parque, municipio e as
+    médias de NDVI/EVI do parque (com a data de aquisição)
+    """
+    zonas = indice.atribuir(df['long'], df['lat'])
+    df = df.copy()
+    df['parque'] = zonas.get('parque', [''] * len(df))
+    df['municipio'] = zonas.get('municipio', [''] * len(df))
+
+    medias = medias if medias is not None else medias_por_zona()
+    for nome_indice in INDICES_PARCELAS:
+        coluna = nome_indice.lower()
+        # Parcela em mais de um parque: usa o primeiro
+        valores = [medias.get(p.split('; ')[0], {}).get(nome_indice) for p in df['parque']]
+        df[f"{coluna}_parque"] = [round(v[0], 3) if v else np.nan for v in valores]
+        df[f"data_{coluna}"] = [v[1] if v else '' for v in valores]
+    return df
+
+
+def popup_zonas(linha):
+    """
+    Linhas extras do popup de uma parcela com as colunas de anexar_zonas()
+    """
+    partes = [
+        f"<b>Parque:</b> {linha['parque'] or 'fora dos parques'}<br>",
+        f"<b>Município:</b> {linha['municipio'] or '—'}<br>",
+    ]
+    for nome_indice in INDICES_PARCELAS:
+        valor = linha.get(f"{nome_indice.lower()}_parque")
+        if valor is not None and not pd.isna(valor):
+            partes.append(f"<b>{nome_indice} do parque:</b> {valor:.3f} "
+                          f"({linha[f'data_{nome_indice.lower()}']})<br>")
+    return ''.join(partes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Atribui as parcelas PPBio aos parques e municípios")
+    parser.add_argument('--parcelas', default=ARQUIVO_PARCELAS)
+    parser.add_argument('--municipios',
+                        help="GeoJSON dos municípios (ex.: os 295 de SC); padrão: camada 'cidades'")
+    parser.add_argument('--campo-municipio', default=CAMPO_MUNICIPIO)
+    parser.add_argument('--saida', default=ARQUIVO_SAIDA)
+    args = parser.parse_args()
+
+    print("\n" + "="*70)
+    print("   JUNÇÃO ESPACIAL: PARCELAS × PARQUES × MUNICÍPIOS")
+    print("="*70)
+
+    df = carregar_parcelas(args.parcelas)
+    print(f"\n📍 {len(df):,} parcelas")
+
+    # Só as zonas em torno das parcelas são lidas
+    indice = indice_padrao(args.municipios, args.campo_municipio, extensao(df['long'], df['lat']))
+    print(f"🗺️  {len(indice.geometrias):,} polígonos de zonas no índice")
+
+    df = anexar_zonas(df, indice)
+    with medir('to_csv', 'dados', arquivo=args.saida):
+        df.to_csv(args.saida, index=False, encoding='utf-8')
+
+    print("\n📊 Parcelas por parque:")
+    for parque, n in df['parque'].replace('', 'fora dos parques').value_counts().items():
+        print(f"   • {parque}: {n:,}")
+    print(f"\n🏘️  Parcelas em {df.loc[df['municipio'] != '', 'municipio'].nunique()} municípios; "
+          f"{(df['municipio'] == '').sum():,} fora dos municípios carregados")
+    print(f"\n✅ Tabela salva em: {args.saida}")
+
+
+if __name__ == "__main__":
+    iniciar(__file__)
+    main()
@@ -0,0 +1,610 @@
+"""
+Leitura dos rasters de índices: cache de blocos decodificados e cache local
+mapeado em memória
+
+LeitorRaster abre o GeoTIFF com o rasterio, mas monta cada leitura a partir
+dos blocos internos do arquivo, guardados já decodificados num cache LRU do
+processo (limitado em bytes, PELD_CACHE_BLOCOS_MB, padrão 256 MB) com chave
+(arquivo, banda, bloco, nível de overview). Estatísticas zonais, prévias e
+amostragem da mesma cena no mesmo processo descomprimem cada bloco uma vez;
+os acertos/faltas entram no relatório de execução (instrumentacao.py).
+
+Cada GeoTIFF (comprimido) é convertido uma única vez num arquivo binário sem
+compressão em .cache_rasters/, com as linhas alinhadas a blocos de 256 pixels
+e a páginas de 4 KB, mais um JSON ao lado com transform, CRS, nodata e a
+identificação do arquivo de origem. As leituras seguintes devolvem visões
+NumPy diretamente sobre o mapa de memória (sem cópia e sem descompressão):
+repetir análises sobre a mesma cena não gera E/S depois da primeira passada.
+
+Para as sobreposições dos mapas, mercator() reprojeta cada raster uma única
+vez para Web Mercator (EPSG:3857, a projeção do Leaflet), numa grade reduzida
+para exibição guardada em .cache_rasters/ (.npy + JSON) até o GeoTIFF mudar,
+com os limites em graus calculados sobre as bordas densificadas.
+
+Rasters no formato compacto (int16 com escala, formato_indices.py) são
+lidos de forma transparente: os blocos ficam em int16 no cache e a leitura
+devolve float32 já escalado, com NaN onde não há dado.
+
+LeitorRaster e RasterMapeado expõem o mesmo subconjunto da interface do
+rasterio usado pelo pipeline (read com window, transform, nodata,
+window_transform...), então funcionam com rasterio.mask.mask e com os
+leitores existentes.
+
+Uso:
+    with abrir('Indice_vegetacao/NDVI_2025_06_25.tif') as src:     # cache de blocos
+        dados = src.read(1, window=Window(0, 0, 512, 512))
+
+    with abrir('Indice_vegetacao/NDVI_2025_06_25.tif', mapeado=True) as src:
+        dados = src.read(1, window=Window(0, 0, 512, 512))   # visão, sem cópia
+
+    python leitor_raster.py converter Indice_vegetacao/*.tif
+    python leitor_raster.py listar
+    python leitor_raster.py limpar
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import rasterio
+from affine import Affine
+from rasterio.coords import BoundingBox
+from rasterio.crs import CRS
+from rasterio.enums import Resampling
+from rasterio.transform import from_bounds
+from rasterio.warp import reproject, transform_bounds
+from rasterio.windows import Window, transform as transform_janela
+
+from instrumentacao import medir, registrar_contadores
+
+PASTA_CACHE = '.cache_rasters'
+TAMANHO_BLOCO = 256
+TAMANHO_PAGINA = 4096
+# Linhas lidas do GeoTIFF por vez na conversão (limita a memória usada)
+LINHAS_CONVERSAO = 1024
+TAMANHO_CACHE_BLOCOS = int(os.environ.get('PELD_CACHE_BLOCOS_MB', 256)) * 2**20
+EPSG_WEB_MERCATOR = 3857
+# Lado maior (pixels) da grade em Web Mercator usada nas sobreposições
+LADO_MERCATOR = 1024
+# Pontos por borda ao transformar a área do raster (a projeção curva as bordas)
+PONTOS_BORDA = 21
+
+
+def _arredondar(valor, multiplo):
+    return -(-valor // multiplo) * multiplo
+
+
+def _nomes_cache(caminho, pasta):
+    """
+    Arquivos do cache (.bin, .json) para um raster, pelo caminho absoluto
+    """
+    absoluto = os.path.abspath(caminho)
+    chave = hashlib.sha1(absoluto.encode('utf-8')).hexdigest()[:10]
+    base = os.path.join(pasta, f"{os.path.splitext(os.path.basename(caminho))[0]}.{chave}")
+    return base + '.bin', base + '.json'
+
+
+def _identificacao(caminho):
+    st = os.stat(caminho)
+    return {'caminho': os.path.abspath(caminho), 'tamanho': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def _ler_meta(caminho_json):
+    try:
+        with open(caminho_json, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def converter(caminho, pasta=PASTA_CACHE):
+    """
+    Converte o raster para o cache mapeável, se ainda não estiver atualizado;
+    retorna o caminho do JSON de metadados
+    """
+    caminho_bin, caminho_json = _nomes_cache(caminho, pasta)
+    meta = _ler_meta(caminho_json)
+    if meta and meta['fonte'] == _identificacao(caminho) and os.path.exists(caminho_bin):
+        return caminho_json
+
+    os.makedirs(pasta, exist_ok=True)
+    with rasterio.open(caminho) as src:
+        dtype = np.dtype(src.dtypes[0])
+        # Largura múltipla do bloco e de uma página: toda linha começa alinhada
+        alinhamento = int(np.lcm(TAMANHO_BLOCO, max(TAMANHO_PAGINA // dtype.itemsize, 1)))
+        forma = (src.count, _arredondar(src.height, TAMANHO_BLOCO), _arredondar(src.width, alinhamento))
+        preenchimento = src.nodata if src.nodata is not None else 0
+
+        mapa = np.memmap(caminho_bin + '.tmp', dtype=dtype, mode='w+', shape=forma)
+        mapa[:, src.height:, :] = preenchimento
+        mapa[:, :, src.width:] = preenchimento
+        for inicio in range(0, src.height, LINHAS_CONVERSAO):
+            altura = min(LINHAS_CONVERSAO, src.height - inicio)
+            mapa[:, inicio:inicio + altura, :src.width] = src.read(window=Window(0, inicio, src.width, altura))
+        mapa.flush()
+        del mapa
+
+        meta = {
+            'fonte': _identificacao(caminho),
+            'dtype': dtype.str,
+            'forma': list(forma),
+            'count': src.count,
+            'width': src.width,
+            'height': src.height,
+            'transform': list(src.transform)[:6],
+            'crs': src.crs.to_wkt() if src.crs else None,
+            'nodata': src.nodata,
+            'escala': list(escala_do_raster(src) or [])[:2] or None,
+        }
+
+    os.replace(caminho_bin + '.tmp', caminho_bin)
+    # O JSON é gravado por último: sua presença indica um cache completo
+    with open(caminho_json + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(caminho_json + '.tmp', caminho_json)
+    return caminho_json
+
+
+def _limites(transform, largura, altura):
+    """
+    (left, bottom, right, top) de uma grade sem rotação
+    """
+    xs = (transform.c, transform.c + transform.a * largura)
+    ys = (transform.f, transform.f + transform.e * altura)
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def _janela_inteira(window, largura, altura):
+    """
+    Fatias (linhas, colunas) de uma janela, arredondada e limitada ao raster
+    """
+    if window is None:
+        return slice(0, altura), slice(0, largura)
+    if not isinstance(window, Window):
+        window = Window.from_slices(*window)
+    window = window.round_offsets().round_lengths()
+    l0, c0 = max(int(window.row_off), 0), max(int(window.col_off), 0)
+    return (slice(l0, min(int(window.row_off + window.height), altura)),
+            slice(c0, min(int(window.col_off + window.width), largura)))
+
+
+def escala_do_raster(src):
+    """
+    (escala, deslocamento, nodata) de um raster inteiro gravado com escala
+    (formato_indices.py), ou None; a escala da banda 1 vale para todas
+    """
+    if np.dtype(src.dtypes[0]).kind not in 'iu':
+        return None
+    escala, deslocamento = src.scales[0], src.offsets[0]
+    if escala == 1 and deslocamento == 0:
+        return None
+    return escala, deslocamento, src.nodata
+
+
+def desescalar(dados, escala, deslocamento, nodata):
+    """
+    Inteiros gravados -> valores em float32, NaN onde nodata
+    """
+    valores = dados.astype(np.float32) * np.float32(escala) + np.float32(deslocamento)
+    if nodata is not None:
+        valores[dados == nodata] = np.nan
+    return valores
+
+
+def _reamostrar(origem, forma, extensao, crs, nodata, resampling):
+    """
+    Reamostra 'origem' (linhas × colunas, ou bandas × linhas × colunas), que
+    cobre 'extensao' pixels do raster, para 'forma' (linhas, colunas)
+    """
+    altura, largura = extensao
+    destino = np.empty((*origem.shape[:-2], *forma), dtype=origem.dtype)
+    reproject(origem, destino,
+              src_transform=Affine.scale(largura / origem.shape[-1], altura / origem.shape[-2]),
+              dst_transform=Affine.scale(largura / forma[1], altura / forma[0]),
+              src_crs=crs or 'EPSG:4326', dst_crs=crs or 'EPSG:4326',
+              src_nodata=nodata, dst_nodata=nodata, resampling=resampling)
+    return destino
+
+
+def _mascarar(dados, nodata):
+    if nodata is None:
+        mascara = np.zeros(dados.shape, dtype=bool)
+    elif np.isnan(nodata):
+        mascara = np.isnan(dados)
+    else:
+        mascara = dados == nodata
+    return np.ma.MaskedArray(dados, mask=mascara, copy=False)
+
+
+class CacheBlocos:
+    """
+    LRU de blocos decodificados, limitado pelo total de bytes, seguro entre threads
+    """
+
+    def __init__(self, limite_bytes=TAMANHO_CACHE_BLOCOS):
+        self.limite_bytes = limite_bytes
+        self.bytes = 0
+        self.acertos = 0
+        self.faltas = 0
+        self.descartes = 0
+        self._blocos = OrderedDict()
+        self._trava = threading.Lock()
+
+    def obter(self, chave, ler):
+        """
+        Bloco da chave; numa falta, chama ler() e guarda o resultado
+        """
+        with self._trava:
+            bloco = self._blocos.get(chave)
+            if bloco is not None:
+                self._blocos.move_to_end(chave)
+                self.acertos += 1
+                return bloco
+            self.faltas += 1
+
+        bloco = ler()
+        # Compartilhado entre leituras: ninguém pode alterá-lo
+        bloco.setflags(write=False)
+        with self._trava:
+            if chave not in self._blocos and bloco.nbytes <= self.limite_bytes:
+                self._blocos[chave] = bloco
+                self.bytes += bloco.nbytes
+                while self.bytes > self.limite_bytes:
+                    _, antigo = self._blocos.popitem(last=False)
+                    self.bytes -= antigo.nbytes
+                    self.descartes += 1
+        return bloco
+
+    def limpar(self):
+        with self._trava:
+            self._blocos.clear()
+            self.bytes = 0
+
+    def estatisticas(self):
+        consultas = self.acertos + self.faltas
+        return {
+            'acertos': self.acertos,
+            'faltas': self.faltas,
+            'taxa_acerto': round(self.acertos / consultas, 3) if consultas else None,
+            'descartes': self.descartes,
+            'blocos': len(self._blocos),
+            'mb': round(self.bytes / 2**20, 1),
+            'limite_mb': round(self.limite_bytes / 2**20, 1),
+        }
+
+
+# Cache único do processo, compartilhado por todos os LeitorRaster
+cache_blocos = CacheBlocos()
+registrar_contadores('cache_blocos', cache_blocos.estatisticas)
+
+
+class LeitorRaster:
+    """
+    GeoTIFF aberto com o rasterio, com as leituras montadas a partir dos
+    blocos do cache. Atributos não definidos aqui (crs, bounds, profile,
+    overviews...) vêm do dataset do rasterio.
+    """
+
+    def __init__(self, caminho, cache=None):
+        self._src = rasterio.open(caminho)
+        self.cache = cache if cache is not None else cache_blocos
+        ident = _identificacao(caminho)
+        # Arquivo alterado = chaves novas; os blocos antigos saem pelo LRU
+        self._chave = (ident['caminho'], ident['mtime_ns'])
+        self._fatores = self._src.overviews(1) if self._src.count else []
+        self._niveis = {0: self._src}
+        self._escala = escala_do_raster(self._src)
+
+    def __getattr__(self, nome):
+        if nome.startswith('__') or '_src' not in self.__dict__:
+            raise AttributeError(nome)
+        return getattr(self._src, nome)
+
+    # Raster com escala: quem lê vê float32 com NaN, não os inteiros gravados
+    @property
+    def nodata(self):
+        return np.nan if self._escala else self._src.nodata
+
+    @property
+    def dtypes(self):
+        return ('float32',) * self._src.count if self._escala else self._src.dtypes
+
+    def _nivel(self, nivel):
+        """
+        Dataset do nível de overview (0 = resolução cheia)
+        """
+        if nivel not in self._niveis:
+            self._niveis[nivel] = rasterio.open(self._src.name, overview_level=nivel - 1)
+        return self._niveis[nivel]
+
+    def _ler_blocos(self, banda, nivel, linhas, colunas):
+        """
+        Monta a janela (fatias no nível dado) copiando dos blocos do cache
+        """
+        src = self._nivel(nivel)
+        altura_bloco, largura_bloco = src.block_shapes[banda - 1]
+        saida = np.empty((linhas.stop - linhas.start, colunas.stop - colunas.start),
+                         dtype=src.dtypes[banda - 1])
+        for lb in range(linhas.start // altura_bloco, -(-linhas.stop // altura_bloco)):
+            for cb in range(colunas.start // largura_bloco, -(-colunas.stop // largura_bloco)):
+                l0, c0 = lb * altura_bloco, cb * largura_bloco
+                janela = Window(c0, l0, min(largura_bloco, src.width - c0), min(altura_bloco, src.height - l0))
+                bloco = self.cache.obter((self._chave, banda, (lb, cb), nivel),
+                                         lambda: src.read(banda, window=janela))
+                # Interseção do bloco com a janela pedida
+                a0, a1 = max(linhas.start, l0), min(linhas.stop, l0 + bloco.shape[0])
+                b0, b1 = max(colunas.start, c0), min(colunas.stop, c0 + bloco.shape[1])
+                saida[a0 - linhas.start:a1 - linhas.start, b0 - colunas.start:b1 - colunas.start] = \
+                    bloco[a0 - l0:a1 - l0, b0 - c0:b1 - c0]
+        return saida
+
+    def _nivel_para(self, decimacao):
+        """
+        Overview mais grosso que ainda tem resolução suficiente para a decimação pedida
+        """
+        nivel = 0
+        for i, fator in enumerate(self._fatores, start=1):
+            if fator <= decimacao:
+                nivel = i
+        return nivel
+
+    def _ler_banda(self, banda, linhas, colunas, forma, resampling):
+        altura, largura = linhas.stop - linhas.start, colunas.stop - colunas.start
+        if forma is None or forma == (altura, largura):
+            return self._ler_blocos(banda, 0, linhas, colunas)
+
+        nivel = self._nivel_para(min(altura / forma[0], largura / forma[1]))
+        if nivel:
+            # Janela correspondente nas coordenadas do overview
+            src = self._nivel(nivel)
+            fy, fx = src.height / self.height, src.width / self.width
+            linhas = slice(int(linhas.start * fy), max(int(np.ceil(linhas.stop * fy)), int(linhas.start * fy) + 1))
+            colunas = slice(int(colunas.start * fx), max(int(np.ceil(colunas.stop * fx)), int(colunas.start * fx) + 1))
+        origem = self._ler_blocos(banda, nivel, linhas, colunas)
+        if origem.shape == forma:
+            return origem
+
+        # Reamostragem da janela lida para o tamanho pedido
+        return _reamostrar(origem, forma, (altura, largura), self.crs, self._src.nodata, resampling)
+
+    def read(self, indexes=None, window=None, out_shape=None, masked=False,
+             resampling=Resampling.nearest, **kwargs):
+        """
+        Como DatasetReader.read; o resultado é sempre uma cópia (os blocos do
+        cache são somente leitura)
+        """
+        linhas, colunas = _janela_inteira(window, self.width, self.height)
+        forma = tuple(out_shape)[-2:] if out_shape is not None else None
+        bandas = [indexes] if isinstance(indexes, int) else (indexes or range(1, self.count + 1))
+        dados = np.stack([self._ler_banda(b, linhas, colunas, forma, resampling) for b in bandas])
+        if self._escala:
+            dados = desescalar(dados, *self._escala)
+        if isinstance(indexes, int):
+            dados = dados[0]
+        return _mascarar(dados, self.nodata) if masked else dados
+
+    def close(self):
+        for src in self._niveis.values():
+            src.close()
+        self._niveis = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class RasterMapeado:
+    """
+    Raster do cache, aberto como memmap somente leitura, com a interface de
+    leitura do rasterio usada pelo pipeline
+    """
+
+    def __init__(self, caminho_json):
+        meta = _ler_meta(caminho_json)
+        self.name = meta['fonte']['caminho']
+        self.count = meta['count']
+        self.width = meta['width']
+        self.height = meta['height']
+        self.shape = (self.height, self.width)
+        self.transform = Affine(*meta['transform'])
+        self.crs = CRS.from_wkt(meta['crs']) if meta['crs'] else None
+        self.nodata = meta['nodata']
+        self.dtypes = (np.dtype(meta['dtype']).name,) * self.count
+        # Formato compacto: a leitura aplica a escala (e deixa de ser sem cópia)
+        self._escala = (*meta['escala'], meta['nodata']) if meta.get('escala') else None
+        if self._escala:
+            self.nodata = np.nan
+            self.dtypes = ('float32',) * self.count
+        # A leitura já devolve os valores finais: para quem lê, não há escala
+        self.scales = (1.0,) * self.count
+        self.offsets = (0.0,) * self.count
+        self.block_shapes = [(TAMANHO_BLOCO, TAMANHO_BLOCO)] * self.count
+        self._mapa = np.memmap(os.path.splitext(caminho_json)[0] + '.bin', dtype=np.dtype(meta['dtype']),
+                               mode='r', shape=tuple(meta['forma']))
+        # Visão sem o preenchimento de alinhamento
+        self.dados = self._mapa[:, :self.height, :self.width]
+
+    @property
+    def bounds(self):
+        return BoundingBox(*_limites(self.transform, self.width, self.height))
+
+    def window_transform(self, window):
+        return transform_janela(window, self.transform)
+
+    def read(self, indexes=None, window=None, out_shape=None, masked=False,
+             resampling=Resampling.nearest, **kwargs):
+        """
+        Como DatasetReader.read, mas retorna visões do memmap (sem cópia)
+
+        Com out_shape diferente do tamanho da janela, a janela é reamostrada
+        (e aí copiada), como em LeitorRaster.
+        """
+        linhas, colunas = _janela_inteira(window, self.width, self.height)
+        if indexes is None:
+            dados = self.dados[:, linhas, colunas]
+        elif isinstance(indexes, int):
+            dados = self.dados[indexes - 1, linhas, colunas]
+        else:
+            dados = self.dados[[i - 1 for i in indexes], linhas, colunas]
+
+        if self._escala:
+            dados = desescalar(dados, *self._escala)
+        if out_shape is not None and tuple(out_shape)[-2:] != dados.shape[-2:]:
+            dados = _reamostrar(np.ascontiguousarray(dados), tuple(out_shape)[-2:], dados.shape[-2:],
+                                self.crs, self.nodata, resampling)
+        if masked:
+            return _mascarar(dados, self.nodata)
+        return dados
+
+    def close(self):
+        self.dados = None
+        self._mapa = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def abrir_mapeado(caminho, pasta=PASTA_CACHE):
+    """
+    Abre o raster pelo cache mapeado, convertendo na primeira vez
+    """
+    return RasterMapeado(converter(caminho, pasta))
+
+
+def abrir(caminho, mapeado=False, cache=True):
+    """
+    Abre um raster para leitura: pelo cache mapeado, pelo cache de blocos
+    (padrão) ou direto com o rasterio
+    """
+    if mapeado:
+        return abrir_mapeado(caminho)
+    return LeitorRaster(caminho) if cache else rasterio.open(caminho)
+
+
+# --- Grade em Web Mercator para sobreposições ---
+
+def limites_wgs84(src, pontos=PONTOS_BORDA):
+    """
+    [[sul, oeste], [norte, leste]] em graus da área do raster, transformando
+    as bordas densificadas de uma vez (não só os quatro cantos)
+    """
+    oeste, sul, leste, norte = transform_bounds(src.crs, 'EPSG:4326', *src.bounds, densify_pts=pontos)
+    return [[sul, oeste], [norte, leste]]
+
+
+def mercator(caminho, lado=LADO_MERCATOR, pasta=PASTA_CACHE):
+    """
+    (valores float32, NaN fora dos dados; limites [[sul, oeste], [norte, leste]])
+    do raster em EPSG:3857, com no máximo lado pixels no lado maior
+
+    A grade é calculada uma vez e lida do cache (mapa de memória) enquanto o
+    GeoTIFF não mudar. Os limites são exatos: um retângulo em Web Mercator é
+    um retângulo em latitude/longitude, que é o que o ImageOverlay espera.
+    """
+    base = os.path.splitext(_nomes_cache(caminho, pasta)[0])[0] + f'.{EPSG_WEB_MERCATOR}'
+    caminho_npy, caminho_json = base + '.npy', base + '.json'
+    meta = _ler_meta(caminho_json)
+    if meta and meta['fonte'] == _identificacao(caminho) and meta['lado'] == lado \
+            and os.path.exists(caminho_npy):
+        return np.load(caminho_npy, mmap_mode='r'), meta['limites_wgs84']
+
+    destino_crs = CRS.from_epsg(EPSG_WEB_MERCATOR)
+    with medir('reprojecao_mercator', 'raster', arquivo=caminho), LeitorRaster(caminho) as src:
+        limites = transform_bounds(src.crs, destino_crs, *src.bounds, densify_pts=PONTOS_BORDA)
+        # Mesma resolução da origem, limitada a lado pixels
+        largura = (limites[2] - limites[0]) / src.res[0]
+        altura = (limites[3] - limites[1]) / src.res[1]
+        escala = max(1.0, max(largura, altura) / lado)
+        largura, altura = max(1, round(largura / escala)), max(1, round(altura / escala))
+
+        # Lê já reduzido (overview/média) e reprojeta só a grade pequena
+        forma = (max(1, min(src.height, round(src.height / escala))),
+                 max(1, min(src.width, round(src.width / escala))))
+        dados = src.read(1, out_shape=forma, resampling=Resampling.average).astype(np.float32)
+        transform_origem = src.transform * Affine.scale(src.width / forma[1], src.height / forma[0])
+
+        valores = np.full((altura, largura), np.nan, dtype=np.float32)
+        reproject(dados, valores,
+                  src_transform=transform_origem, src_crs=src.crs, src_nodata=src.nodata,
+                  dst_transform=from_bounds(*limites, largura, altura), dst_crs=destino_crs,
+                  dst_nodata=np.nan, resampling=Resampling.nearest)
+
+    oeste, sul, leste, norte = transform_bounds(destino_crs, 'EPSG:4326', *limites)
+    meta = {
+        'fonte': _identificacao(caminho),
+        'lado': lado,
+        'forma': [altura, largura],
+        'limites_3857': list(limites),
+        'limites_wgs84': [[sul, oeste], [norte, leste]],
+    }
+    os.makedirs(pasta, exist_ok=True)
+    with open(caminho_npy + '.tmp', 'wb') as f:
+        np.save(f, valores)
+    os.replace(caminho_npy + '.tmp', caminho_npy)
+    with open(caminho_json + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(caminho_json + '.tmp', caminho_json)
+    return valores, meta['limites_wgs84']
+
+
+def listar_cache(pasta=PASTA_CACHE):
+    """
+    [(metadados, tamanho em bytes, atualizado?)] de cada raster no cache
+    """
+    itens = []
+    for caminho_json in sorted(glob.glob(os.path.join(pasta, '*.json'))):
+        meta = _ler_meta(caminho_json)
+        caminho_bin = os.path.splitext(caminho_json)[0] + '.bin'
+        if not meta or not os.path.exists(caminho_bin):
+            continue
+        fonte = meta['fonte']['caminho']
+        atualizado = os.path.exists(fonte) and _identificacao(fonte) == meta['fonte']
+        itens.append((meta, os.path.getsize(caminho_bin), atualizado))
+    return itens
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cache mapeado em memória dos rasters de índices")
+    sub = parser.add_subparsers(dest='comando', required=True)
+    conv = sub.add_parser('converter', help="converte rasters para o cache")
+    conv.add_argument('rasters', nargs='*', default=None,
+                      help="arquivos .tif (padrão: Indice_vegetacao/*.tif)")
+    sub.add_parser('listar', help="mostra o conteúdo do cache")
+    sub.add_parser('limpar', help="remove o cache")
+    args = parser.parse_args()
+
+    if args.comando == 'converter':
+        rasters = args.rasters or sorted(glob.glob(os.path.join('Indice_vegetacao', '*.tif')))
+        for caminho in rasters:
+            print(f"   🔄 {caminho}")
+            converter(caminho)
+        print(f"\n✅ {len(rasters)} raster(s) no cache em {PASTA_CACHE}/")
+    elif args.comando == 'listar':
+        itens = listar_cache()
+        for meta, tamanho, atualizado in itens:
+            situacao = "✅" if atualizado else "⚠️  desatualizado"
+            print(f"   {situacao} {meta['fonte']['caminho']} ({tamanho / 2**20:,.0f} MB)")
+        total = sum(t for _, t, _ in itens)
+        print(f"\n📦 {len(itens)} raster(s), {total / 2**20:,.0f} MB em {PASTA_CACHE}/")
+    elif args.comando == 'limpar':
+        removidos = 0
+        for arquivo in glob.glob(os.path.join(PASTA_CACHE, '*')):
+            os.remove(arquivo)
+            removidos += 1
+        print(f"🧹 {removidos} arquivo(s) removido(s) de {PASTA_CACHE}/")
+
+
+if __name__ == "__main__":
+    main()
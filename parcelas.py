@@ -0,0 +1,151 @@
+"""
+Leitura da tabela de parcelas PPBio (amb_csv/ppbio_sc-coordenadas_parcelas.csv)
+
+O esquema é validado uma vez, na leitura do CSV: colunas obrigatórias,
+coordenadas numéricas, sem vazios e dentro dos limites válidos (o
+carregamento falha logo, apontando as linhas com problema). As colunas
+saem tipadas: 'module' e 'type' categóricas, 'lat'/'long' em float64
+(em float32 os popups mostrariam valores que o CSV não tem, como
+-27.200001 para -27.2; as duas colunas custam pouca memória).
+
+A tabela tipada é guardada em Parquet em .cache_parcelas/ e reaproveitada
+enquanto o CSV não mudar (tamanho e data de modificação; se só a data
+mudou, o hash do conteúdo decide). Sem pyarrow, o CSV é lido sempre.
+
+Uso:
+    from parcelas import carregar_parcelas
+    df = carregar_parcelas()
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from instrumentacao import medir
+from util_arquivos import hash_arquivo
+
+try:
+    import pyarrow  # noqa: F401  (motor do Parquet)
+except ImportError:
+    pyarrow = None
+
+ARQUIVO_PARCELAS = 'amb_csv/ppbio_sc-coordenadas_parcelas.csv'
+PASTA_CACHE = '.cache_parcelas'
+
+# Esquema da tabela: coluna -> tipo
+COLUNAS = {
+    'module': 'category',
+    'name': 'str',
+    'type': 'category',
+    'lat': 'float64',
+    'long': 'float64',
+}
+LIMITES = {'lat': (-90.0, 90.0), 'long': (-180.0, 180.0)}
+# Muda quando o esquema ou a validação mudam, invalidando os caches antigos
+VERSAO_ESQUEMA = 2
+
+
+def _nomes_cache(caminho, pasta):
+    base = os.path.join(pasta, os.path.splitext(os.path.basename(caminho))[0])
+    return base + '.parquet', base + '.json'
+
+
+def _linhas_csv(indices, limite=5):
+    """
+    Números de linha no arquivo (cabeçalho = linha 1) para as mensagens de erro
+    """
+    linhas = [str(i + 2) for i in indices[:limite]]
+    return ', '.join(linhas) + (f" … (+{len(indices) - limite})" if len(indices) > limite else '')
+
+
+def validar(df, caminho=ARQUIVO_PARCELAS):
+    """
+    Confere o esquema e converte as colunas; ValueError descrevendo o problema
+    """
+    ausentes = [c for c in COLUNAS if c not in df.columns]
+    if ausentes:
+        raise ValueError(f"{caminho}: colunas ausentes: {', '.join(ausentes)}")
+
+    for coluna, (minimo, maximo) in LIMITES.items():
+        valores = pd.to_numeric(df[coluna], errors='coerce')
+        invalidos = np.flatnonzero(valores.isna().to_numpy())
+        if len(invalidos):
+            raise ValueError(f"{caminho}: '{coluna}' vazia ou não numérica nas linhas "
+                             f"{_linhas_csv(invalidos)}")
+        fora = np.flatnonzero(((valores < minimo) | (valores > maximo)).to_numpy())
+        if len(fora):
+            raise ValueError(f"{caminho}: '{coluna}' fora de [{minimo}, {maximo}] nas linhas "
+                             f"{_linhas_csv(fora)}")
+        df[coluna] = valores
+
+    return df.astype(COLUNAS)
+
+
+def ler_csv(caminho=ARQUIVO_PARCELAS):
+    """
+    Lê e valida o CSV, sem passar pelo cache
+    """
+    with medir('read_csv', 'dados', arquivo=os.path.basename(caminho)):
+        df = pd.read_csv(caminho, encoding='latin1', sep=';',
+                         dtype={'module': 'category', 'type': 'category', 'name': str})
+    return validar(df, caminho)
+
+
+def _meta_atual(caminho, caminho_json):
+    """
+    Metadados do cache se ele ainda corresponde ao CSV, senão None
+    """
+    try:
+        with open(caminho_json, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    st = os.stat(caminho)
+    if (meta.get('versao') != VERSAO_ESQUEMA or meta.get('fonte') != os.path.abspath(caminho)
+            or meta.get('tamanho') != st.st_size):
+        return None
+    if meta.get('mtime_ns') == st.st_mtime_ns:
+        return meta
+    # Só a data mudou (cópia, checkout): o conteúdo decide
+    if meta.get('hash') == hash_arquivo(caminho):
+        meta['mtime_ns'] = st.st_mtime_ns
+        _gravar_meta(caminho_json, meta)
+        return meta
+    return None
+
+
+def _gravar_meta(caminho_json, meta):
+    with open(caminho_json + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(caminho_json + '.tmp', caminho_json)
+
+
+def carregar_parcelas(caminho=ARQUIVO_PARCELAS, cache=True, pasta=PASTA_CACHE):
+    """
+    DataFrame tipado e validado das parcelas, pelo cache Parquet quando atualizado
+    """
+    if not cache or pyarrow is None:
+        return ler_csv(caminho)
+
+    caminho_parquet, caminho_json = _nomes_cache(caminho, pasta)
+    if os.path.exists(caminho_parquet) and _meta_atual(caminho, caminho_json):
+        with medir('read_parquet', 'dados', arquivo=os.path.basename(caminho_parquet)):
+            return pd.read_parquet(caminho_parquet)
+
+    df = ler_csv(caminho)
+    os.makedirs(pasta, exist_ok=True)
+    st = os.stat(caminho)
+    with medir('to_parquet', 'dados', arquivo=os.path.basename(caminho_parquet)):
+        df.to_parquet(caminho_parquet + '.tmp', index=False)
+    os.replace(caminho_parquet + '.tmp', caminho_parquet)
+    # Metadados por último: sua presença indica um cache completo
+    _gravar_meta(caminho_json, {
+        'versao': VERSAO_ESQUEMA,
+        'fonte': os.path.abspath(caminho),
+        'tamanho': st.st_size,
+        'mtime_ns': st.st_mtime_ns,
+        'hash': hash_arquivo(caminho),
+    })
+    return df
@@ -0,0 +1,105 @@
+"""
+Ponto de entrada único do pipeline PELD: python peld.py <comando> [opções]
+
+Os scripts continuam funcionando sozinhos; aqui cada comando importa as
+bibliotecas pesadas (geopandas, rasterio, folium, matplotlib) só quando é
+executado e mostra quanto tempo as importações levaram. Comandos que não
+precisam delas, como recolocar os créditos, começam em milissegundos.
+As opções depois do comando vão para o script correspondente.
+
+Uso:
+    python peld.py credits
+    python peld.py stats --mmap
+    python peld.py temporal --fonte simulado --sidecar
+    python peld.py maps                    # todos os mapas de índices
+    python peld.py maps indices parques    # só estes
+"""
+
+import argparse
+import importlib
+import os
+import runpy
+import sys
+import time
+
+import instrumentacao
+from instrumentacao import medir
+
+PASTA = os.path.dirname(os.path.abspath(__file__))
+
+# Comando -> (descrição, {nome: script}, bibliotecas que os scripts importam)
+COMANDOS = {
+    'convert': ("Converte os shapefiles em GeoJSON e gera o mapa interativo",
+                {'peld': 'gerar_mapa_peld.py'},
+                ('geopandas', 'rasterio', 'folium')),
+    'stats': ("Extrai as estatísticas dos índices por parque (armazém SQLite)",
+              {'estatisticas': 'extrair_estatisticas_indices.py'},
+              ('geopandas', 'rasterio')),
+    'contours': ("Gera as curvas de nível a partir do MDE",
+                 {'contornos': 'gerar_contornos_altimetria.py'},
+                 ('geopandas', 'rasterio', 'matplotlib.pyplot')),
+    'maps': ("Gera os mapas de índices de vegetação",
+             {'indices': 'gerar_mapa_indices_simples.py',
+              'parques': 'gerar_mapa_indices_parques_v2.py',
+              'ndvi_evi': 'gerar_analise_ndvi_vs_evi.py'},
+             ('geopandas', 'rasterio', 'folium', 'matplotlib.pyplot')),
+    'temporal': ("Gera os mapas temporais (slider, comparação e séries)",
+                 {'temporal': 'gerar_visualizacoes_temporais.py'},
+                 ('folium',)),
+    'credits': ("Insere ou atualiza o rodapé de créditos nas páginas HTML",
+                {'creditos': 'adicionar_creditos_mapas.py'},
+                ()),
+}
+
+
+def importar(modulos):
+    """
+    Importa as bibliotecas do comando; retorna o tempo gasto (s)
+    """
+    inicio = time.perf_counter()
+    with medir('importacoes', 'importacao', modulos=','.join(modulos)):
+        for modulo in modulos:
+            importlib.import_module(modulo)
+    return time.perf_counter() - inicio
+
+
+def executar_script(script, opcoes):
+    """
+    Roda o script como se fosse chamado por python <script> <opções>
+    """
+    caminho = os.path.join(PASTA, script)
+    argv = sys.argv
+    sys.argv = [caminho, *opcoes]
+    try:
+        runpy.run_path(caminho, run_name='__main__')
+    finally:
+        sys.argv = argv
+        # Um relatório de execução por script
+        instrumentacao.encerrar()
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='peld', description="Pipeline PELD Santa Catarina")
+    comandos = parser.add_subparsers(dest='comando', required=True, metavar='comando')
+    for nome, (descricao, scripts, _) in COMANDOS.items():
+        sub = comandos.add_parser(nome, help=descricao, description=descricao)
+        if len(scripts) > 1:
+            sub.add_argument('selecao', nargs='*', metavar='nome',
+                             help=f"só estes ({', '.join(scripts)}; padrão: todos)")
+    # O que o peld não reconhece vai para o script
+    args, opcoes = parser.parse_known_args()
+
+    _, scripts, modulos = COMANDOS[args.comando]
+    selecao = getattr(args, 'selecao', None) or list(scripts)
+    desconhecidos = [nome for nome in selecao if nome not in scripts]
+    if desconhecidos:
+        parser.error(f"{args.comando}: {', '.join(desconhecidos)} não existe (opções: {', '.join(scripts)})")
+
+    if modulos:
+        print(f"📦 Importações ({', '.join(modulos)}): {importar(modulos):.2f}s")
+    for nome in selecao:
+        executar_script(scripts[nome], opcoes)
+
+
+if __name__ == "__main__":
+    main()
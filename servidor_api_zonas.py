@@ -0,0 +1,262 @@
+"""
+API local (HTTP/JSON) de resumos por zona sobre o armazém de estatísticas
+
+Responde consultas (zona, índice, período) direto de estatisticas_indices.sqlite,
+sem rodar scripts: a primeira consulta vai ao SQLite, as repetidas saem de um
+cache em memória (LRU com validade, TTL) em milissegundos. A chave do cache
+inclui a versão do armazém, então uma extração nova invalida as respostas
+antigas na hora. As respostas levam ETag; If-None-Match igual responde 304.
+
+Rotas:
+    /zonas                                    zonas, índices e períodos disponíveis
+    /resumo?zona=PNSJ&indice=NDVI             série, última data e resumo do período
+    /resumo?indice=EVI&inicio=2024-01-01&fim=2025-12-31
+    /cache                                    acertos/faltas do cache
+
+As páginas (dashboard_peld.html, mapa_indices_parques.html) trazem os valores
+gravados na geração e, com a API no ar, trocam pelos valores atuais
+(valores_ao_vivo.js, incluído por script_valores_ao_vivo). Fora de
+localhost, a API vem de ?api=<endereço>.
+
+Uso:
+    python servidor_api_zonas.py                 # http://localhost:8766
+    python servidor_api_zonas.py --ttl 60
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import armazem_estatisticas as armazem
+from instrumentacao import iniciar, registrar_contadores
+from servidor_http import ServidorHTTP, etag, resposta_json, resposta_texto
+
+PORTA_PADRAO = 8766
+# Script das páginas que troca os valores gravados pelos atuais da API
+ARQUIVO_SCRIPT = 'valores_ao_vivo.js'
+# Validade das respostas em cache (segundos) e número máximo guardado
+TTL_PADRAO = 300
+MAX_RESPOSTAS = 512
+FORMATO_DATA = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+_conexoes = threading.local()
+
+
+class CacheRespostas:
+    """
+    Respostas prontas (ETag, corpo) com validade, descartando as menos usadas
+    """
+
+    def __init__(self, maximo=MAX_RESPOSTAS, ttl=TTL_PADRAO):
+        self.maximo = maximo
+        self.ttl = ttl
+        self.acertos = 0
+        self.faltas = 0
+        self.expiradas = 0
+        self.descartes = 0
+        self._respostas = OrderedDict()
+        self._trava = threading.Lock()
+
+    def buscar(self, chave):
+        with self._trava:
+            item = self._respostas.get(chave)
+            if item is not None and item[0] > time.monotonic():
+                self._respostas.move_to_end(chave)
+                self.acertos += 1
+                return item[1]
+            if item is not None:
+                del self._respostas[chave]
+                self.expiradas += 1
+            self.faltas += 1
+            return None
+
+    def guardar(self, chave, resposta):
+        with self._trava:
+            self._respostas[chave] = (time.monotonic() + self.ttl, resposta)
+            self._respostas.move_to_end(chave)
+            while len(self._respostas) > self.maximo:
+                self._respostas.popitem(last=False)
+                self.descartes += 1
+
+    def estatisticas(self):
+        consultas = self.acertos + self.faltas
+        return {
+            'acertos': self.acertos,
+            'faltas': self.faltas,
+            'taxa_acerto': round(self.acertos / consultas, 3) if consultas else None,
+            'expiradas': self.expiradas,
+            'descartes': self.descartes,
+            'respostas': len(self._respostas),
+            'ttl_s': self.ttl,
+        }
+
+
+cache_respostas = CacheRespostas()
+registrar_contadores('cache_api', cache_respostas.estatisticas)
+
+
+def versao_armazem(caminho=armazem.ARQUIVO_ARMAZEM):
+    """
+    Muda a cada gravação no armazém (inclui o WAL, se houver)
+    """
+    versao = []
+    for arquivo in (caminho, caminho + '-wal'):
+        if os.path.exists(arquivo):
+            st = os.stat(arquivo)
+            versao += [st.st_size, st.st_mtime_ns]
+    return tuple(versao)
+
+
+def _conexao(caminho=armazem.ARQUIVO_ARMAZEM):
+    # Somente leitura e uma por thread (sqlite3 não compartilha conexões entre threads)
+    con = getattr(_conexoes, 'con', None)
+    if con is None:
+        con = sqlite3.connect(f"file:{caminho}?mode=ro", uri=True)
+        con.row_factory = sqlite3.Row
+        _conexoes.con = con
+    return con
+
+
+def zonas(con):
+    """
+    [{zona, indice, inicio, fim, datas}] presentes no armazém
+    """
+    datas = {}
+    # consultar() resolve as datas só com o ano (armazem_estatisticas.py)
+    for linha in armazem.consultar(con):
+        datas.setdefault((linha['zona'], linha['indice']), []).append(linha['data_aquisicao'])
+    return [{'zona': z, 'indice': i, 'inicio': min(d), 'fim': max(d), 'datas': len(set(d))}
+            for (z, i), d in sorted(datas.items())]
+
+
+def resumo(con, zona=None, indice=None, inicio=None, fim=None):
+    """
+    Uma série por (zona, índice): valores por data, a última data e o resumo do período
+    """
+    series = {}
+    for linha in armazem.consultar(con, indice=indice, zona=zona, inicio=inicio, fim=fim):
+        ponto = {'data_aquisicao': linha['data_aquisicao'],
+                 **{c: linha[c] for c in armazem.CAMPOS_ESTATISTICAS}}
+        series.setdefault((linha['zona'], linha['indice']), []).append(ponto)
+
+    resultado = []
+    for (z, i), pontos in series.items():
+        medias = [p['media'] for p in pontos if p['media'] is not None]
+        resultado.append({
+            'zona': z,
+            'indice': i,
+            'datas': len(pontos),
+            # consultar() ordena por data: o último ponto é o mais recente
+            'ultima': pontos[-1],
+            'periodo': {
+                'inicio': pontos[0]['data_aquisicao'],
+                'fim': pontos[-1]['data_aquisicao'],
+                'media': sum(medias) / len(medias) if medias else None,
+                'minimo': min((p['minimo'] for p in pontos if p['minimo'] is not None), default=None),
+                'maximo': max((p['maximo'] for p in pontos if p['maximo'] is not None), default=None),
+            },
+            'serie': pontos,
+        })
+    return {'consulta': {'zona': zona, 'indice': indice, 'inicio': inicio, 'fim': fim},
+            'series': resultado}
+
+
+def _parametros(consulta):
+    """
+    (zona, indice, inicio, fim) validados da query string
+    """
+    def unico(nome):
+        valores = consulta.get(nome)
+        return valores[0] if valores else None
+
+    zona = unico('zona')
+    indice = unico('indice')
+    inicio, fim = unico('inicio'), unico('fim')
+    for nome, data in (('inicio', inicio), ('fim', fim)):
+        if data is not None and not FORMATO_DATA.match(data):
+            raise ValueError(f"{nome} deve estar no formato AAAA-MM-DD")
+    return (zona.upper() if zona else None, indice.upper() if indice else None, inicio, fim)
+
+
+class ServidorAPI(ServidorHTTP):
+    """
+    Consultas ao SQLite nas threads do executor; respostas no cache com TTL
+    """
+
+    def __init__(self, caminho=armazem.ARQUIVO_ARMAZEM, trabalhadores=None):
+        super().__init__(trabalhadores)
+        self.caminho = caminho
+
+    async def consulta_cacheada(self, chave, gerar, cabecalhos):
+        chave = (versao_armazem(self.caminho), *chave)
+        resposta = cache_respostas.buscar(chave)
+        if resposta is None:
+            _, _, corpo = resposta_json(await self.em_thread(gerar))
+            resposta = (etag(corpo), corpo)
+            cache_respostas.guardar(chave, resposta)
+
+        marca, corpo = resposta
+        extras = {'Content-Type': 'application/json; charset=utf-8', 'ETag': marca,
+                  'Cache-Control': f'public, max-age={int(min(cache_respostas.ttl, 60))}'}
+        if cabecalhos.get('if-none-match') == marca:
+            return 304, extras, b''
+        return 200, extras, corpo
+
+    async def rota(self, partes, consulta, cabecalhos):
+        if partes == ['cache']:
+            return resposta_json(cache_respostas.estatisticas())
+        if not os.path.exists(self.caminho):
+            return resposta_texto(404, f"{self.caminho} não encontrado; execute extrair_estatisticas_indices.py")
+        if partes == ['zonas']:
+            return await self.consulta_cacheada(('zonas',), lambda: {'zonas': zonas(_conexao(self.caminho))},
+                                                cabecalhos)
+        if partes == ['resumo']:
+            try:
+                parametros = _parametros(consulta)
+            except ValueError as e:
+                return resposta_texto(400, str(e))
+            return await self.consulta_cacheada(('resumo', *parametros),
+                                                lambda: resumo(_conexao(self.caminho), *parametros),
+                                                cabecalhos)
+        return 404, {}, b''
+
+
+# --- Valores ao vivo nas páginas ---
+
+def valor_ao_vivo(texto, zona, indice, campo='media', casas=3):
+    """
+    <span> com o valor gravado na geração, trocado pelo da API quando ela responde
+    """
+    return (f'<span data-peld-zona="{zona}" data-peld-indice="{indice}" '
+            f'data-peld-campo="{campo}" data-peld-casas="{casas}">{texto}</span>')
+
+
+def script_valores_ao_vivo(api=f"http://localhost:{PORTA_PADRAO}"):
+    """
+    Tag que inclui ARQUIVO_SCRIPT (o único lugar do código dos valores ao vivo)
+    """
+    return f'<script src="{ARQUIVO_SCRIPT}" data-api="{api}"></script>'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API local de resumos por zona (estatísticas dos índices)")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--porta', type=int, default=PORTA_PADRAO)
+    parser.add_argument('--armazem', default=armazem.ARQUIVO_ARMAZEM)
+    parser.add_argument('--ttl', type=float, default=TTL_PADRAO, help="validade das respostas em cache (s)")
+    args = parser.parse_args()
+
+    cache_respostas.ttl = args.ttl
+    servidor = ServidorAPI(args.armazem)
+    servidor.executar(args.host, args.porta,
+                      f"📡 API de zonas sobre {args.armazem}: /zonas, /resumo?zona=&indice=&inicio=&fim=")
+    print(f"   Cache: {cache_respostas.estatisticas()}")
+
+
+if __name__ == "__main__":
+    iniciar(__file__)
+    main()
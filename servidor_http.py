@@ -0,0 +1,114 @@
+"""
+Base dos servidores locais (tiles e API de zonas): HTTP/1.1 mínimo sobre asyncio
+
+Só o necessário para GET/HEAD de um navegador ou de scripts: keep-alive,
+CORS aberto (as páginas podem estar em outro endereço ou em file://),
+respostas 304 e JSON. Trabalho bloqueante (leitura de raster, SQLite) vai
+para o executor de threads de cada servidor.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+
+MOTIVOS = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found',
+           405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+def etag(corpo):
+    return '"' + hashlib.sha1(corpo).hexdigest()[:20] + '"'
+
+
+def resposta_json(dados, cabecalhos=None):
+    corpo = json.dumps(dados, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return 200, {'Content-Type': 'application/json; charset=utf-8', **(cabecalhos or {})}, corpo
+
+
+def resposta_texto(status, texto):
+    return status, {'Content-Type': 'text/plain; charset=utf-8'}, texto.encode('utf-8')
+
+
+class ServidorHTTP:
+    """
+    Subclasses implementam rota(partes, consulta, cabecalhos) -> (status, cabeçalhos, corpo)
+    """
+
+    def __init__(self, trabalhadores=None):
+        self.executor = ThreadPoolExecutor(max_workers=trabalhadores or os.cpu_count())
+        self.respostas = 0
+
+    async def em_thread(self, funcao, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, funcao, *args)
+
+    async def rota(self, partes, consulta, cabecalhos):
+        raise NotImplementedError
+
+    async def responder(self, metodo, alvo, cabecalhos):
+        if metodo not in ('GET', 'HEAD'):
+            return 405, {'Allow': 'GET, HEAD'}, b''
+        url = urlsplit(alvo)
+        partes = [p for p in url.path.split('/') if p]
+        try:
+            return await self.rota(partes, parse_qs(url.query), cabecalhos)
+        except Exception as e:
+            return resposta_texto(500, f"{type(e).__name__}: {e}")
+
+    async def conexao(self, leitor, escritor):
+        try:
+            while True:
+                linha = await leitor.readline()
+                if not linha:
+                    break
+                try:
+                    metodo, alvo, versao = linha.decode('latin-1').split()
+                except ValueError:
+                    break
+                cabecalhos = {}
+                while True:
+                    linha = await leitor.readline()
+                    if linha in (b'\r\n', b'\n', b''):
+                        break
+                    nome, _, valor = linha.decode('latin-1').partition(':')
+                    cabecalhos[nome.strip().lower()] = valor.strip()
+
+                status, extras, corpo = await self.responder(metodo, alvo, cabecalhos)
+                manter = versao == 'HTTP/1.1' and cabecalhos.get('connection', '').lower() != 'close'
+                resposta = {
+                    'Content-Length': str(len(corpo)),
+                    'Access-Control-Allow-Origin': '*',
+                    'Connection': 'keep-alive' if manter else 'close',
+                    **extras,
+                }
+                cabecalho = f"HTTP/1.1 {status} {MOTIVOS[status]}\r\n" + \
+                    ''.join(f"{k}: {v}\r\n" for k, v in resposta.items()) + "\r\n"
+                escritor.write(cabecalho.encode('latin-1'))
+                if metodo != 'HEAD' and status != 304:
+                    escritor.write(corpo)
+                await escritor.drain()
+                self.respostas += 1
+                if not manter:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            escritor.close()
+
+    async def servir(self, host, porta, mensagem=None):
+        servidor = await asyncio.start_server(self.conexao, host, porta)
+        if mensagem:
+            print(mensagem)
+        print(f"   http://{host}:{porta}/  (Ctrl+C para parar)")
+        async with servidor:
+            await servidor.serve_forever()
+
+    def executar(self, host, porta, mensagem=None):
+        """
+        Serve até Ctrl+C
+        """
+        try:
+            asyncio.run(self.servir(host, porta, mensagem))
+        except KeyboardInterrupt:
+            print(f"\n✅ {self.respostas:,} resposta(s)")
@@ -0,0 +1,321 @@
+"""
+Servidor local de tiles XYZ (PNG) dos rasters de índices, para pré-visualização
+
+Em vez de pré-renderizar a pirâmide inteira de cada índice e data, este
+servidor (asyncio, sem dependências além das do pipeline) desenha cada tile
+256×256 quando o navegador pede: lê só a janela necessária do GeoTIFF (ou do
+overview adequado ao zoom) pelo cache de blocos de leitor_raster.py,
+reprojeta para Web Mercator e aplica a paleta do índice. Os PNGs prontos
+ficam num LRU em memória; as respostas levam ETag e Cache-Control, e um
+If-None-Match igual responde 304 sem desenhar nada.
+
+Camadas: todo .tif de Indice_vegetacao/ e Projeto_PARNA_PESF/, pelo caminho
+sem a extensão, p. ex. /tiles/Indice_vegetacao/NDVI_2025_06_25/{z}/{x}/{y}.png.
+Parâmetros opcionais: ?paleta=RdYlGn&min=0&max=1. /camadas lista o catálogo.
+
+Uso:
+    python servidor_tiles_raster.py                 # http://localhost:8765
+    python servidor_tiles_raster.py --porta 9000
+
+    # Mapas apontando as camadas de índices para o servidor:
+    PELD_SERVIDOR_TILES=http://localhost:8765 python gerar_mapa_indices_simples.py
+
+Sem servidor, camada_sobreposicao() usa a mesma paleta numa imagem única do
+raster já em Web Mercator (leitor_raster.mercator), embutida no mapa.
+"""
+
+import argparse
+import base64
+import glob
+import os
+import threading
+from io import BytesIO
+
+import numpy as np
+from affine import Affine
+from rasterio.enums import Resampling
+from rasterio.transform import from_bounds
+from rasterio.warp import reproject, transform_bounds
+from rasterio.windows import from_bounds as janela_de_limites
+
+from gerar_vector_tiles import EPSG_TILES, limites_tile
+from instrumentacao import medir, iniciar, registrar_contadores
+from leitor_raster import CacheBlocos, LeitorRaster, _identificacao, mercator
+from servidor_http import ServidorHTTP, etag, resposta_json, resposta_texto
+
+PORTA_PADRAO = 8765
+PADROES_RASTERS = ['Indice_vegetacao/*.tif', 'Projeto_PARNA_PESF/*.tif']
+TAMANHO_TILE = 256
+# Tiles PNG prontos em memória (PELD_CACHE_TILES_MB, padrão 64 MB)
+TAMANHO_CACHE_TILES = int(os.environ.get('PELD_CACHE_TILES_MB', 64)) * 2**20
+# Validade no cache do navegador; o ETag muda se o raster mudar
+MAX_AGE = 3600
+
+# Paleta e faixa padrão de cada índice
+ESCALAS = {
+    'NDVI': ('RdYlGn', 0.0, 1.0),
+    'EVI': ('viridis', 0.0, 1.0),
+    'SAVI': ('plasma', 0.0, 1.0),
+    'ARVI': ('inferno', 0.0, 1.0),
+}
+ESCALA_PADRAO = ('viridis', -1.0, 1.0)
+
+# PNGs guardados como arrays uint8 no mesmo LRU limitado em bytes dos blocos
+cache_tiles = CacheBlocos(TAMANHO_CACHE_TILES)
+registrar_contadores('cache_tiles', cache_tiles.estatisticas)
+
+_leitores = threading.local()
+_paletas = {}
+_tile_vazio = None
+
+
+def id_camada(caminho):
+    """
+    Identificador da camada na URL: caminho relativo sem extensão, com '/'
+    """
+    return os.path.splitext(os.path.relpath(caminho))[0].replace(os.sep, '/')
+
+
+def indice_do_arquivo(caminho):
+    return os.path.basename(caminho).split('_')[0].split('.')[0].upper()
+
+
+def catalogo():
+    """
+    {id: caminho} de todos os rasters servidos
+    """
+    rasters = {}
+    for padrao in PADROES_RASTERS:
+        for caminho in sorted(glob.glob(padrao)):
+            rasters[id_camada(caminho)] = caminho
+    return rasters
+
+
+def url_tiles(servidor, caminho, **escala):
+    """
+    Modelo de URL XYZ da camada para o Leaflet/folium
+    """
+    consulta = '&'.join(f"{k}={v}" for k, v in escala.items() if v is not None)
+    return f"{servidor.rstrip('/')}/tiles/{id_camada(caminho)}/{{z}}/{{x}}/{{y}}.png" + \
+        (f"?{consulta}" if consulta else '')
+
+
+def camada_servidor(caminho, titulo, paleta=None, servidor=None, vmin=None, vmax=None):
+    """
+    TileLayer do folium servida por este servidor, ou None se o raster não
+    existe ou PELD_SERVIDOR_TILES não está definido (e servidor não foi passado)
+
+    vmin/vmax: faixa da paleta (padrão: a de ESCALAS para o índice)
+    """
+    import folium
+
+    servidor = servidor or os.environ.get('PELD_SERVIDOR_TILES')
+    if not servidor or not os.path.exists(caminho):
+        return None
+    return folium.TileLayer(tiles=url_tiles(servidor, caminho, paleta=paleta, min=vmin, max=vmax),
+                            name=titulo, attr='Índices PELD (servidor local)', overlay=True, show=False,
+                            max_zoom=18, opacity=0.8)
+
+
+def camada_sobreposicao(caminho, titulo, paleta=None, vmin=None, vmax=None, opacidade=0.7):
+    """
+    ImageOverlay do folium com o raster inteiro em Web Mercator, alinhado às
+    camadas vetoriais; a grade reprojetada vem do cache de leitor_raster.mercator
+
+    vmin/vmax: faixa da paleta (padrão: a de ESCALAS para o índice)
+    """
+    import folium
+
+    padrao, vmin_padrao, vmax_padrao = ESCALAS.get(indice_do_arquivo(caminho), ESCALA_PADRAO)
+    vmin = vmin_padrao if vmin is None else vmin
+    vmax = vmax_padrao if vmax is None else vmax
+    valores, limites = mercator(caminho)
+    with medir('sobreposicao_png', 'render', arquivo=caminho):
+        png = _png(colorir(np.asarray(valores), paleta or padrao, vmin, vmax))
+    return folium.raster_layers.ImageOverlay(
+        image='data:image/png;base64,' + base64.b64encode(png).decode('ascii'),
+        bounds=limites, name=titulo, opacity=opacidade, show=False)
+
+
+def _leitor(caminho):
+    # Datasets do rasterio não são compartilháveis entre threads: um por thread
+    abertos = getattr(_leitores, 'abertos', None)
+    if abertos is None:
+        abertos = _leitores.abertos = {}
+    ident = _identificacao(caminho)['mtime_ns']
+    leitor = abertos.get(caminho)
+    if leitor is None or leitor[0] != ident:
+        if leitor is not None:
+            leitor[1].close()
+        leitor = abertos[caminho] = (ident, LeitorRaster(caminho))
+    return leitor[1]
+
+
+def _paleta(nome):
+    """
+    Tabela RGBA (256 × 4, uint8) da paleta do matplotlib
+    """
+    if nome not in _paletas:
+        import matplotlib
+        _paletas[nome] = (matplotlib.colormaps[nome](np.linspace(0, 1, 256)) * 255).astype(np.uint8)
+    return _paletas[nome]
+
+
+def _png(rgba):
+    from PIL import Image
+
+    buffer = BytesIO()
+    Image.fromarray(rgba, 'RGBA').save(buffer, format='PNG', compress_level=6)
+    return buffer.getvalue()
+
+
+def tile_vazio():
+    global _tile_vazio
+    if _tile_vazio is None:
+        _tile_vazio = _png(np.zeros((TAMANHO_TILE, TAMANHO_TILE, 4), dtype=np.uint8))
+    return _tile_vazio
+
+
+def colorir(valores, paleta, vmin, vmax):
+    """
+    Valores (NaN = transparente) -> RGBA pela paleta na faixa [vmin, vmax]
+    """
+    validos = np.isfinite(valores)
+    posicao = np.zeros(valores.shape, dtype=np.int64)
+    # Faixa vazia (raster constante): tudo na primeira cor
+    posicao[validos] = np.clip((valores[validos] - vmin) / ((vmax - vmin) or 1.0) * 255, 0, 255)
+    rgba = _paleta(paleta)[posicao]
+    rgba[~validos, 3] = 0
+    return rgba
+
+
+def renderizar(caminho, z, x, y, paleta, vmin, vmax):
+    """
+    PNG do tile (z, x, y); None se o raster não cobre o tile
+    """
+    src = _leitor(caminho)
+    limites = limites_tile(z, x, y)
+    # Retângulo do tile no CRS do raster (bordas densificadas: a projeção curva)
+    esquerda, baixo, direita, cima = transform_bounds(f"EPSG:{EPSG_TILES}", src.crs, *limites, densify_pts=21)
+    r = src.bounds
+    if direita <= r.left or esquerda >= r.right or cima <= r.bottom or baixo >= r.top:
+        return None
+
+    janela = janela_de_limites(max(esquerda, r.left), max(baixo, r.bottom),
+                               min(direita, r.right), min(cima, r.top), src.transform)
+    janela = janela.round_offsets().round_lengths()
+    if janela.width < 1 or janela.height < 1:
+        return None
+    janela = janela.intersection(type(janela)(0, 0, src.width, src.height))
+
+    # Pixels do raster por pixel do tile: acima de 1, lê reduzido (overview)
+    decimacao = max(1.0, (direita - esquerda) / src.res[0] / TAMANHO_TILE)
+    forma = (max(1, int(np.ceil(janela.height / decimacao))), max(1, int(np.ceil(janela.width / decimacao))))
+    with medir('tile_leitura', 'raster', z=z):
+        dados = src.read(1, window=janela, out_shape=forma, resampling=Resampling.average)
+    dados = dados.astype(np.float32)
+
+    destino = np.full((TAMANHO_TILE, TAMANHO_TILE), np.nan, dtype=np.float32)
+    transform_janela = src.window_transform(janela) * \
+        Affine.scale(janela.width / forma[1], janela.height / forma[0])
+    reproject(dados, destino,
+              src_transform=transform_janela, src_crs=src.crs, src_nodata=src.nodata,
+              dst_transform=from_bounds(*limites, TAMANHO_TILE, TAMANHO_TILE),
+              dst_crs=f"EPSG:{EPSG_TILES}", dst_nodata=np.nan, resampling=Resampling.nearest)
+    if not np.isfinite(destino).any():
+        return None
+    with medir('tile_png', 'render', z=z):
+        return _png(colorir(destino, paleta, vmin, vmax))
+
+
+class ServidorTiles(ServidorHTTP):
+    """
+    Tiles e catálogo; o desenho dos tiles roda nas threads do executor
+    """
+
+    def __init__(self, trabalhadores=None):
+        super().__init__(trabalhadores)
+        self.rasters = catalogo()
+
+    def _escala(self, caminho, consulta):
+        paleta, vmin, vmax = ESCALAS.get(indice_do_arquivo(caminho), ESCALA_PADRAO)
+        paleta = consulta.get('paleta', [paleta])[0]
+        vmin = float(consulta.get('min', [vmin])[0])
+        vmax = float(consulta.get('max', [vmax])[0])
+        _paleta(paleta)  # paleta inexistente: KeyError -> 400
+        if not (np.isfinite(vmin) and np.isfinite(vmax)):
+            raise ValueError("min e max devem ser números finitos")
+        # min == max (raster constante) é aceito: colorir() usa uma faixa unitária
+        if vmax < vmin:
+            raise ValueError("max não pode ser menor que min")
+        return paleta, vmin, vmax
+
+    async def tile(self, partes, consulta, cabecalhos):
+        """
+        (status, cabeçalhos, corpo) de /tiles/<camada>/<z>/<x>/<y>.png
+        """
+        if len(partes) < 5 or not partes[-1].endswith('.png'):
+            return 404, {}, b''
+        camada = '/'.join(partes[1:-3])
+        try:
+            z, x, y = int(partes[-3]), int(partes[-2]), int(partes[-1][:-4])
+        except ValueError:
+            return 404, {}, b''
+        if camada not in self.rasters:
+            self.rasters = catalogo()  # raster novo desde o início do servidor
+        caminho = self.rasters.get(camada)
+        if caminho is None or not 0 <= z <= 24 or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+            return 404, {}, b''
+        try:
+            paleta, vmin, vmax = self._escala(caminho, consulta)
+        except (KeyError, ValueError) as e:
+            return resposta_texto(400, str(e))
+
+        # O ETag identifica o tile sem desenhá-lo: arquivo (e versão), posição e escala
+        chave = (_identificacao(caminho)['mtime_ns'], caminho, z, x, y, paleta, vmin, vmax)
+        cabecalhos_resposta = {'ETag': etag(repr(chave).encode()), 'Cache-Control': f'public, max-age={MAX_AGE}'}
+        if cabecalhos.get('if-none-match') == cabecalhos_resposta['ETag']:
+            return 304, cabecalhos_resposta, b''
+
+        def desenhar():
+            png = renderizar(caminho, z, x, y, paleta, vmin, vmax) or tile_vazio()
+            return np.frombuffer(png, dtype=np.uint8)
+
+        png = await self.em_thread(cache_tiles.obter, chave, desenhar)
+        cabecalhos_resposta['Content-Type'] = 'image/png'
+        return 200, cabecalhos_resposta, png.tobytes()
+
+    def camadas(self):
+        self.rasters = catalogo()
+        lista = []
+        for camada, caminho in self.rasters.items():
+            paleta, vmin, vmax = ESCALAS.get(indice_do_arquivo(caminho), ESCALA_PADRAO)
+            lista.append({'id': camada, 'arquivo': caminho, 'indice': indice_do_arquivo(caminho),
+                          'paleta': paleta, 'min': vmin, 'max': vmax,
+                          'tiles': f"/tiles/{camada}/{{z}}/{{x}}/{{y}}.png"})
+        return resposta_json({'camadas': lista, 'cache': cache_tiles.estatisticas()})
+
+    async def rota(self, partes, consulta, cabecalhos):
+        if partes == ['camadas']:
+            return self.camadas()
+        if partes and partes[0] == 'tiles':
+            return await self.tile(partes, consulta, cabecalhos)
+        return 404, {}, b''
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local de tiles XYZ dos rasters de índices")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--porta', type=int, default=PORTA_PADRAO)
+    parser.add_argument('--trabalhadores', type=int, help="threads de desenho (padrão: nº de CPUs)")
+    args = parser.parse_args()
+
+    servidor = ServidorTiles(args.trabalhadores)
+    servidor.executar(args.host, args.porta,
+                      f"🗺️  {len(servidor.rasters)} camada(s) em /tiles/<camada>/{{z}}/{{x}}/{{y}}.png; catálogo em /camadas")
+    print(f"   Cache de tiles: {cache_tiles.estatisticas()}")
+
+
+if __name__ == "__main__":
+    iniciar(__file__)
+    main()
@@ -0,0 +1,75 @@
+"""
+Execução concorrente de trabalhos de renderização (mapas e páginas)
+
+Um trabalho é uma função de módulo que recebe seus argumentos e devolve
+{arquivo: conteúdo} sem gravar nada. Os trabalhos rodam em paralelo num
+pool de processos (o templating do folium/jinja é CPU puro, preso ao GIL
+numa thread só), e o processo principal grava as saídas de cada um assim que
+ele termina, em threads, sem segurar o laço asyncio nem os outros trabalhos.
+O tempo total fica perto do tempo do trabalho mais lento.
+
+Os trechos medidos nos processos filhos (instrumentacao.medir) voltam para o
+relatório de execução do script principal, marcados com o nome do trabalho.
+
+Uso:
+    TRABALHOS = {
+        'slider': (criar_mapa_slider_temporal, (serie,), {'sidecar': False}),
+        'serie': (criar_graficos_serie_temporal, (serie,), {}),
+    }
+    gravados = executar(TRABALHOS)       # {nome: [arquivos]}
+"""
+
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from instrumentacao import medir, exportar_trechos, incorporar_trechos
+
+
+def _iniciar_processo():
+    # Com fork, o filho herda os trechos já medidos pelo pai: descarta
+    exportar_trechos()
+
+
+def _executar(funcao, args, kwargs):
+    saidas = funcao(*args, **kwargs)
+    return saidas, exportar_trechos()
+
+
+def gravar(caminho, conteudo):
+    """
+    Grava uma saída (str em UTF-8 ou bytes), criando a pasta se preciso
+    """
+    pasta = os.path.dirname(caminho)
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+    dados = conteudo.encode('utf-8') if isinstance(conteudo, str) else conteudo
+    with medir('gravar', 'render', arquivo=caminho, bytes=len(dados)):
+        with open(caminho, 'wb') as f:
+            f.write(dados)
+
+
+async def executar_trabalhos(trabalhos, trabalhadores=None):
+    """
+    Roda os trabalhos {nome: (funcao, args, kwargs)} em paralelo; retorna {nome: [arquivos]}
+    """
+    loop = asyncio.get_running_loop()
+    trabalhadores = max(1, min(len(trabalhos), trabalhadores or os.cpu_count()))
+    with ProcessPoolExecutor(max_workers=trabalhadores, initializer=_iniciar_processo) as executor:
+
+        async def um(nome, funcao, args, kwargs):
+            inicio = time.perf_counter()
+            saidas, trechos_filho = await loop.run_in_executor(executor, _executar, funcao, args, kwargs)
+            incorporar_trechos(trechos_filho, trabalho=nome)
+            await asyncio.gather(*(asyncio.to_thread(gravar, arquivo, conteudo)
+                                   for arquivo, conteudo in saidas.items()))
+            print(f"   ✅ {nome}: {len(saidas)} arquivo(s) em {time.perf_counter() - inicio:.2f}s")
+            return nome, list(saidas)
+
+        resultados = await asyncio.gather(*(um(nome, *trabalho) for nome, trabalho in trabalhos.items()))
+    return dict(resultados)
+
+
+def executar(trabalhos, trabalhadores=None):
+    return asyncio.run(executar_trabalhos(trabalhos, trabalhadores))
@@ -0,0 +1,26 @@
+"""
+Funções utilitárias de arquivos compartilhadas pelos scripts do pipeline PELD
+"""
+
+import glob
+import hashlib
+import os
+
+
+def hash_arquivo(caminho, tamanho_bloco=1 << 20):
+    """
+    Calcula o SHA-256 do conteúdo de um arquivo, lendo em blocos
+    para não carregar rasters grandes inteiros na memória
+    """
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def listar_paginas_html(pasta='.'):
+    """
+    Lista as páginas HTML publicadas (mapas e dashboard) na raiz do projeto
+    """
+    return sorted(os.path.normpath(p) for p in glob.glob(os.path.join(pasta, '*.html')))
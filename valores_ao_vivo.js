@@ -0,0 +1,38 @@
+// Valores ao vivo da API de zonas (servidor_api_zonas.py): elementos com
+// data-peld-zona/data-peld-indice recebem o valor atual; sem a API, fica o
+// valor gravado na página. Fora de localhost, só com ?api=<endereço>.
+// Incluído pelas páginas com <script src="valores_ao_vivo.js" data-api="...">.
+(function () {
+    var padrao = document.currentScript && document.currentScript.dataset.api;
+    var local = ['localhost', '127.0.0.1', ''].indexOf(location.hostname) >= 0;
+    var api = new URLSearchParams(location.search).get('api') || (local ? padrao : null);
+    if (!api) return;
+    var pedidos = {};
+    function preencher(raiz) {
+        if (!raiz.querySelectorAll) return;
+        raiz.querySelectorAll('[data-peld-zona]').forEach(function (el) {
+            var q = 'zona=' + encodeURIComponent(el.dataset.peldZona) +
+                    '&indice=' + encodeURIComponent(el.dataset.peldIndice);
+            pedidos[q] = pedidos[q] || fetch(api + '/resumo?' + q)
+                .then(function (r) { return r.ok ? r.json() : null; })
+                .catch(function () { return null; });
+            pedidos[q].then(function (d) {
+                var serie = d && d.series[0];
+                var v = serie && serie.ultima[el.dataset.peldCampo || 'media'];
+                if (v == null) return;
+                var casas = +(el.dataset.peldCasas || 3);
+                el.textContent = casas ? Number(v).toFixed(casas) : Math.round(v).toLocaleString('pt-BR');
+                el.title = 'Atualizado pela API: ' + serie.ultima.data_aquisicao;
+            });
+        });
+    }
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', function () { preencher(document); });
+    } else {
+        preencher(document);
+    }
+    // Popups do Leaflet só entram no documento quando abertos
+    new MutationObserver(function (mudancas) {
+        mudancas.forEach(function (m) { m.addedNodes.forEach(preencher); });
+    }).observe(document.documentElement, {childList: true, subtree: true});
+})();